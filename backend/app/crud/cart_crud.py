@@ -1,25 +1,63 @@
 # backend/app/crud/cart_crud.py
-from typing import Optional
-from sqlalchemy.orm import Session
+"""
+Carrito del usuario.
 
-from ..models.models import Cart, CartItem
+Las mutaciones trabajan sobre el CartOut (la foto del carrito) y después lo
+guardan (mutate_cart):
+  - sin CART_STORE: con la fila de carts bloqueada (FOR UPDATE) se escriben
+    solo los cambios de estas operaciones (INSERT / UPDATE / DELETE por op),
+    nunca la foto entera: dos requests cruzadas no se pisan
+  - con CART_STORE (services/cart_store.py): la foto nueva se guarda con
+    compare-and-set (si otra request la cambió entre medio, se reintenta) y
+    se persiste en segundo plano (write-behind), en tandas
+
+El stock de los productos nunca pasa por el store: se valida y descuenta
+en la base, con SELECT ... FOR UPDATE, en la request.
+"""
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from ..models.models import Cart, CartItem, Product
 from ..schemas.cart_schemas import CartOut, CartItemOut
+from ..services.cart_store import get_cart_store
+
+
+CAS_RETRIES = 5
+
+
+class CartOpError(Exception):
+    """Una operación del carrito no se pudo aplicar (índice en el lote)."""
 
+    def __init__(self, index: Optional[int], status_code: int, msg: str):
+        super().__init__(msg)
+        self.index = index
+        self.status_code = status_code
+        self.msg = msg
 
-def _get_or_create_cart(db: Session, user_id: str) -> Cart:
+
+def get_or_create_cart(db: Session, user_id: str, lock: bool = False) -> Cart:
     """
-    Devuelve el carrito del usuario.
-    Si no existe, lo crea vacío.
+    Devuelve el carrito del usuario con sus items ya cargados
+    (un SELECT del carrito + uno de los items).
+    Si no existe, lo crea vacío. Con lock=True la fila de carts queda
+    bloqueada (SELECT ... FOR UPDATE) hasta el commit.
     """
-    cart: Optional[Cart] = (
-        db.query(Cart)
-        .filter(Cart.user_id == user_id)
+    stmt = (
+        select(Cart)
+        .where(Cart.user_id == user_id)
         .order_by(Cart.created_at.desc())
-        .first()
+        .limit(1)
+        .options(selectinload(Cart.items))
     )
+    if lock:
+        stmt = stmt.with_for_update(of=Cart)
+    cart: Optional[Cart] = db.scalars(stmt).first()
 
     if not cart:
-        cart = Cart(user_id=user_id)
+        cart = Cart(user_id=user_id, items=[])
         db.add(cart)
         db.commit()
         db.refresh(cart)
@@ -27,61 +65,255 @@ def _get_or_create_cart(db: Session, user_id: str) -> Cart:
     return cart
 
 
+def cart_to_out(cart: Cart) -> CartOut:
+    """Arma el CartOut con los objetos que ya están en la sesión."""
+    items_out = [
+        CartItemOut.model_validate(item)  # usa from_attributes=True
+        for item in cart.items
+    ]
+    return _with_total(CartOut(id=cart.id, user_id=cart.user_id, items=items_out))
+
+
+def _with_total(cart: CartOut) -> CartOut:
+    cart.total = sum(i.price * i.qty for i in cart.items)
+    return cart
+
+
+def load_cart(db: Session, user_id: str) -> CartOut:
+    """
+    Del store si está; si no, de la base (y queda en el store). El store se
+    llena con compare-and-set desde "no existe": si entre la lectura de la
+    base y la escritura una mutación ya guardó su foto, gana esa.
+    """
+    store = get_cart_store()
+    if store is None:
+        return cart_to_out(get_or_create_cart(db, user_id))
+
+    for _ in range(CAS_RETRIES):
+        raw = store.get_raw(user_id)
+        if raw is not None:
+            return CartOut.model_validate_json(raw)
+        cart = cart_to_out(get_or_create_cart(db, user_id))
+        if store.compare_and_set(user_id, None, cart.model_dump_json(), dirty=False):
+            return cart
+    raise CartOpError(None, 409, "El carrito cambió mientras se leía, reintentá")
+
+
 def get_cart_for_user(db: Session, user_id: str) -> CartOut:
     """
     Devuelve el carrito del usuario como CartOut,
     calculando el total a partir de los items.
     """
-    cart = _get_or_create_cart(db, user_id)
+    return load_cart(db, user_id)
 
-    items_out = [
-        CartItemOut.model_validate(item)  # usa from_attributes=True
-        for item in cart.items
+
+# ============================
+# Persistencia (sync o write-behind)
+# ============================
+def persist_carts(db: Session, carts: List[CartOut]) -> None:
+    """
+    Deja cart_items como en las fotos: borra los que no están, actualiza
+    qty de los que cambiaron e inserta los nuevos. Todo en bloque para
+    todos los carritos. No hace commit.
+    """
+    if not carts:
+        return
+    table = CartItem.__table__
+    by_cart = {c.id: c for c in carts}
+
+    current: Dict[str, int] = {
+        row.id: row.qty
+        for row in db.execute(
+            select(table.c.id, table.c.qty).where(table.c.cart_id.in_(list(by_cart)))
+        )
+    }
+    wanted = {it.id: (cart_id, it) for cart_id, c in by_cart.items() for it in c.items}
+
+    deletes = [item_id for item_id in current if item_id not in wanted]
+    updates = [
+        {"_id": item_id, "qty": it.qty}
+        for item_id, (_, it) in wanted.items()
+        if item_id in current and current[item_id] != it.qty
+    ]
+    inserts = [
+        {"cart_id": cart_id, **it.model_dump()}
+        for item_id, (cart_id, it) in wanted.items()
+        if item_id not in current
     ]
 
-    total = sum(i.price * i.qty for i in cart.items)
+    if deletes:
+        db.execute(delete(table).where(table.c.id.in_(deletes)))
+    if updates:
+        db.execute(update(table).where(table.c.id == bindparam("_id")), updates)
+    if inserts:
+        db.execute(insert(table), inserts)
 
-    return CartOut(
-        id=cart.id,
-        user_id=cart.user_id,
-        items=items_out,
-        total=total,
-    )
+
+def sync_cart_to_db(db: Session, user_id: str) -> Optional[str]:
+    """
+    Antes de leer cart_items de la base (checkout): lo que esté en el
+    store se escribe ya, en la sesión de la request. Devuelve la foto
+    usada (para cart_emptied).
+    """
+    store = get_cart_store()
+    raw = store.get_raw(user_id) if store is not None else None
+    if raw is not None:
+        persist_carts(db, [CartOut.model_validate_json(raw)])
+        db.flush()
+    return raw
 
 
-def update_cart_item_qty(db: Session, user_id: str, item_id: str, qty: int) -> bool:
+def cart_emptied(user_id: str, cart_id: str, snapshot: Optional[str], ordered: Dict[str, int]) -> None:
     """
-    Cambia la cantidad de un ítem del carrito del usuario.
+    El checkout sacó de la base los items `ordered` (item_id -> qty). En el
+    store se descuentan con compare-and-set contra la foto que usó el
+    checkout; si otra request la cambió entre medio, se descuentan de la
+    foto actual (lo que se agregó después queda). La foto nueva se marca
+    sucia: si el flush escribió una vieja justo antes, el siguiente la
+    corrige.
     """
-    ci: Optional[CartItem] = (
-        db.query(CartItem)
-        .join(Cart, CartItem.cart_id == Cart.id)
-        .filter(CartItem.id == item_id, Cart.user_id == user_id)
-        .one_or_none()
-    )
+    store = get_cart_store()
+    if store is None:
+        return
+    raw = snapshot
+    for _ in range(CAS_RETRIES):
+        current = CartOut.model_validate_json(raw).items if raw is not None else []
+        items = [
+            it.model_copy(update={"qty": it.qty - ordered.get(it.id, 0)})
+            for it in current
+            if it.qty > ordered.get(it.id, 0)
+        ]
+        cart = _with_total(CartOut(id=cart_id, user_id=user_id, items=items))
+        if store.compare_and_set(user_id, raw, cart.model_dump_json()):
+            return
+        raw = store.get_raw(user_id)
+    store.delete(user_id)  # se vuelve a leer de la base
 
-    if not ci:
-        return False
 
-    ci.qty = qty
-    db.commit()
-    return True
+# ============================
+# Mutaciones
+# ============================
+def apply_cart_ops(db: Session, cart: CartOut, ops: List) -> Tuple[CartOut, List[tuple]]:
+    """
+    Aplica operaciones (en orden, todas o ninguna) sobre la foto del carrito:
+      - add:    product_id + qty; valida y descuenta stock
+      - set:    item_id o product_id + qty
+      - remove: item_id o product_id
+    Los productos de los `add` se leen y bloquean juntos en un único
+    SELECT ... FOR UPDATE. Ante un error hace rollback y levanta
+    CartOpError. No hace commit.
+
+    Devuelve la foto nueva y los cambios de fila que hicieron las ops
+    (para persist_changes), en orden.
+    """
+    items = [it.model_copy() for it in cart.items]
+    changes: List[tuple] = []
+
+    add_ids = {op.product_id for op in ops if op.op == "add"}
+    products: Dict[str, Product] = {}
+    if add_ids:
+        products = {
+            p.id: p
+            for p in db.scalars(
+                select(Product)
+                .where(Product.id.in_(add_ids), Product.is_active == True)
+                .with_for_update()
+            )
+        }
+
+    def fail(index: int, code: int, msg: str) -> CartOpError:
+        db.rollback()
+        return CartOpError(index, code, msg)
+
+    for index, op in enumerate(ops):
+        if op.op == "add":
+            product = products.get(op.product_id)
+            if product is None:
+                raise fail(index, 404, "Producto no encontrado")
+            if product.stock < op.qty:
+                raise fail(index, 400, "Stock insuficiente")
+            product.stock -= op.qty
+            item = next((it for it in items if it.product_id == product.id), None)
+            if item:
+                item.qty += op.qty
+                changes.append(("incr", item.id, op.qty))
+            else:
+                item = CartItemOut(
+                    id=str(uuid4()),
+                    product_id=product.id,
+                    name=product.name,
+                    price=product.price,
+                    qty=op.qty,
+                    image=product.image_url or "",
+                    seller=str(product.seller_id) if product.seller_id else None,
+                    stock_snapshot=product.stock,
+                )
+                items.append(item)
+                changes.append(("insert", item))
+            continue
 
+        item = next(
+            (it for it in items
+             if (op.item_id and it.id == op.item_id) or (not op.item_id and it.product_id == op.product_id)),
+            None,
+        )
+        if item is None:
+            raise fail(index, 404, "Ítem no encontrado")
+        if op.op == "set":
+            item.qty = op.qty
+            changes.append(("set", item.id, op.qty))
+        else:
+            items.remove(item)
+            changes.append(("delete", item.id))
 
-def remove_cart_item(db: Session, user_id: str, item_id: str) -> bool:
+    return _with_total(CartOut(id=cart.id, user_id=cart.user_id, items=items)), changes
+
+
+def persist_changes(db: Session, cart_id: str, changes: List[tuple]) -> None:
     """
-    Elimina un ítem del carrito del usuario.
+    Escribe solo lo que tocaron las ops (no la foto entera): lo que otra
+    request agregó mientras tanto no se borra. No hace commit.
     """
-    ci: Optional[CartItem] = (
-        db.query(CartItem)
-        .join(Cart, CartItem.cart_id == Cart.id)
-        .filter(CartItem.id == item_id, Cart.user_id == user_id)
-        .one_or_none()
-    )
+    table = CartItem.__table__
+    for change in changes:
+        kind = change[0]
+        if kind == "insert":
+            db.execute(insert(table).values(cart_id=cart_id, **change[1].model_dump()))
+        elif kind == "incr":
+            db.execute(update(table).where(table.c.id == change[1]).values(qty=table.c.qty + change[2]))
+        elif kind == "set":
+            db.execute(update(table).where(table.c.id == change[1]).values(qty=change[2]))
+        else:
+            db.execute(delete(table).where(table.c.id == change[1]))
 
-    if not ci:
-        return False
 
-    db.delete(ci)
+def commit_cart_ops(db: Session, cart: CartOut, ops: List) -> CartOut:
+    """Aplica las ops sobre `cart` (ya cargado), escribe sus cambios y commitea."""
+    new, changes = apply_cart_ops(db, cart, ops)
+    persist_changes(db, cart.id, changes)
     db.commit()
-    return True
+    return new
+
+
+def mutate_cart(db: Session, user_id: str, ops: List) -> CartOut:
+    """Carga, aplica y guarda el carrito con un solo commit."""
+    store = get_cart_store()
+    if store is None:
+        return commit_cart_ops(db, cart_to_out(get_or_create_cart(db, user_id, lock=True)), ops)
+
+    for _ in range(CAS_RETRIES):
+        raw = store.get_raw(user_id)
+        cart = CartOut.model_validate_json(raw) if raw is not None else cart_to_out(get_or_create_cart(db, user_id))
+        new, _ = apply_cart_ops(db, cart, ops)
+        new_raw = new.model_dump_json()
+        if not store.compare_and_set(user_id, raw, new_raw):
+            db.rollback()  # otra request cambió el carrito: se deshace el stock y se reintenta
+            continue
+        try:
+            db.commit()  # stock de los add
+        except Exception:
+            db.rollback()
+            store.compare_and_set(user_id, new_raw, raw)
+            raise
+        return new
+    raise CartOpError(None, 409, "El carrito cambió mientras se guardaba, reintentá")
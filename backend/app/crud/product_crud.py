@@ -1,7 +1,9 @@
 ##backend/app/crud/product_crud.py
 # backend/app/crud/product_crud.py
+from sqlalchemy import bindparam, delete, insert, select, update
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Dict, Optional, List
+from uuid import uuid4
 from ..models.models import Product, ProductImage
 from ..schemas.product_schemas import ProductCreate, ProductUpdate
 
@@ -22,7 +24,7 @@ def list_products(db: Session, q: str | None, category_id: str | None,
 
 def create_product(db: Session, seller_id: str, payload: ProductCreate) -> Product:
     p = Product(
-        seller_id=seller_id, name=payload.name, description=payload.description,
+        seller_id=seller_id, name=payload.name, sku=payload.sku, description=payload.description,
         price=payload.price, stock=payload.stock, condition=payload.condition,
         category_id=payload.category_id, subcategory=payload.subcategory,
         image_url=payload.image_url, is_active=payload.is_active
@@ -39,13 +41,71 @@ def update_product(db: Session, p: Product, payload: ProductUpdate) -> Product:
         if k != "images":
             setattr(p, k, v)
     if payload.images is not None:
-        for im in list(p.images or []):
-            db.delete(im)
-        for i, url in enumerate(payload.images):
-            db.add(ProductImage(product_id=p.id, url=url, sort_order=i))
+        # si cambió algún campo, el UPDATE del ORM (before_update) ya sube la versión
+        sync_product_images(db, {p.id: payload.images}, bump_version=p not in db.dirty)
+        db.expire(p, ["images"])
     db.commit(); db.refresh(p)
     return p
 
 def soft_delete_product(db: Session, p: Product) -> None:
     p.is_active = False
     db.commit()
+
+def sync_product_images(db: Session, images_by_product: Dict[str, List[str]],
+                        bump_version: bool = True) -> Dict[str, int]:
+    """
+    Deja las imágenes de varios productos como en `images_by_product`
+    (URLs en orden) tocando solo lo que cambió:
+      - las URLs que siguen quedan con su id (solo se corrige sort_order)
+      - las nuevas se insertan y las que ya no están se borran
+    Todo en bloque para todos los productos: un SELECT, y a lo sumo un
+    DELETE, un UPDATE executemany y un INSERT executemany. No hace commit.
+    A los productos con cambios les sube `version` (salvo bump_version=False,
+    si el caller ya la sube en su propio UPDATE).
+    Devuelve cuántas filas insertó / reordenó / borró.
+    """
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    if not images_by_product:
+        return counts
+    table = ProductImage.__table__
+
+    # URL -> ids existentes (una URL repetida puede tener más de una fila)
+    current: Dict[str, Dict[str, List[tuple]]] = {pid: {} for pid in images_by_product}
+    for row in db.execute(
+        select(table.c.id, table.c.product_id, table.c.url, table.c.sort_order)
+        .where(table.c.product_id.in_(list(images_by_product)))
+        .order_by(table.c.sort_order, table.c.id)
+    ):
+        current[row.product_id].setdefault(row.url, []).append((row.id, row.sort_order))
+
+    inserts, reorders, deletes = [], [], []
+    changed = set()
+    for pid, urls in images_by_product.items():
+        existing = current[pid]
+        before = len(inserts) + len(reorders) + len(deletes)
+        for i, url in enumerate(urls):
+            if existing.get(url):
+                image_id, sort_order = existing[url].pop(0)
+                if sort_order != i:
+                    reorders.append({"_id": image_id, "sort_order": i})
+            else:
+                inserts.append({"id": str(uuid4()), "product_id": pid, "url": url, "sort_order": i})
+        deletes.extend(image_id for left in existing.values() for image_id, _ in left)
+        if len(inserts) + len(reorders) + len(deletes) != before:
+            changed.add(pid)
+
+    if deletes:
+        db.execute(delete(table).where(table.c.id.in_(deletes)))
+    if reorders:
+        db.execute(update(table).where(table.c.id == bindparam("_id")), reorders)
+    if inserts:
+        db.execute(insert(table), inserts)
+    if changed and bump_version:
+        products = Product.__table__
+        db.execute(
+            update(products)
+            .where(products.c.id.in_(changed))
+            .values(version=products.c.version + 1)
+        )
+    counts.update(inserted=len(inserts), updated=len(reorders), deleted=len(deletes))
+    return counts
@@ -1,10 +1,19 @@
 # backend/app/db.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+import itertools
 import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
 from typing import Generator
 
+from .metrics import current_route
+
 # Carga variables desde .env
 load_dotenv()
 
@@ -18,12 +27,276 @@ connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+
+# ============================
+# Pool: configuración por .env
+# ============================
+# DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE
+# DB_DISCONNECT_MODE:
+#   - pessimistic (default): pre_ping en cada checkout (un round trip extra)
+#   - optimistic: sin pre_ping; se confía en pool_recycle y en que SQLAlchemy
+#     invalida el pool cuando un statement falla por desconexión
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # < wait_timeout de MariaDB
+DISCONNECT_MODE = os.getenv("DB_DISCONNECT_MODE", "pessimistic").lower()
+if DISCONNECT_MODE not in ("pessimistic", "optimistic"):
+    raise RuntimeError("DB_DISCONNECT_MODE debe ser 'pessimistic' u 'optimistic'")
+
+
+class PoolStats:
+    """Contadores del pool (por proceso) para tunear workers vs DB."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_avg_ms": (self.wait_total / self.wait_count * 1000) if self.wait_count else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_wait(time.perf_counter() - t0, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - t0)
+        return conn
+
+
+_in_memory = DATABASE_URL.startswith("sqlite") and (
+    ":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") in ("sqlite:", "sqlite+pysqlite:")
+)
+if _in_memory:
+    # Cada conexión a "sqlite://" abre su propia base vacía, y el engine
+    # async (aiosqlite) usa otras conexiones: vería una base sin tablas.
+    # Una base en memoria con nombre y cache=shared es la misma para todas
+    # las conexiones del proceso, sync y async, mientras quede alguna abierta
+    # (el pool del engine sync las mantiene).
+    DATABASE_URL = "sqlite:///file:mkt_memdb?mode=memory&cache=shared&uri=true"
+
+pool_kwargs = {}
+if not _in_memory:
+    # sqlite en memoria usa SingletonThreadPool: no tiene sentido dimensionarlo
+    pool_kwargs = dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+    )
+
 engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
-    pool_pre_ping=True,
+    pool_pre_ping=(DISCONNECT_MODE == "pessimistic"),
+    **pool_kwargs,
 )
 
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_conn, conn_record):
+    pool_stats.incr("connects")
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    pool_stats.incr("checkouts")
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, conn_record):
+    pool_stats.incr("checkins")
+
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_conn, conn_record, exception):
+    pool_stats.incr("invalidations")
+
+
+def pool_status() -> dict:
+    """Estado actual del pool + contadores acumulados."""
+    pool = engine.pool
+    out = {
+        "pid": os.getpid(),
+        "pool_class": type(pool).__name__,
+        "disconnect_mode": DISCONNECT_MODE,
+    }
+    if isinstance(pool, QueuePool):
+        out.update({
+            "size": pool.size(),
+            "max_overflow": MAX_OVERFLOW,
+            "timeout": POOL_TIMEOUT,
+            "recycle": POOL_RECYCLE,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # _overflow arranca en -pool_size: negativo = todavía no desborda
+            "overflow": max(0, pool.overflow()),
+        })
+    out.update(pool_stats.snapshot())
+    return out
+
+
+# ============================
+# Queries lentas
+# ============================
+# Todo statement que tarde más de SLOW_QUERY_MS queda en un ring buffer
+# (los últimos SLOW_QUERY_BUFFER, por proceso) con la ruta que lo
+# disparó y la forma de sus parámetros (tipos, no valores). Los valores
+# se guardan solo en memoria para poder pedir el EXPLAIN después
+# (ver /admin/db/slow-queries).
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "100"))
+
+
+def param_shape(parameters):
+    """Tipos de los parámetros, con la misma forma (dict / lista)."""
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [param_shape(p) if isinstance(p, (dict, list, tuple)) else type(p).__name__ for p in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, size: int = SLOW_QUERY_BUFFER):
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def record(self, engine_name: str, statement: str, parameters, executemany: bool, ms: float) -> None:
+        if executemany and parameters:
+            shape = {"rows": len(parameters), "row": param_shape(parameters[0])}
+            explain_params = parameters[0]
+        else:
+            shape = param_shape(parameters)
+            explain_params = parameters
+        entry = {
+            "id": next(self._ids),
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+            "engine": engine_name,
+            "route": current_route(),
+            "duration_ms": round(ms, 2),
+            "statement": statement,
+            "params": shape,
+            "executemany": executemany,
+            "_explain_params": explain_params,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> list:
+        with self._lock:
+            return [
+                {k: v for k, v in e.items() if not k.startswith("_")}
+                for e in reversed(self._entries)
+            ]
+
+    def get(self, entry_id: int) -> dict | None:
+        with self._lock:
+            return next((e for e in self._entries if e["id"] == entry_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_queries = SlowQueryLog()
+
+# nombre -> Engine sync contra el que se corre el EXPLAIN
+_explain_engines: dict = {}
+
+
+def instrument_slow_queries(eng: Engine, name: str) -> None:
+    # el inicio va en el contexto de ejecución, no en conn.info: si el
+    # statement falla, after_cursor_execute no corre y el contexto se
+    # descarta con él (una pila por conexión quedaba con el inicio colgado
+    # y el siguiente statement medía con el tiempo del que falló)
+    @event.listens_for(eng, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_t0 = time.perf_counter()
+
+    @event.listens_for(eng, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_slow_t0", None)
+        if t0 is None:
+            return
+        ms = (time.perf_counter() - t0) * 1000
+        if ms >= slow_queries.threshold_ms:
+            slow_queries.record(name, statement, parameters, executemany, ms)
+
+
+def explain_slow_query(entry_id: int) -> dict | None:
+    """
+    Plan del statement capturado (EXPLAIN QUERY PLAN en SQLite, EXPLAIN en
+    MySQL/MariaDB) con los mismos parámetros. Solo SELECT: no se re-ejecutan
+    escrituras. None si la entrada ya salió del buffer.
+    """
+    entry = slow_queries.get(entry_id)
+    if entry is None:
+        return None
+
+    eng = _explain_engines.get(entry["engine"], engine)
+    if not entry["statement"].lstrip().upper().startswith(("SELECT", "WITH")):
+        return {"id": entry_id, "dialect": eng.dialect.name, "plan": None,
+                "detail": "Solo se explican SELECT."}
+
+    prefix = "EXPLAIN QUERY PLAN " if eng.dialect.name == "sqlite" else "EXPLAIN "
+    params = entry["_explain_params"]
+    with eng.connect() as conn:
+        result = conn.exec_driver_sql(prefix + entry["statement"], params if params else ())
+        cols = list(result.keys())
+        plan = [dict(zip(cols, row)) for row in result.all()]
+    return {"id": entry_id, "dialect": eng.dialect.name, "plan": plan}
+
+
+instrument_slow_queries(engine, "primary")
+_explain_engines["primary"] = engine
+
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -31,6 +304,102 @@ SessionLocal = sessionmaker(
 )
 
 
+# ============================
+# Engine async (rutas de lectura)
+# ============================
+# Mismo DATABASE_URL con driver async (aiomysql / aiosqlite),
+# o ASYNC_DATABASE_URL explícita. La URL y el engine se resuelven recién en
+# la primera request async, así el proceso arranca aunque el driver no esté
+# instalado o el backend no tenga driver async.
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql", "mariadb": "aiomysql"}
+
+
+def to_async_url(url: str) -> str:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No hay driver async configurado para '{backend}'")
+    return u.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+_async_sessionmakers: dict = {}
+_async_lock = threading.Lock()
+
+
+def _async_sessionmaker_for(name: str, sync_url: str, env_var: str):
+    """
+    Sessionmaker async de `name` ("primary" / "replica"). La URL async
+    (env_var o derivada de sync_url) se resuelve recién acá: un backend
+    sin driver async no rompe el arranque de un despliegue solo sync.
+    """
+    if name not in _async_sessionmakers:
+        with _async_lock:
+            if name not in _async_sessionmakers:
+                from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+                url = os.getenv(env_var) or to_async_url(sync_url)
+                async_pool_kwargs = {k: v for k, v in pool_kwargs.items() if k != "poolclass"}
+                async_engine = create_async_engine(
+                    url,
+                    pool_pre_ping=(DISCONNECT_MODE == "pessimistic"),
+                    **async_pool_kwargs,
+                )
+                instrument_slow_queries(async_engine.sync_engine, name)
+                _async_sessionmakers[name] = async_sessionmaker(
+                    bind=async_engine,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+    return _async_sessionmakers[name]
+
+
+def get_async_sessionmaker():
+    return _async_sessionmaker_for("primary", DATABASE_URL, "ASYNC_DATABASE_URL")
+
+
+# ============================
+# Réplica de lectura (opcional)
+# ============================
+# Si DATABASE_URL_READ está definida, analytics / historial de ventas /
+# catálogo leen de la réplica (ver deps.get_read_db). Si no, todo va al
+# primario como siempre.
+DATABASE_URL_READ = os.getenv("DATABASE_URL_READ")
+
+read_engine = None
+ReadSessionLocal = None
+if DATABASE_URL_READ:
+    read_engine = create_engine(
+        DATABASE_URL_READ,
+        connect_args={"check_same_thread": False} if DATABASE_URL_READ.startswith("sqlite") else {},
+        pool_pre_ping=(DISCONNECT_MODE == "pessimistic"),
+        **{k: v for k, v in pool_kwargs.items() if k != "poolclass"},
+    )
+    instrument_slow_queries(read_engine, "replica")
+    _explain_engines["replica"] = read_engine
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        autoflush=False,
+        autocommit=False,
+    )
+
+
+def get_async_read_sessionmaker():
+    """Sessionmaker async de la réplica (None si no hay réplica)."""
+    if not DATABASE_URL_READ:
+        return None
+    return _async_sessionmaker_for("replica", DATABASE_URL_READ, "ASYNC_DATABASE_URL_READ")
+
+
+async def get_async_db():
+    """
+    Dependency async: una AsyncSession por request.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
 class Base(DeclarativeBase):
     """Base para todos los modelos ORM."""
     pass
@@ -48,10 +417,40 @@ def get_db():
         db.close()
 
 
+# ============================
+# Versión del esquema (Alembic)
+# ============================
+# Tablas e índices los crean las migraciones (backend/migrations):
+#   alembic upgrade head
+# Al arrancar solo se verifica que la base esté en esta revisión.
+# Al agregar una migración, actualizar SCHEMA_REVISION (lo chequea un test).
+SCHEMA_REVISION = "0008"
+
+
+def schema_revision() -> str | None:
+    """Revisión actual de la base (None si nunca se migró)."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except exc.DBAPIError:
+            return None
+
+
+def verify_schema() -> None:
+    current = schema_revision()
+    if current != SCHEMA_REVISION:
+        raise RuntimeError(
+            f"La base está en la revisión {current!r} y la app espera {SCHEMA_REVISION!r}. "
+            "Corré `alembic upgrade head` (una base creada con create_all: "
+            "`alembic stamp 0001` y después `alembic upgrade head`)."
+        )
+
+
 def init_db():
     """
     Importa los modelos para que queden registrados en Base.metadata
     y crea las tablas en la base de datos.
+    Solo para SQLite en memoria / scripts: el resto usa alembic.
     """
     from .models import models as m
 
@@ -72,6 +471,7 @@ def init_db():
         m.Order,
         m.OrderItem,
         m.Payment,
+        m.UserProductEntitlement,
     )
 
     Base.metadata.create_all(bind=engine)
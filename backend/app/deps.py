@@ -1,11 +1,13 @@
 # backend/app/deps.py
+import os
+import time
 from typing import Generator
 
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from jose import jwt
 
-from .db import SessionLocal
+from .db import SessionLocal, ReadSessionLocal, get_async_db, get_async_read_sessionmaker
 from .models.models import User
 from .security.tokens import SECRET_KEY, ALGORITHM  # 👈 mismo secret/algoritmo que los tokens
 
@@ -21,12 +23,67 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_current_user(
-    authorization: str | None = Header(default=None),
-    db: Session = Depends(get_db),
-) -> User:
+# ============================
+# Lecturas: réplica + read-your-writes
+# ============================
+# Tras una escritura (checkout, alta/edición de producto) la respuesta trae
+# X-Read-Primary-Until. Mientras el cliente lo reenvíe y no haya vencido,
+# sus lecturas van al primario y no ven a la réplica atrasada.
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def mark_write(response: Response) -> None:
+    response.headers[READ_PRIMARY_HEADER] = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+
+
+def wants_primary(request: Request) -> bool:
+    raw = request.headers.get(READ_PRIMARY_HEADER)
+    if not raw:
+        return False
+    try:
+        return float(raw) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_db(
+    request: Request,
+    primary: Session = Depends(get_db),
+) -> Generator[Session, None, None]:
     """
-    Obtiene el usuario actual a partir del header Authorization: Bearer <token>.
+    Sesión para rutas de solo lectura: réplica si está configurada,
+    primario si no (o si el cliente pidió read-your-writes).
+    La sesión primaria no abre conexión hasta que se usa.
+    """
+    if ReadSessionLocal is None or wants_primary(request):
+        yield primary
+        return
+
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    request: Request,
+    primary: AsyncSession = Depends(get_async_db),
+):
+    """Versión async de get_read_db."""
+    factory = get_async_read_sessionmaker()
+    if factory is None or wants_primary(request):
+        yield primary
+        return
+
+    async with factory() as db:
+        yield db
+
+
+def _user_id_from_authorization(authorization: str | None) -> str:
+    """
+    Valida el header Authorization: Bearer <token> y devuelve el `sub`.
     """
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
@@ -36,6 +93,9 @@ def get_current_user(
 
     token = authorization.split(" ", 1)[1]
 
+    # jose (y su backend de cryptography) se importa en el primer request autenticado
+    from jose import jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except Exception:
@@ -50,6 +110,17 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
         )
+    return uid
+
+
+def get_current_user(
+    authorization: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+) -> User:
+    """
+    Obtiene el usuario actual a partir del header Authorization: Bearer <token>.
+    """
+    uid = _user_id_from_authorization(authorization)
 
     user = db.query(User).filter(User.id == uid).first()
     if not user:
@@ -61,6 +132,26 @@ def get_current_user(
     return user
 
 
+async def get_current_user_async(
+    authorization: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """
+    Igual que get_current_user, para rutas async (comparte la AsyncSession
+    de la request). Los roles no se cargan: no usar user.roles acá.
+    """
+    uid = _user_id_from_authorization(authorization)
+
+    user = await db.get(User, uid)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado",
+        )
+
+    return user
+
+
 def current_admin_or_self(
     user_id: str,
     user: User = Depends(get_current_user),
@@ -1,25 +1,23 @@
 # backend/app/main.py
+import importlib
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.app.routers import auth
-
-
-from .db import init_db
-
-from .routers import (
-    routes_analytics,
-    routes_products,
-    routes_order_items,
-    routes_users,
-    routes_roles,
-    routes_product_comments,
-    routes_orders,
-    routes_comments,   
-    routes_auth,
-    routes_cart,  
-    routes_admin,
-    routes_sales,
-    routes_premium,
+from fastapi.responses import PlainTextResponse
+
+from .db import init_db, verify_schema, _in_memory
+from .metrics import RequestMetricsMiddleware, request_metrics
+
+# hooks de Session (after_flush) que mantienen agregados y caches: se
+# registran siempre, esté o no cargado en este worker el router que los lee
+from .services import (  # noqa: F401
+    cart_store,
+    comment_pages,
+    entitlements,
+    product_rating,
+    product_versions,
+    sales_daily_cache,
 )
 
 app = FastAPI(title="Ecom MKT Lab API")
@@ -30,7 +28,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# último agregado = más externo: mide también lo que tarda CORS
+app.add_middleware(RequestMetricsMiddleware)
 
 
 @app.get("/health")
@@ -38,28 +39,69 @@ def health():
     return {"ok": True}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Latencia, queries y tamaño de respuesta por ruta (formato Prometheus)."""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    # el esquema lo maneja alembic; una base en memoria no se puede migrar desde afuera
+    if _in_memory:
+        init_db()
+    else:
+        verify_schema()
 
+    # CART_STORE: write-behind de carritos en segundo plano
+    store = cart_store.get_cart_store()
+    if store is not None:
+        store.start()
 
-# Routers
-app.include_router(routes_roles.router)
-app.include_router(routes_users.router)
-app.include_router(routes_products.router)
-app.include_router(routes_product_comments.router)
-app.include_router(routes_orders.router)
-app.include_router(routes_comments.router)  
-app.include_router(routes_auth.router)     
-app.include_router(routes_cart.router)  
-app.include_router(routes_admin.router)  # 👈 NUEVO
 
-app.include_router(routes_sales.router)
+@app.on_event("shutdown")
+def on_shutdown():
+    store = cart_store.get_cart_store()
+    if store is not None:
+        store.stop()  # último flush: no se pierde lo pendiente
+
+
+# ============================
+# Routers
+# ============================
+# Se importan por nombre al armar la app, en este orden (el orden de
+# include define qué ruta matchea primero). API_ROUTERS (lista separada
+# por comas) limita qué módulos se cargan: un worker dedicado, p. ej. solo
+# routes_analytics, no paga el import del resto. Sin la variable van todos.
+ROUTER_MODULES = (
+    "routes_roles",
+    "routes_users",
+    "routes_products",
+    "routes_product_comments",
+    "routes_orders",
+    "routes_comments",
+    "routes_auth",
+    "routes_cart",
+    "routes_admin",
+    "routes_sales",
+    "routes_order_items",
+    "routes_analytics",
+    "routes_premium",
+    "routes_media",
+    "auth",
+)
 
-app.include_router(routes_order_items.router)
 
-app.include_router(routes_analytics.router)
-app.include_router(routes_premium.router)
+def enabled_routers() -> tuple:
+    raw = os.getenv("API_ROUTERS")
+    if not raw:
+        return ROUTER_MODULES
+    wanted = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = wanted - set(ROUTER_MODULES)
+    if unknown:
+        raise RuntimeError(f"API_ROUTERS tiene routers desconocidos: {sorted(unknown)}")
+    return tuple(name for name in ROUTER_MODULES if name in wanted)
 
 
-app.include_router(auth.router) 
\ No newline at end of file
+for _name in enabled_routers():
+    app.include_router(importlib.import_module(f".routers.{_name}", __package__).router)
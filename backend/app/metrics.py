@@ -0,0 +1,250 @@
+# backend/app/metrics.py
+"""
+Métricas por ruta (por proceso / worker).
+
+RequestMetricsMiddleware (ASGI puro) mide cada request HTTP:
+  - latencia total (hasta el último byte del body)
+  - statements SQL y tiempo en la DB (before/after_cursor_execute de
+    cualquier Engine, sync o async, primario o réplica)
+  - tamaño de la respuesta
+
+Se agrupa por (método, template de la ruta): /products/{product_id}, no
+el path concreto, así la cantidad de series no crece con los ids. Lo que
+no matchea ninguna ruta va a "unmatched".
+
+GET /metrics expone todo en formato texto de Prometheus. Con
+SERVER_TIMING=1 cada respuesta trae además
+    Server-Timing: app;dur=12.3, db;dur=4.1;desc="7 queries"
+para que el cliente (Streamlit) lo loguee.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+# buckets (segundos / cantidad / bytes); +Inf se agrega al exportar
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+# ============================
+# Contadores de DB por request
+# ============================
+class RequestDbStats:
+    __slots__ = ("statements", "seconds", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.statements = 0
+        self.seconds = 0.0
+        self.scope = scope
+
+
+# Un objeto mutable por request: los handlers sync corren en el threadpool
+# con una copia del contexto, pero la copia apunta al mismo objeto.
+_request_db: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db", default=None)
+
+
+def current_db_stats() -> Optional[RequestDbStats]:
+    return _request_db.get()
+
+
+def current_route() -> Optional[str]:
+    """
+    "GET /products/{product_id}" de la request en curso (None fuera de una
+    request). Antes de que el router matchee, el path concreto.
+    """
+    stats = _request_db.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    return f'{stats.scope.get("method", "")} {getattr(route, "path", None) or stats.scope.get("path", "")}'
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_t0")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _request_db.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+# ============================
+# Histogramas
+# ============================
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        acc = 0
+        for upper, n in zip(self.buckets + (float("inf"),), self.counts):
+            acc += n
+            yield ("+Inf" if upper == float("inf") else _fmt(upper)), acc
+
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.status: Dict[str, int] = {}
+
+
+class RequestMetrics:
+    """Registro de métricas por (método, ruta) de este proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        db: RequestDbStats,
+        size: int,
+    ) -> None:
+        with self._lock:
+            rs = self._routes.get((method, route))
+            if rs is None:
+                rs = self._routes[(method, route)] = RouteStats()
+            rs.latency.observe(seconds)
+            rs.db_statements.observe(db.statements)
+            rs.db_seconds.observe(db.seconds)
+            rs.response_bytes.observe(size)
+            code = str(status)
+            rs.status[code] = rs.status.get(code, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def render(self) -> str:
+        """Exposición en formato texto de Prometheus (version 0.0.4)."""
+        families = (
+            ("http_request_duration_seconds", "Latencia de la request", "latency"),
+            ("http_request_db_statements", "Statements SQL por request", "db_statements"),
+            ("http_request_db_seconds", "Tiempo en la DB por request", "db_seconds"),
+            ("http_response_size_bytes", "Tamaño del body de la respuesta", "response_bytes"),
+        )
+        with self._lock:
+            items = sorted(self._routes.items())
+            lines = []
+            for name, help_text, attr in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), rs in items:
+                    h: Histogram = getattr(rs, attr)
+                    labels = f'method="{method}",route="{_escape(route)}"'
+                    for le, n in h.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {n}')
+                    lines.append(f"{name}_sum{{{labels}}} {_fmt(h.sum)}")
+                    lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+            lines.append("# HELP http_requests_total Requests por ruta y status")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route), rs in items:
+                for code, n in sorted(rs.status.items()):
+                    lines.append(
+                        f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{code}"}} {n}'
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
+
+
+# ============================
+# Middleware
+# ============================
+class RequestMetricsMiddleware:
+    def __init__(self, app, registry: RequestMetrics = request_metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        db = RequestDbStats(scope)
+        token = _request_db.set(db)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    # el handler ya terminó: las queries de la request están contadas
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(time.perf_counter() - t0, db).encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db.reset(token)
+            route = scope.get("route")
+            self.registry.observe(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - t0,
+                db,
+                size,
+            )
+
+
+def server_timing(seconds: float, db: RequestDbStats) -> str:
+    return (
+        f"app;dur={seconds * 1000:.1f}, "
+        f'db;dur={db.seconds * 1000:.1f};desc="{db.statements} queries"'
+    )
@@ -1,7 +1,7 @@
 ##backend/app/models/models.py
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, UniqueConstraint, Integer, Text, Numeric
+from sqlalchemy import String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index, Integer, Text, Numeric
 from uuid import uuid4
 from datetime import datetime
 from ..db import Base
@@ -14,7 +14,7 @@ class User(Base):
     __tablename__ = "users"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_id)
     nombre: Mapped[str] = mapped_column(String(80))
-    apellido: Mapped[str] = mapped_column(String(80))
+    apellido: Mapped[str] = mapped_column(String(80), index=True)
     tipo_doc: Mapped[str] = mapped_column(String(20))
     nro_doc: Mapped[str] = mapped_column(String(20), unique=True)
     email: Mapped[str] = mapped_column(String(120), unique=True, index=True)
@@ -39,6 +39,8 @@ class User(Base):
     # para recuperación de contraseña por código
     reset_code_hash: Mapped[str | None] = mapped_column(String(255), nullable=True)
     reset_code_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # listado admin: filtro por estado + orden por fecha de alta
+    __table_args__ = (Index("ix_users_estado_creado_en", "estado", "creado_en"),)
 
 class Address(Base):
     __tablename__ = "addresses"
@@ -110,12 +112,19 @@ class Product(Base):
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_id)
     seller_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(120), index=True)
+    # código propio del vendedor (carga masiva: upsert por (seller_id, sku))
+    sku: Mapped[str | None] = mapped_column(String(64), nullable=True)
     description: Mapped[str | None] = mapped_column(Text, default=None)
     price: Mapped[int] = mapped_column(Integer)                 # en centavos o entero ARS
     stock: Mapped[int] = mapped_column(Integer, default=0)
     condition: Mapped[str] = mapped_column(String(10), default="NUEVO")  # NUEVO/USADO
     rating: Mapped[float] = mapped_column(Numeric(3,1), default=0)       # 0..10
+    # agregado de product_comments (services/product_rating.py)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     sold_count: Mapped[int] = mapped_column(Integer, default=0)
+    # sube con cada cambio del producto (control optimista de PATCH /products/bulk)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
     image_url: Mapped[str | None] = mapped_column(String(255), default=None)
     features: Mapped[str | None] = mapped_column(Text)
 
@@ -140,6 +149,12 @@ class Product(Base):
     wallet: Mapped[str | None] = mapped_column(String(200))
 #####
 
+    # catálogo: activos ordenados por fecha de alta
+    __table_args__ = (
+        Index("ix_products_is_active_created_at", "is_active", "created_at"),
+        UniqueConstraint("seller_id", "sku", name="uq_products_seller_sku"),
+    )
+
 class ProductImage(Base):
     __tablename__ = "product_images"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_id)
@@ -175,10 +190,10 @@ class CartItem(Base):
 class Order(Base):
     __tablename__ = "orders"
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_id)
-    user_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    user_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
     user_name: Mapped[str | None] = mapped_column(String(120), nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="Entregado")  # Entregado|En camino|Pendiente
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     total_amount: Mapped[int] = mapped_column(Integer, default=0)
 
     items: Mapped[list["OrderItem"]] = relationship(
@@ -201,7 +216,7 @@ class OrderItem(Base):
     category: Mapped[str | None] = mapped_column(String(64))
     subcategory: Mapped[str | None] = mapped_column(String(64))
     seller: Mapped[str | None] = mapped_column(String(120))
-    seller_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    seller_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
 
     company: Mapped[str | None] = mapped_column(String(160))
 
@@ -231,8 +246,28 @@ class ProductComment(Base):
     rating: Mapped[int] = mapped_column(Integer)  # 1..10
     text: Mapped[str | None] = mapped_column(Text, default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # id que genera el cliente: un reenvío del mismo comentario no lo duplica
+    client_id: Mapped[str | None] = mapped_column(String(64), default=None)
 
     product = relationship("Product", back_populates="comments")
     user = relationship("User", backref="product_comments")
 
+    # listado paginado por producto, más nuevos primero
+    __table_args__ = (
+        Index("ix_product_comments_product_id_created_at", "product_id", "created_at"),
+        Index("ux_product_comments_user_id_client_id", "user_id", "client_id", unique=True),
+    )
+
 Comment = ProductComment
+
+
+class UserProductEntitlement(Base):
+    """
+    (usuario, producto) que el usuario compró y recibió.
+    Precalculada para validar comentarios con una búsqueda por PK
+    (la mantiene services/entitlements.py).
+    """
+    __tablename__ = "user_product_entitlements"
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    product_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    delivered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
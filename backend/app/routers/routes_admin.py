@@ -1,12 +1,15 @@
 # backend/app/routers/routes_admin.py
 
+import base64
 from datetime import datetime, date, time, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
 
+from ..db import explain_slow_query, pool_status, slow_queries
 from ..deps import get_db, get_current_user
 from ..models.models import User, Order, Payment
 from ..schemas.admin_schemas import AdminUserOut, AdminOrderOut
@@ -42,25 +45,94 @@ AdminDep = Depends(require_admin)
 # ==============
 #   USUARIOS
 # ==============
+def _encode_cursor(u: User) -> str:
+    raw = f"{u.creado_en.isoformat()}|{u.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        ts, uid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), uid
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _users_filters(estado: str | None, solo_nuevos: bool, dias: int, q: str | None) -> list:
+    filters = []
+    if estado:
+        filters.append(User.estado == estado)
+
+    if solo_nuevos:
+        corte = datetime.utcnow() - timedelta(days=dias)
+        filters.append(User.creado_en >= corte)
+
+    if q:
+        # búsqueda por prefijo (usa los índices de email / nro_doc / apellido)
+        prefix = q.strip()
+        filters.append(
+            or_(
+                User.email.startswith(prefix, autoescape=True),
+                User.nro_doc.startswith(prefix, autoescape=True),
+                User.apellido.startswith(prefix, autoescape=True),
+            )
+        )
+    return filters
+
+
 @router.get("/users", response_model=List[AdminUserOut])
 def list_users(
+    response: Response,
     estado: str | None = Query(None, description="ACTIVO / REVISION / BLOQUEADO"),
     solo_nuevos: bool = Query(False),
     dias: int = Query(7, ge=1, le=365),
+    q: str | None = Query(None, description="Prefijo de email, nro_doc o apellido"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description="X-Next-Cursor de la página anterior"),
     db: Session = Depends(get_db),
     admin=AdminDep,  # solo ADMIN
 ):
-    q = db.query(User)
+    """
+    Paginación keyset por (creado_en desc, id desc).
+    Si hay más resultados, el cursor siguiente viene en X-Next-Cursor.
+    """
+    query = db.query(User).filter(*_users_filters(estado, solo_nuevos, dias, q))
+
+    if cursor:
+        c_ts, c_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                User.creado_en < c_ts,
+                and_(User.creado_en == c_ts, User.id < c_id),
+            )
+        )
 
-    if estado:
-        q = q.filter(User.estado == estado)
+    rows = (
+        query.order_by(User.creado_en.desc(), User.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    return rows
 
-    if solo_nuevos:
-        corte = datetime.utcnow() - timedelta(days=dias)
-        q = q.filter(User.creado_en >= corte)
 
-    q = q.order_by(User.creado_en.desc())
-    return q.all()
+@router.get("/users/count")
+def count_users(
+    estado: str | None = Query(None, description="ACTIVO / REVISION / BLOQUEADO"),
+    solo_nuevos: bool = Query(False),
+    dias: int = Query(7, ge=1, le=365),
+    q: str | None = Query(None),
+    db: Session = Depends(get_db),
+    admin=AdminDep,
+):
+    total = (
+        db.query(func.count(User.id))
+        .filter(*_users_filters(estado, solo_nuevos, dias, q))
+        .scalar()
+    )
+    return {"total": int(total or 0)}
 
 
 class EstadoUpdate(BaseModel):
@@ -115,44 +187,105 @@ def update_user_dni_block(
 def list_orders(
     from_date: date,
     to_date: date,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     admin=AdminDep,
 ):
+    """
+    Órdenes del rango con email del usuario y último pago, en una sola query.
+    Totales del rango (sin paginar) en X-Total-Count / X-Total-Amount.
+    """
     # incluir el día "hasta" completo
     start_dt = datetime.combine(from_date, time.min)
     end_dt = datetime.combine(to_date + timedelta(days=1), time.min)
+    in_range = and_(Order.created_at >= start_dt, Order.created_at < end_dt)
+
+    # último pago por orden (solo pagos de órdenes del rango)
+    latest_payment = (
+        select(
+            Payment.order_id,
+            Payment.status,
+            Payment.tx_ref,
+            func.row_number()
+            .over(partition_by=Payment.order_id, order_by=Payment.created_at.desc())
+            .label("rn"),
+        )
+        .join(Order, Order.id == Payment.order_id)
+        .where(in_range)
+        .subquery()
+    )
 
-    orders = (
-        db.query(Order)
-        .filter(Order.created_at >= start_dt, Order.created_at < end_dt)
-        .options(joinedload(Order.payments))
+    rows = (
+        db.query(
+            Order.id,
+            Order.created_at,
+            Order.user_id,
+            User.email,
+            Order.total_amount,
+            latest_payment.c.status,
+            latest_payment.c.tx_ref,
+        )
+        .outerjoin(User, User.id == Order.user_id)
+        .outerjoin(
+            latest_payment,
+            and_(latest_payment.c.order_id == Order.id, latest_payment.c.rn == 1),
+        )
+        .filter(in_range)
+        .order_by(Order.created_at.desc(), Order.id)
+        .limit(limit)
+        .offset(offset)
         .all()
     )
 
-    results: list[AdminOrderOut] = []
-
-    for o in orders:
-        payment: Payment | None = None
-        if o.payments:
-            payment = sorted(o.payments, key=lambda p: p.created_at)[-1]
-
-        payment_status = payment.status if payment else None
-        tx_ref = payment.tx_ref if payment else None
-
-        user_email = None
-        if o.user_id:
-            user_email = db.query(User.email).filter(User.id == o.user_id).scalar()
-
-        results.append(
-            AdminOrderOut(
-                id=o.id,
-                created_at=o.created_at,
-                user_id=o.user_id,
-                user_email=user_email,
-                total_amount=o.total_amount,
-                payment_status=payment_status,
-                tx_ref=tx_ref,
-            )
+    total_count, total_amount = (
+        db.query(func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+        .filter(in_range)
+        .one()
+    )
+    response.headers["X-Total-Count"] = str(total_count)
+    response.headers["X-Total-Amount"] = str(total_amount)
+
+    return [
+        AdminOrderOut(
+            id=oid,
+            created_at=created_at,
+            user_id=user_id,
+            user_email=user_email,
+            total_amount=amount,
+            payment_status=payment_status,
+            tx_ref=tx_ref,
         )
+        for oid, created_at, user_id, user_email, amount, payment_status, tx_ref in rows
+    ]
+
 
-    return results
+# ==============
+#   INTERNO
+# ==============
+@router.get("/db/pool")
+def db_pool_metrics(admin=AdminDep):
+    """
+    Estado del pool de conexiones de este worker: conexiones en uso,
+    overflow, espera por checkout y timeouts.
+    """
+    return pool_status()
+
+
+@router.get("/db/slow-queries")
+def db_slow_queries(admin=AdminDep):
+    """
+    Últimos statements que superaron SLOW_QUERY_MS en este worker, más
+    nuevos primero: SQL, forma de los parámetros, duración y ruta.
+    """
+    return {"threshold_ms": slow_queries.threshold_ms, "items": slow_queries.entries()}
+
+
+@router.post("/db/slow-queries/{entry_id}/explain")
+def db_slow_query_explain(entry_id: int, admin=AdminDep):
+    """Corre el EXPLAIN del statement capturado (solo SELECT)."""
+    plan = explain_slow_query(entry_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="La query ya no está en el buffer")
+    return plan
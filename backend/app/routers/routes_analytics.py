@@ -1,13 +1,15 @@
 # backend/app/routers/routes_analytics.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta, date as date_type
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
-from ..deps import get_db, get_current_user
+from ..deps import get_current_user, get_read_db
 from ..models.models import Order, OrderItem, Product, User
+from ..services.sales_daily_cache import sales_daily_cache
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -83,14 +85,89 @@ def normalize_currency(val: float, currency: str):
     return val
 
 
+def items_in_range(db: Session, start_dt: datetime, end_dt: datetime, *filters):
+    """
+    Un solo scan de order_items + orders en el rango.
+    Devuelve tuplas (OrderItem, Order) que después consumen los widgets.
+    """
+    return (
+        db.query(OrderItem, Order)
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(Order.created_at >= start_dt)
+        .filter(Order.created_at <= end_dt)
+        .filter(*filters)
+        .all()
+    )
+
+
+def item_total(it: OrderItem) -> float:
+    return float((it.unit_price or 0) * (it.quantity or 0))
+
+
+def summary_payload(total_sales: float, orders_count: int, currency: str) -> Dict[str, Any]:
+    total_sales = normalize_currency(float(total_sales), currency)
+    total_margin = total_sales * 0.30  # margen simple dummy
+    ticket_avg = (total_sales / orders_count) if orders_count else 0
+    return {
+        "total_sales": total_sales,
+        "total_margin": total_margin,
+        "ticket_avg": ticket_avg,
+        "returns": 0,
+    }
+
+
+def daily_from_rows(rows) -> List[Dict[str, Any]]:
+    totals: Dict[str, float] = {}
+    for it, o in rows:
+        d = o.created_at.date().isoformat()
+        totals[d] = totals.get(d, 0.0) + item_total(it)
+    return [{"date": d, "total": t} for d, t in sorted(totals.items())]
+
+
+def category_margins_from_rows(rows) -> List[Dict[str, Any]]:
+    totals: Dict[str, float] = {}
+    for it, _ in rows:
+        cat = it.category or "Sin categoría"
+        totals[cat] = totals.get(cat, 0.0) + item_total(it)
+    return [{"category": c, "margin": t * 0.30} for c, t in totals.items()]
+
+
+def top_products_from_rows(rows, top: int) -> List[Dict[str, Any]]:
+    totals: Dict[str, float] = {}
+    for it, _ in rows:
+        name = it.product_name or "Producto"
+        totals[name] = totals.get(name, 0.0) + item_total(it)
+    out = [{"product": p, "sales": t} for p, t in totals.items()]
+    out.sort(key=lambda x: x["sales"], reverse=True)
+    return out[:top]
+
+
+def operations_from_rows(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date": o.created_at.isoformat() if o.created_at else None,
+            "order_id": it.order_id,
+            "product": it.product_name,
+            "qty": it.quantity,
+            "unit_price": it.unit_price,
+            "total": (it.quantity or 0) * (it.unit_price or 0),
+        }
+        for it, o in rows
+    ]
+
+
 # ==========================================================
 # 0) GLOBAL METRICS  (para Dashboard_Global.py)
 # ==========================================================
 @router.get("/global")
 def global_metrics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
+    return global_metrics_report(db, user)
+
+
+def global_metrics_report(db: Session, user: User):
     # Usuarios / productos
     total_users = db.query(User).count()
     total_products = db.query(Product).count()
@@ -141,9 +218,13 @@ def orders_between(
     # el front manda params "from" y "to"
     from_date: date_type = Query(..., alias="from"),
     to_date: date_type = Query(..., alias="to"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
+    return orders_between_report(db, from_date, to_date, user)
+
+
+def orders_between_report(db: Session, from_date: date_type, to_date: date_type, user: User):
     start_dt = to_dt_start(from_date)
     end_dt = to_dt_end(to_date)
 
@@ -181,8 +262,20 @@ def sales_summary(
     currency: str = "ARS",
     channels: str = "tienda",
     seller_id: Optional[str] = None,   # opcional, por si querés forzar
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
+):
+    return sales_summary_report(db, start, end, currency, channels, seller_id, user)
+
+
+def sales_summary_report(
+    db: Session,
+    start: str,
+    end: str,
+    currency: str,
+    channels: str,
+    seller_id: Optional[str],
+    user: User,
 ):
     start_d = parse_date(start)
     end_d = parse_date(end)
@@ -228,16 +321,7 @@ def sales_summary(
             total_sales = sum(o.total_amount or 0 for o in orders_buyer)
             orders_count = len(orders_buyer)
 
-    total_sales = normalize_currency(float(total_sales), currency)
-    total_margin = total_sales * 0.30  # margen simple dummy
-    ticket_avg = (total_sales / orders_count) if orders_count else 0
-
-    return {
-        "total_sales": total_sales,
-        "total_margin": total_margin,
-        "ticket_avg": ticket_avg,
-        "returns": 0,
-    }
+    return summary_payload(total_sales, orders_count, currency)
 
 
 # ==========================================================
@@ -250,8 +334,31 @@ def sales_daily(
     currency: str = "ARS",
     channels: str = "tienda",
     seller_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    incremental: bool = False,
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
+):
+    return sales_daily_report(
+        db,
+        start,
+        end,
+        currency,
+        channels,
+        seller_id,
+        incremental,
+        user,
+    )
+
+
+def sales_daily_report(
+    db: Session,
+    start: str,
+    end: str,
+    currency: str,
+    channels: str,
+    seller_id: Optional[str],
+    incremental: bool,
+    user: User,
 ):
     start_d = parse_date(start)
     end_d = parse_date(end)
@@ -260,19 +367,9 @@ def sales_daily(
 
     sf = seller_filter(db, user)
 
-    q = (
-        db.query(
-            func.date(Order.created_at).label("d"),
-            func.sum(OrderItem.unit_price * OrderItem.quantity).label("total")
-        )
-        .join(OrderItem, OrderItem.order_id == Order.id)
-        .filter(Order.created_at >= start_dt)
-        .filter(Order.created_at <= end_dt)
-    )
-
     # ✅ FIX: antes tenías "seller_id or True"
     if seller_id:
-        q = q.filter(sf)
+        scope, scope_filter = ("seller", str(user.id)), sf
     else:
         # si no pasan seller_id, elegimos por rol implícito
         # si tiene ventas como vendedor, filtra seller; si no, buyer.
@@ -286,15 +383,75 @@ def sales_daily(
             .all()
         )
         if items_seller:
-            q = q.filter(sf)
+            scope, scope_filter = ("seller", str(user.id)), sf
         else:
-            q = q.filter(buyer_filter(user))
+            scope, scope_filter = ("buyer", str(user.id)), buyer_filter(user)
+
+    if incremental:
+        return sales_daily_incremental(db, scope, scope_filter, start_d, end_d)
 
-    rows = q.group_by("d").order_by("d").all()
+    rows = daily_totals(db, start_dt, end_dt, scope_filter)
     out = [{"date": str(d), "total": float(t or 0)} for d, t in rows]
     return out
 
 
+def daily_totals(db: Session, start_dt: datetime, end_dt: datetime, *filters):
+    """Total por día (SQL group by) para el rango y filtros dados."""
+    return (
+        db.query(
+            func.date(Order.created_at).label("d"),
+            func.sum(OrderItem.unit_price * OrderItem.quantity).label("total")
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .filter(Order.created_at >= start_dt)
+        .filter(Order.created_at <= end_dt)
+        .filter(*filters)
+        .group_by("d")
+        .order_by("d")
+        .all()
+    )
+
+
+def sales_daily_incremental(db: Session, scope, scope_filter, start_d: date_type, end_d: date_type):
+    """
+    Igual que sales_daily, pero los días cerrados (antes del watermark)
+    salen del cache y solo se consultan los faltantes y los días abiertos.
+    """
+    cache = sales_daily_cache
+    watermark = cache.watermark()
+    values: Dict[date_type, Optional[float]] = {}
+
+    closed_end = min(end_d, watermark - timedelta(days=1))
+    if start_d <= closed_end:
+        closed_days = [
+            start_d + timedelta(days=i)
+            for i in range((closed_end - start_d).days + 1)
+        ]
+        generation = cache.generation
+        hits, missing = cache.get_many(scope, closed_days)
+        values.update(hits)
+        if missing:
+            fresh: Dict[date_type, Optional[float]] = dict.fromkeys(missing)
+            rows = daily_totals(db, to_dt_start(missing[0]), to_dt_end(missing[-1]), scope_filter)
+            for d, t in rows:
+                day = date_type.fromisoformat(str(d))
+                if day in fresh:
+                    fresh[day] = float(t or 0)
+            cache.put_many(scope, fresh, generation)
+            values.update(fresh)
+
+    open_start = max(start_d, watermark)
+    if open_start <= end_d:
+        for d, t in daily_totals(db, to_dt_start(open_start), to_dt_end(end_d), scope_filter):
+            values[date_type.fromisoformat(str(d))] = float(t or 0)
+
+    return [
+        {"date": d.isoformat(), "total": t}
+        for d, t in sorted(values.items())
+        if t is not None
+    ]
+
+
 # ==========================================================
 # 3) CATEGORY MARGINS (para Finanzas.py)
 # ==========================================================
@@ -305,8 +462,28 @@ def category_margins(
     currency: str = "ARS",
     channels: str = "tienda",
     seller_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
+):
+    return category_margins_report(
+        db,
+        start,
+        end,
+        currency,
+        channels,
+        seller_id,
+        user,
+    )
+
+
+def category_margins_report(
+    db: Session,
+    start: str,
+    end: str,
+    currency: str,
+    channels: str,
+    seller_id: Optional[str],
+    user: User,
 ):
     start_d = parse_date(start)
     end_d = parse_date(end)
@@ -314,23 +491,8 @@ def category_margins(
     end_dt = to_dt_end(end_d)
 
     sf = seller_filter(db, user)
-
-    items = (
-        db.query(OrderItem)
-        .join(Order, Order.id == OrderItem.order_id)
-        .filter(Order.created_at >= start_dt)
-        .filter(Order.created_at <= end_dt)
-        .filter(sf)
-        .all()
-    )
-
-    rows: Dict[str, float] = {}
-    for i in items:
-        cat = i.category or "Sin categoría"
-        rows.setdefault(cat, 0.0)
-        rows[cat] += float((i.unit_price or 0) * (i.quantity or 0))
-
-    return [{"category": c, "margin": t * 0.30} for c, t in rows.items()]
+    rows = items_in_range(db, start_dt, end_dt, sf)
+    return category_margins_from_rows(rows)
 
 
 # ==========================================================
@@ -344,8 +506,30 @@ def top_products(
     currency: str = "ARS",
     channels: str = "tienda",
     seller_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
+):
+    return top_products_report(
+        db,
+        start,
+        end,
+        top,
+        currency,
+        channels,
+        seller_id,
+        user,
+    )
+
+
+def top_products_report(
+    db: Session,
+    start: str,
+    end: str,
+    top: int,
+    currency: str,
+    channels: str,
+    seller_id: Optional[str],
+    user: User,
 ):
     start_d = parse_date(start)
     end_d = parse_date(end)
@@ -353,25 +537,8 @@ def top_products(
     end_dt = to_dt_end(end_d)
 
     sf = seller_filter(db, user)
-
-    items = (
-        db.query(OrderItem)
-        .join(Order, Order.id == OrderItem.order_id)
-        .filter(Order.created_at >= start_dt)
-        .filter(Order.created_at <= end_dt)
-        .filter(sf)
-        .all()
-    )
-
-    rows: Dict[str, float] = {}
-    for i in items:
-        name = i.product_name or "Producto"
-        rows.setdefault(name, 0.0)
-        rows[name] += float((i.unit_price or 0) * (i.quantity or 0))
-
-    out = [{"product": p, "sales": t} for p, t in rows.items()]
-    out.sort(key=lambda x: x["sales"], reverse=True)
-    return out[:top]
+    rows = items_in_range(db, start_dt, end_dt, sf)
+    return top_products_from_rows(rows, top)
 
 
 # ==========================================================
@@ -384,8 +551,20 @@ def operations(
     currency: str = "ARS",
     channels: str = "tienda",
     seller_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
+):
+    return operations_report(db, start, end, currency, channels, seller_id, user)
+
+
+def operations_report(
+    db: Session,
+    start: str,
+    end: str,
+    currency: str,
+    channels: str,
+    seller_id: Optional[str],
+    user: User,
 ):
     start_d = parse_date(start)
     end_d = parse_date(end)
@@ -393,27 +572,90 @@ def operations(
     end_dt = to_dt_end(end_d)
 
     sf = seller_filter(db, user)
+    rows = items_in_range(db, start_dt, end_dt, sf)
+    return operations_from_rows(rows)
 
-    items = (
-        db.query(OrderItem, Order)
-        .join(Order, Order.id == OrderItem.order_id)
-        .filter(Order.created_at >= start_dt)
-        .filter(Order.created_at <= end_dt)
-        .filter(sf)
-        .all()
-    )
 
-    return [
-        {
-            "date": o.created_at.isoformat() if o.created_at else None,
-            "order_id": it.order_id,
-            "product": it.product_name,
-            "qty": it.quantity,
-            "unit_price": it.unit_price,
-            "total": (it.quantity or 0) * (it.unit_price or 0),
-        }
-        for it, o in items
-    ]
+# ==========================================================
+# 6) BATCH (para Finanzas.py en un solo round trip)
+# ==========================================================
+WidgetType = Literal["summary", "daily", "category_margins", "top_products", "operations"]
+
+
+class WidgetSpec(BaseModel):
+    type: WidgetType
+    key: Optional[str] = None  # nombre en la respuesta (default: type)
+    top: int = Field(8, ge=1, le=100)
+
+
+class AnalyticsBatchIn(BaseModel):
+    start: str
+    end: str
+    currency: str = "ARS"
+    channels: str = "tienda"
+    seller_id: Optional[str] = None
+    widgets: List[WidgetSpec] = Field(..., min_length=1)
+
+
+@router.post("/batch")
+def analytics_batch(
+    payload: AnalyticsBatchIn,
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+):
+    return analytics_batch_report(db, payload, user)
+
+
+def analytics_batch_report(db: Session, payload: AnalyticsBatchIn, user: User):
+    """
+    Calcula varios widgets de Finanzas con un único scan filtrado de
+    orders/order_items. Cada widget se arma sobre las mismas filas, así
+    que el costo en DB no crece con la cantidad de widgets pedidos.
+    """
+    start_dt = to_dt_start(parse_date(payload.start))
+    end_dt = to_dt_end(parse_date(payload.end))
+
+    seller_rows = items_in_range(db, start_dt, end_dt, seller_filter(db, user))
+
+    # Igual que /sales-summary y /sales-daily: sin ventas como vendedor
+    # (y sin seller_id explícito) se muestran las compras del usuario.
+    buyer_rows = None
+    buyer_orders = None
+    needs_buyer = {"summary", "daily"} & {w.type for w in payload.widgets}
+    if needs_buyer and not seller_rows and not payload.seller_id:
+        pairs = (
+            db.query(OrderItem, Order)
+            .select_from(Order)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .filter(Order.created_at >= start_dt)
+            .filter(Order.created_at <= end_dt)
+            .filter(buyer_filter(user))
+            .all()
+        )
+        buyer_orders = list({o.id: o for _, o in pairs}.values())
+        buyer_rows = [(it, o) for it, o in pairs if it is not None]
+
+    out: Dict[str, Any] = {}
+    for w in payload.widgets:
+        key = w.key or w.type
+        if w.type == "summary":
+            if buyer_orders is not None:
+                total = sum(o.total_amount or 0 for o in buyer_orders)
+                count = len(buyer_orders)
+            else:
+                total = sum(item_total(it) for it, _ in seller_rows)
+                count = len({it.order_id for it, _ in seller_rows})
+            out[key] = summary_payload(total, count, payload.currency)
+        elif w.type == "daily":
+            out[key] = daily_from_rows(buyer_rows if buyer_rows is not None else seller_rows)
+        elif w.type == "category_margins":
+            out[key] = category_margins_from_rows(seller_rows)
+        elif w.type == "top_products":
+            out[key] = top_products_from_rows(seller_rows, w.top)
+        elif w.type == "operations":
+            out[key] = operations_from_rows(seller_rows)
+
+    return out
 
 
 # ==========================================================
@@ -421,9 +663,13 @@ def operations(
 # ==========================================================
 @router.get("/seller/dashboard")
 def seller_dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    return seller_dashboard_report(db, current_user)
+
+
+def seller_dashboard_report(db: Session, current_user: User):
     sf = seller_filter(db, current_user)
 
     # 1) KPIs
@@ -559,9 +805,13 @@ def seller_dashboard(
 # ==========================================================
 @router.get("/buyer/dashboard")
 def buyer_dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    return buyer_dashboard_report(db, current_user)
+
+
+def buyer_dashboard_report(db: Session, current_user: User):
     buyer_id = str(current_user.id)
 
     total_spent = (
@@ -1,10 +1,12 @@
 # backend/app/routers/routes_cart.py
+from typing import List, Literal, Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from sqlalchemy.orm import Session
 
 from ..deps import get_db, get_current_user
-from ..models.models import Cart, CartItem, Product, User
+from ..models.models import User
 from ..schemas.cart_schemas import CartOut, CartUpdateQty
 from ..crud import cart_crud
 
@@ -16,22 +18,32 @@ class AddItemPayload(BaseModel):
     qty: int = 1
 
 
-def _get_or_create_cart(db: Session, user_id: str) -> Cart:
-    """
-    Devuelve el carrito del usuario. Si no existe, lo crea.
-    """
-    cart = (
-        db.query(Cart)
-        .filter(Cart.user_id == user_id)
-        .order_by(Cart.created_at.desc())
-        .first()
-    )
-    if not cart:
-        cart = Cart(user_id=user_id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    return cart
+class CartOp(BaseModel):
+    op: Literal["add", "set", "remove"]
+    item_id: Optional[str] = None
+    product_id: Optional[str] = None
+    qty: Optional[int] = Field(None, ge=1)
+
+    @model_validator(mode="after")
+    def _check(self):
+        if self.op == "add" and not (self.product_id and self.qty):
+            raise ValueError("add necesita product_id y qty")
+        if self.op != "add" and not (self.item_id or self.product_id):
+            raise ValueError(f"{self.op} necesita item_id o product_id")
+        if self.op == "set" and not self.qty:
+            raise ValueError("set necesita qty")
+        return self
+
+
+class CartBatchPayload(BaseModel):
+    ops: List[CartOp] = Field(..., min_length=1, max_length=200)
+
+
+def _mutate(db: Session, user: User, ops: List[CartOp]) -> CartOut:
+    try:
+        return cart_crud.mutate_cart(db, user.id, ops)
+    except cart_crud.CartOpError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.msg)
 
 
 @router.post("/items", response_model=CartOut, status_code=status.HTTP_201_CREATED)
@@ -46,49 +58,7 @@ def add_item(
     if payload.qty <= 0:
         raise HTTPException(status_code=400, detail="Cantidad inválida")
 
-    product = (
-        db.query(Product)
-        .filter(Product.id == payload.product_id, Product.is_active == True)
-        .first()
-    )
-    if not product:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-    if product.stock < payload.qty:
-        raise HTTPException(status_code=400, detail="Stock insuficiente")
-
-    # Descontar stock
-    product.stock -= payload.qty
-
-    cart = _get_or_create_cart(db, user.id)
-
-    # Ver si ya existe item en el carrito
-    item = (
-        db.query(CartItem)
-        .filter(CartItem.cart_id == cart.id, CartItem.product_id == product.id)
-        .first()
-    )
-
-    if item:
-        item.qty += payload.qty
-    else:
-        item = CartItem(
-            cart_id=cart.id,
-            product_id=product.id,
-            name=product.name,
-            price=product.price,
-            qty=payload.qty,
-            image=product.image_url or "",
-            seller=str(product.seller_id) if product.seller_id else None,
-            stock_snapshot=product.stock,
-        )
-        db.add(item)
-
-    db.commit()
-    db.refresh(cart)
-    db.refresh(product)
-
-    return cart_crud.get_cart_for_user(db, user.id)
+    return _mutate(db, user, [CartOp(op="add", product_id=payload.product_id, qty=payload.qty)])
 
 
 @router.get("", response_model=CartOut)
@@ -102,7 +72,7 @@ def get_cart(
     return cart_crud.get_cart_for_user(db, user.id)
 
 
-@router.patch("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.patch("/items/{item_id}", response_model=CartOut)
 def update_item_qty(
     item_id: str,
     payload: CartUpdateQty,
@@ -111,14 +81,12 @@ def update_item_qty(
 ):
     """
     Actualiza la cantidad (botones + y - en el frontend).
+    Devuelve el carrito actualizado: el frontend no necesita otro GET /cart.
     """
-    ok = cart_crud.update_cart_item_qty(db, user.id, item_id, payload.qty)
-    if not ok:
-        raise HTTPException(status_code=404, detail="Ítem no encontrado")
-    return  # 204 sin body
+    return _mutate(db, user, [CartOp(op="set", item_id=item_id, qty=payload.qty)])
 
 
-@router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/items/{item_id}", response_model=CartOut)
 def remove_item(
     item_id: str,
     db: Session = Depends(get_db),
@@ -126,8 +94,22 @@ def remove_item(
 ):
     """
     Elimina un ítem del carrito (botón 🗑 Quitar).
+    Devuelve el carrito actualizado.
+    """
+    return _mutate(db, user, [CartOp(op="remove", item_id=item_id)])
+
+
+@router.post("/batch", response_model=CartOut)
+def batch_update(
+    payload: CartBatchPayload,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Varias operaciones (add / set / remove) en una sola transacción.
+    Si alguna falla no se aplica ninguna. Devuelve el carrito final.
     """
-    ok = cart_crud.remove_cart_item(db, user.id, item_id)
-    if not ok:
-        raise HTTPException(status_code=404, detail="Ítem no encontrado")
-    return  # 204 sin body
+    try:
+        return cart_crud.mutate_cart(db, user.id, payload.ops)
+    except cart_crud.CartOpError as e:
+        raise HTTPException(status_code=e.status_code, detail={"op": e.index, "msg": e.msg})
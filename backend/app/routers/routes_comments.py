@@ -1,44 +1,59 @@
 # app/routers/routes_comments.py
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 
-from ..deps import get_db, get_current_user  # <-- asegurate que exista
-from ..models.models import Comment, Product, Order, OrderItem, User  # <-- Order/OrderItem existen en tu init_db
+from ..deps import get_db, get_async_read_db, get_current_user  # <-- asegurate que exista
+from ..models.models import Comment, Product, User
 from ..schemas.comment_schemas import CommentCreate, CommentOut
+from ..services import product_rating  # noqa: F401  mantiene products.rating_sum/rating_count
+from ..services.entitlements import user_received_product
+from ..services.comment_pages import ORDER_BY, after_cursor, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 
 @router.get("", response_model=list[CommentOut])
-def list_comments(
-    db: Session = Depends(get_db),
-    product_id: Optional[str] = Query(None)
+async def list_comments(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    product_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor de la página anterior"),
 ):
-    q = db.query(Comment)
-    if product_id:
-        q = q.filter(Comment.product_id == product_id)
-    rows = q.order_by(Comment.created_at.desc()).all()
-    return rows
-
-
-def user_received_product(db: Session, user_id: str, product_id: str) -> bool:
     """
-    True si existe al menos una OrderItem del producto
-    en una Order del user con status 'Entregado'.
+    Comentarios ordenados por (producto, más nuevos primero), de a `limit`.
+    Si hay más resultados, el cursor siguiente viene en X-Next-Cursor.
     """
-    row = (
-        db.query(OrderItem.id)
-        .join(Order, Order.id == OrderItem.order_id)
-        .filter(
-            Order.user_id == user_id,
-            OrderItem.product_id == product_id,
-            # validamos status case-insensitive
-            Order.status.ilike("entregado")
-        )
-        .first()
+    stmt = select(Comment).options(selectinload(Comment.user))
+    if product_id:
+        stmt = stmt.where(Comment.product_id == product_id)
+    if cursor:
+        stmt = stmt.where(after_cursor(decode_cursor(cursor)))
+
+    rows = (await db.scalars(stmt.order_by(*ORDER_BY).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return [_comment_to_out(c, c.user) for c in rows]
+
+
+def _comment_to_out(c: Comment, user: Optional[User]) -> CommentOut:
+    # el modelo guarda user_id / text; la API expone user_name / comment
+    user_name = None
+    if user is not None:
+        user_name = f"{user.nombre} {user.apellido}".strip() or user.email
+    return CommentOut(
+        id=c.id,
+        product_id=c.product_id,
+        user_name=user_name,
+        rating=c.rating,
+        comment=c.text or "",
+        created_at=c.created_at.isoformat() if c.created_at else "",
     )
-    return row is not None
 
 
 @router.post("", response_model=CommentOut, status_code=201)
@@ -66,17 +81,36 @@ def create_comment(
             detail="Solo podés comentar productos que compraste y recibiste (estado Entregado)."
         )
 
+    # reenvío (outbox, reintento tras un timeout): devuelve el que ya está
+    existing = _by_client_id(db, current_user.id, payload.client_id)
+    if existing is not None:
+        return _comment_to_out(existing, current_user)
+
     c = Comment(
         product_id=payload.product_id,
-        user_name=f"{current_user.nombre} {current_user.apellido}".strip() or current_user.email,
+        user_id=current_user.id,
         rating=payload.rating,
-        criteria=payload.criteria or {},
-        comment=payload.comment or ""
+        text=payload.comment or "",
+        client_id=payload.client_id,
     )
     db.add(c)
-    db.commit()
+    try:
+        db.commit()  # el flush suma el rating al producto en la misma transacción
+    except IntegrityError:
+        # el mismo client_id llegó a la vez por otra request
+        db.rollback()
+        existing = _by_client_id(db, current_user.id, payload.client_id)
+        if existing is None:
+            raise
+        return _comment_to_out(existing, current_user)
     db.refresh(c)
-    return c
+    return _comment_to_out(c, current_user)
+
+
+def _by_client_id(db: Session, user_id: str, client_id: Optional[str]) -> Optional[Comment]:
+    if not client_id:
+        return None
+    return db.query(Comment).filter(Comment.user_id == user_id, Comment.client_id == client_id).first()
 
 
 @router.delete("/{comment_id}", status_code=204)
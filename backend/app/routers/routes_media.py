@@ -0,0 +1,97 @@
+# backend/app/routers/routes_media.py
+import logging
+import re
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_async_read_db, get_current_user
+from ..security import require_vendor
+from ..services import product_media as media
+
+router = APIRouter(prefix="/media", tags=["media"])
+log = logging.getLogger(__name__)
+
+_HASH_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _urls(request: Request, digest: str) -> dict:
+    return {
+        str(size): str(request.url_for("get_thumbnail", digest=digest, size=size))
+        for size in media.THUMB_SIZES
+    }
+
+
+def _check_size(size: int) -> None:
+    if size not in media.THUMB_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tamaño inválido: usar {', '.join(map(str, media.THUMB_SIZES))}",
+        )
+
+
+# ============================
+# Subida (vendedores)
+# ============================
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def upload_image(request: Request,
+                       file: UploadFile = File(...),
+                       user = Depends(get_current_user)):
+    """
+    Sube una imagen y devuelve su hash y las URLs de las miniaturas, para
+    usar como image_url / images del producto.
+    """
+    require_vendor(user)
+    data = await file.read(media.MEDIA_MAX_BYTES + 1)
+    try:
+        digest = await media.store_image(data)
+    except media.MediaError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e))
+    return {"hash": digest, "thumbnails": _urls(request, digest)}
+
+
+# ============================
+# Proxy de imágenes externas
+# ============================
+@router.get("/proxy")
+async def proxy_image(request: Request,
+                      url: str = Query(..., max_length=255),
+                      w: int = Query(480),
+                      db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Miniatura de una imagen externa de producto: la primera vez se baja y
+    se procesa; después redirige directo al archivo con hash de contenido.
+    """
+    _check_size(w)
+    digest = media.cached_hash_for(url)
+    if digest is None:
+        if not url.startswith(("http://", "https://")) or not await media.is_known_image_url(db, url):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagen desconocida")
+        try:
+            digest = await media.hash_for_url(url)
+        except media.MediaError as e:
+            # el motivo queda en el log: no se le cuenta al cliente qué respondió el origen
+            log.warning("media proxy: %s: %s", url, e)
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="No se pudo obtener la imagen")
+    target = request.url_for("get_thumbnail", digest=digest, size=w)
+    # la url externa podría cambiar de contenido: el redirect se cachea poco
+    return RedirectResponse(str(target), status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+                            headers={"Cache-Control": "public, max-age=3600"})
+
+
+# ============================
+# Archivos (inmutables)
+# ============================
+@router.get("/{digest}/{size:int}.webp", name="get_thumbnail")
+def get_thumbnail(digest: str, size: int, request: Request):
+    _check_size(size)
+    path = media.thumb_path(digest, size) if _HASH_RE.match(digest) else None
+    if path is None or not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagen no encontrada")
+
+    etag = f'"{digest}-{size}"'
+    headers = {"Cache-Control": media.IMMUTABLE_CACHE, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type="image/webp", headers=headers)
@@ -1,5 +1,5 @@
 # backend/app/routers/routes_orders.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from pydantic import BaseModel, Field
@@ -7,7 +7,8 @@ from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 
-from ..deps import get_db, get_current_user
+from ..crud import cart_crud
+from ..deps import get_db, get_current_user, mark_write
 from ..models.models import Cart, Order, OrderItem, User
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -59,6 +60,7 @@ def list_my_orders(
 # ============ POST /orders/checkout ============
 @router.post("/checkout", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
 def checkout(
+    response: Response,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -67,7 +69,8 @@ def checkout(
     Queda en pending_admin hasta verificación admin/vendedor.
     """
     try:
-        # 1) traer carrito del usuario
+        # 1) traer carrito del usuario (con CART_STORE, lo pendiente se escribe ya)
+        snapshot = cart_crud.sync_cart_to_db(db, user.id)
         cart = (
             db.query(Cart)
             .filter(Cart.user_id == user.id)
@@ -114,12 +117,16 @@ def checkout(
             db.add(oi)
 
         # 5) vaciar carrito
+        ordered = {ci.id: int(ci.qty) for ci in cart.items}
         for ci in list(cart.items):
             db.delete(ci)
 
         db.commit()
         db.refresh(order)
+        cart_crud.cart_emptied(user.id, cart.id, snapshot, ordered)
 
+        # las lecturas siguientes del comprador (historial, dashboards) van al primario
+        mark_write(response)
         return order
 
     except HTTPException:
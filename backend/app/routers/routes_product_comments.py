@@ -1,24 +1,115 @@
 # routes_product_comments.py (opcional)
 # backend/app/routers/routes_product_comments.py
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..deps import get_db
-from ..models.models import Product, ProductComment
+from ..deps import get_async_read_db
+from ..models.models import ProductComment
 from ..schemas.product_schemas import ProductCommentOut
+from ..services.comment_pages import (
+    ORDER_BY,
+    after_cursor,
+    comment_page_cache,
+    decode_cursor,
+    encode_cursor,
+    product_exists,
+)
 
 router = APIRouter(prefix="/products", tags=["product-comments"])
 
 
+def _comment_to_out(c: ProductComment) -> dict:
+    out = ProductCommentOut.model_validate(c)
+    if c.user is not None:
+        out.user_name = f"{c.user.nombre} {c.user.apellido}".strip() or c.user.email
+    return out.model_dump(mode="json")
+
+
 @router.get("/{product_id}/comments", response_model=List[ProductCommentOut])
-def list_comments(product_id: str, db: Session = Depends(get_db)):
-    rows = (
-        db.query(ProductComment)
-        .filter(ProductComment.product_id == product_id)
-        .order_by(ProductComment.created_at.desc())
-        .all()
+async def list_comments(
+    product_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor de la página anterior"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Comentarios del producto, más nuevos primero, de a `limit`.
+    Si hay más, el cursor siguiente viene en X-Next-Cursor.
+    La primera página sale del cache mientras no cambien los comentarios.
+    """
+    cache_key = ("page", limit)
+    if not cursor:
+        cached = comment_page_cache.get(product_id, cache_key)
+        if cached is not None:
+            items, next_cursor = cached
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return items
+
+    generation = comment_page_cache.generation
+    stmt = (
+        select(ProductComment)
+        .where(ProductComment.product_id == product_id)
+        .options(selectinload(ProductComment.user))
     )
-    return rows
+    if cursor:
+        stmt = stmt.where(after_cursor(decode_cursor(cursor)))
+
+    rows = (await db.scalars(stmt.order_by(*ORDER_BY).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [_comment_to_out(c) for c in rows]
+    next_cursor = encode_cursor(rows[-1]) if has_more else None
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    # sin comentarios puede ser un id inventado: eso no se cachea
+    if not cursor and (rows or await product_exists(db, product_id)):
+        comment_page_cache.put(product_id, cache_key, (items, next_cursor), generation)
+    return items
+
+
+@router.get("/{product_id}/comments/summary")
+async def comments_summary(product_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Cantidad, promedio e histograma (1..10) de los ratings del producto.
+    Una sola query agrupada por rating sobre el índice por producto.
+    """
+    cached = comment_page_cache.get(product_id, "summary")
+    if cached is not None:
+        return cached
+
+    generation = comment_page_cache.generation
+    rows = (
+        await db.execute(
+            select(ProductComment.rating, func.count())
+            .where(ProductComment.product_id == product_id)
+            .group_by(ProductComment.rating)
+        )
+    ).all()
+
+    histogram = {str(r): 0 for r in range(1, 11)}
+    total = 0
+    rating_sum = 0
+    for rating, n in rows:
+        if rating is None:
+            continue
+        histogram[str(rating)] = histogram.get(str(rating), 0) + n
+        total += n
+        rating_sum += rating * n
 
+    summary = {
+        "product_id": product_id,
+        "count": total,
+        "avg": round(rating_sum / total, 1) if total else 0.0,
+        "histogram": histogram,
+    }
+    if total or await product_exists(db, product_id):
+        comment_page_cache.put(product_id, "summary", summary, generation)
+    return summary
@@ -1,18 +1,33 @@
 # routes_products.py
 # backend/app/routers/routes_products.py
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
-from ..deps import get_db, get_current_user
+from ..crud.product_crud import sync_product_images
+from ..deps import get_db, get_async_read_db, get_current_user, mark_write
 from ..models.models import Product, ProductImage
-from ..schemas.product_schemas import ProductCreate, ProductUpdate, ProductOut
+from ..schemas.product_schemas import (
+    ProductBulkPatch,
+    ProductBulkPatchOut,
+    ProductCreate,
+    ProductOut,
+    ProductUpdate,
+)
 from ..security import require_vendor
+from ..services.product_import import import_products as run_import
+from ..services.product_rating import average_rating
+from ..services.product_versions import apply_bulk_patch
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 def _product_to_out(p: Product) -> ProductOut:
     out = ProductOut.model_validate(p)
+    # promedio desde las columnas agregadas: sin query extra
+    out.rating = average_rating(p)
     # seller_name (si tenés nombre/apellido en User)
     try:
         out.seller_name = f"{p.seller.nombre} {p.seller.apellido}".strip() if p.seller else None
@@ -25,12 +40,14 @@ def _product_to_out(p: Product) -> ProductOut:
 
 @router.post("", response_model=ProductOut, status_code=201)
 def create_product(payload: ProductCreate,
+                   response: Response,
                    db: Session = Depends(get_db),
                    user = Depends(get_current_user)):
     require_vendor(user)
     p = Product(
         seller_id=user.id,
         name=payload.name,
+        sku=payload.sku,
         description=payload.description,
         price=payload.price,
         stock=payload.stock,
@@ -41,36 +58,95 @@ def create_product(payload: ProductCreate,
         is_active=payload.is_active
     )
     db.add(p)
-    db.flush()  # para obtener p.id
+    try:
+        db.flush()  # para obtener p.id
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya tenés un producto con ese SKU")
     if payload.images:
         for i, url in enumerate(payload.images):
             db.add(ProductImage(product_id=p.id, url=url, sort_order=i))
     db.commit()
     db.refresh(p)
+    mark_write(response)
     return _product_to_out(p)
 
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.post("/import")
+async def import_products(request: Request,
+                          response: Response,
+                          format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+                          db: Session = Depends(get_db),
+                          user = Depends(get_current_user)):
+    """
+    Alta / actualización masiva por SKU. Body: CSV con encabezado
+    (Content-Type text/csv) o NDJSON (application/x-ndjson), o ?format=.
+    Se procesa a medida que llega; devuelve cuántos se crearon y
+    actualizaron y los errores por fila.
+    """
+    require_vendor(user)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Mandá text/csv o application/x-ndjson (o ?format=csv|ndjson)",
+        )
+    report = await run_import(request.stream(), fmt, db, user.id)
+    if report["created"] or report["updated"]:
+        mark_write(response)
+    return report
+
+@router.patch("/bulk", response_model=List[ProductBulkPatchOut])
+def bulk_patch_products(payload: ProductBulkPatch,
+                        response: Response,
+                        db: Session = Depends(get_db),
+                        user = Depends(get_current_user)):
+    """
+    Stock / precio / activo de muchos productos propios en una transacción.
+    Con `version` en cada item, 409 si alguno cambió desde que se leyó
+    (y no se aplica ninguno). Devuelve las versiones nuevas.
+    """
+    require_vendor(user)
+    rows = apply_bulk_patch(db, user.id, payload.items)
+    db.commit()
+    mark_write(response)
+    return rows
+
+def _with_relations(stmt):
+    # _product_to_out lee seller e images: se traen en bloque (sin lazy load)
+    return stmt.options(selectinload(Product.images), selectinload(Product.seller))
+
 @router.get("", response_model=List[ProductOut])
-def list_products(db: Session = Depends(get_db),
-                  q: Optional[str] = Query(None),
-                  category_id: Optional[str] = None,
-                  seller_id: Optional[str] = None,
-                  limit: int = 20,
-                  offset: int = 0):
-    query = db.query(Product).filter(Product.is_active == True)
+async def list_products(db: AsyncSession = Depends(get_async_read_db),
+                        q: Optional[str] = Query(None),
+                        category_id: Optional[str] = None,
+                        seller_id: Optional[str] = None,
+                        limit: int = 20,
+                        offset: int = 0):
+    stmt = select(Product).where(Product.is_active == True)
     if q:
         like = f"%{q}%"
-        query = query.filter(Product.name.ilike(like))
+        stmt = stmt.where(Product.name.ilike(like))
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        stmt = stmt.where(Product.category_id == category_id)
     if seller_id:
-        query = query.filter(Product.seller_id == seller_id)
+        stmt = stmt.where(Product.seller_id == seller_id)
 
-    rows = query.order_by(Product.created_at.desc()).limit(limit).offset(offset).all()
+    stmt = stmt.order_by(Product.created_at.desc()).limit(limit).offset(offset)
+    rows = (await db.scalars(_with_relations(stmt))).all()
     return [_product_to_out(p) for p in rows]
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: str, db: Session = Depends(get_db)):
-    p = db.query(Product).filter(Product.id == product_id, Product.is_active == True).first()
+async def get_product(product_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    stmt = select(Product).where(Product.id == product_id, Product.is_active == True)
+    p = (await db.scalars(_with_relations(stmt))).first()
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
     return _product_to_out(p)
@@ -78,6 +154,7 @@ def get_product(product_id: str, db: Session = Depends(get_db)):
 @router.put("/{product_id}", response_model=ProductOut)
 def update_product(product_id: str,
                    payload: ProductUpdate,
+                   response: Response,
                    db: Session = Depends(get_db),
                    user = Depends(get_current_user)):
     p = db.query(Product).filter(Product.id == product_id).first()
@@ -92,17 +169,18 @@ def update_product(product_id: str,
             setattr(p, field, value)
 
     if payload.images is not None:
-        for im in list(p.images or []):
-            db.delete(im)
-        for i, url in enumerate(payload.images):
-            db.add(ProductImage(product_id=p.id, url=url, sort_order=i))
+        # si cambió algún campo, el UPDATE del ORM (before_update) ya sube la versión
+        sync_product_images(db, {p.id: payload.images}, bump_version=p not in db.dirty)
+        db.expire(p, ["images"])
 
     db.commit()
     db.refresh(p)
+    mark_write(response)
     return _product_to_out(p)
 
 @router.delete("/{product_id}", status_code=204)
 def delete_product(product_id: str,
+                   response: Response,
                    db: Session = Depends(get_db),
                    user = Depends(get_current_user)):
     p = db.query(Product).filter(Product.id == product_id).first()
@@ -114,3 +192,4 @@ def delete_product(product_id: str,
 
     p.is_active = False
     db.commit()
+    mark_write(response)
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional, List
 
-from ..deps import get_db, get_current_user
+from ..deps import get_read_db, get_current_user
 from ..models.models import Order, OrderItem
 
 router = APIRouter(prefix="/sales", tags=["sales"])
@@ -15,7 +15,7 @@ def sales_history(
     start: Optional[str] = None,
     end: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Devuelve ventas reales del vendedor usando Order + OrderItem y filtrando por seller_id REAL (UUID).
@@ -8,6 +8,7 @@ class CommentCreate(BaseModel):
     criteria: Optional[Dict[str, int]] = None
     comment: Optional[str] = None
     user_name: Optional[str] = None  # opcional si no hay auth
+    client_id: Optional[str] = Field(None, max_length=64, description="Id del cliente para no duplicar reenvíos")
 
 class CommentOut(BaseModel):
     id: str
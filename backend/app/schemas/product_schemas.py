@@ -1,6 +1,7 @@
 # backend/app/schemas/product_schemas.py
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List
+from datetime import datetime
 
 
 class ProductImageOut(BaseModel):
@@ -13,14 +14,16 @@ class ProductImageOut(BaseModel):
 class ProductCommentOut(BaseModel):
     id: str
     user_id: str
+    user_name: Optional[str] = None
     rating: int
     text: Optional[str] = None
-    created_at: str
+    created_at: datetime
     class Config:
         from_attributes = True
 
 class ProductBase(BaseModel):
     name: str = Field(..., max_length=120)
+    sku: Optional[str] = Field(None, max_length=64)
     description: Optional[str] = None
     price: int = Field(..., ge=0)
     stock: int = Field(..., ge=0)
@@ -55,8 +58,28 @@ class ProductOut(ProductBase):
     id: str
     seller_id: str
     rating: float = 0.0
+    rating_count: int = 0
     sold_count: int = 0
+    version: int = 1
     images: List[ProductImageOut] = []
     seller_name: Optional[str] = None
     class Config:
         from_attributes = True
+
+
+class ProductBulkPatchItem(BaseModel):
+    id: str
+    version: Optional[int] = None  # si viene, tiene que coincidir con la actual
+    price: Optional[int] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+    is_active: Optional[bool] = None
+
+class ProductBulkPatch(BaseModel):
+    items: List[ProductBulkPatchItem] = Field(..., min_length=1, max_length=1000)
+
+class ProductBulkPatchOut(BaseModel):
+    id: str
+    version: int
+    price: int
+    stock: int
+    is_active: bool
@@ -1,29 +1,34 @@
 # backend/app/security/__init__.py
-import os
-from dotenv import load_dotenv
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
 
 from ..models.models import User
 from .tokens import create_access_token, SECRET_KEY, ALGORITHM
 
-# ============================
-# Cargar variables del .env
-# ============================
-load_dotenv()
+# (las variables del .env ya las carga db.py, que se importa antes vía models)
 
 # ============================
 # Hasheo de contraseñas (UN SOLO SISTEMA)
 # ============================
-pwd_ctx = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# El CryptContext se arma en el primer hash/verify: passlib no se importa
+# al levantar el worker.
+_pwd_ctx = None
+
+
+def get_pwd_ctx():
+    global _pwd_ctx
+    if _pwd_ctx is None:
+        from passlib.context import CryptContext
+
+        _pwd_ctx = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+    return _pwd_ctx
 
 
 def hash_password(p: str) -> str:
-    return pwd_ctx.hash(p)
+    return get_pwd_ctx().hash(p)
 
 
 def verify_password(p: str, h: str) -> bool:
-    return pwd_ctx.verify(p, h)
+    return get_pwd_ctx().verify(p, h)
 
 
 # ============================
@@ -1,6 +1,5 @@
 # backend/app/security/tokens.py
 from datetime import datetime, timedelta
-from jose import jwt
 import os
 
 # Usamos SIEMPRE la misma clave y algoritmo en todo el sistema
@@ -13,6 +12,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     Genera un JWT con los datos de `data` y expiración.
     En `sub` guardamos el user.id.
     """
+    from jose import jwt  # lazy: arrastra cryptography, no hace falta para arrancar
+
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
@@ -12,6 +12,7 @@ from .models.models import (
     Product, Order, OrderItem, Payment
 )
 from .security import hash_password
+from .services import entitlements  # noqa: F401  órdenes Entregadas -> user_product_entitlements
 
 
 
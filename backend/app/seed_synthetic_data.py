@@ -0,0 +1,402 @@
+# backend/app/seed_synthetic_data.py
+"""
+Datos sintéticos en volumen (para benchmarks / pruebas de carga).
+
+A diferencia de seed_demo_data (un puñado de filas vía ORM), acá todo se
+carga con insert() de Core en executemany por tandas, con sesgo realista:
+  - pocos productos se llevan la mayoría de las ventas (Zipf)
+  - pocos vendedores concentran la mayoría del catálogo
+  - pocos compradores hacen la mayoría de las órdenes
+  - más órdenes recientes que viejas (último año)
+
+Los hooks de Session (rating agregado, entitlements) no corren con Core:
+los valores derivados se calculan acá mismo (rating_sum/rating_count,
+sold_count, user_product_entitlements, total_amount de cada orden).
+
+Uso (base vacía y migrada):
+    python -m backend.app.seed_synthetic_data --order-items 100000
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from .models.models import (
+    Cart, CartItem, Order, OrderItem, Payment, Product, ProductComment,
+    Role, User, UserProductEntitlement, UserRole,
+)
+from .security import hash_password
+
+PASSWORD = "Synth123!"
+CHUNK = 5000
+
+CATEGORIES = {
+    "Electrónica": ["Celulares", "Notebooks", "Audio", "Accesorios"],
+    "Hogar": ["Cocina", "Muebles", "Deco"],
+    "Moda": ["Remeras", "Zapatillas", "Camperas"],
+    "Deportes": ["Fitness", "Ciclismo", "Outdoor"],
+    "Libros": ["Novela", "Técnicos", "Infantiles"],
+}
+
+# Entregado domina: es lo que ven los dashboards y habilita comentarios
+STATUSES = ("Entregado", "En camino", "Pendiente", "pending_admin")
+STATUS_WEIGHTS = (70, 15, 10, 5)
+
+RATING_WEIGHTS = (1, 1, 1, 2, 3, 5, 8, 12, 14, 10)  # 1..10, sesgado a notas altas
+
+
+def scale_for(order_items: int) -> Dict[str, int]:
+    """Cantidades por defecto derivadas del volumen de order_items."""
+    return {
+        "order_items": order_items,
+        "buyers": max(10, order_items // 40),
+        "sellers": max(3, order_items // 1000),
+        "products": max(20, order_items // 20),
+        "carts": max(5, order_items // 200),
+        "comments": max(10, order_items // 10),
+    }
+
+
+def _zipf_cum_weights(n: int, s: float = 1.1) -> List[float]:
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _insert_chunks(conn: Connection, table, rows: List[dict]) -> None:
+    for i in range(0, len(rows), CHUNK):
+        conn.execute(insert(table), rows[i:i + CHUNK])
+
+
+def _role_ids(conn: Connection) -> Dict[str, int]:
+    wanted = {"ADMIN": "Administrador", "VENDEDOR": "Vendedor", "COMPRADOR": "Comprador"}
+    table = Role.__table__
+    existing = dict(conn.execute(select(table.c.code, table.c.id)).all())
+    missing = [{"code": c, "nombre": n} for c, n in wanted.items() if c not in existing]
+    if missing:
+        conn.execute(insert(table), missing)
+        existing = dict(conn.execute(select(table.c.code, table.c.id)).all())
+    return existing
+
+
+def generate(
+    engine: Engine,
+    order_items: int = 10_000,
+    *,
+    buyers: Optional[int] = None,
+    sellers: Optional[int] = None,
+    products: Optional[int] = None,
+    carts: Optional[int] = None,
+    comments: Optional[int] = None,
+    seed: int = 1234,
+    tag: str = "synth",
+) -> dict:
+    """
+    Carga el volumen pedido en una sola transacción y devuelve un resumen
+    con las cantidades y los emails para loguearse (password: PASSWORD).
+    Los vendedores/compradores vienen ordenados del más pesado al más liviano.
+    `tag` distingue emails y documentos si se carga más de una vez.
+    """
+    counts = scale_for(order_items)
+    for key, val in (("buyers", buyers), ("sellers", sellers), ("products", products),
+                     ("carts", carts), ("comments", comments)):
+        if val is not None:
+            counts[key] = val
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    pwd_hash = hash_password(PASSWORD)  # una vez: el hash es caro a propósito
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+    def past(max_days: int = 365) -> datetime:
+        # random()**2: más densidad cerca de hoy
+        return now - timedelta(days=int(max_days * rnd.random() ** 2), seconds=rnd.randrange(86400))
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        roles = _role_ids(conn)
+
+        # ---------- usuarios ----------
+        def user_row(i: int, kind: str, nombre: str) -> dict:
+            created = past()
+            return {
+                "id": new_id(),
+                "nombre": nombre,
+                "apellido": f"{kind.capitalize()}{i}",
+                "tipo_doc": "DNI",
+                "nro_doc": f"{tag}-{kind[0]}{i}"[:20],
+                "email": f"{tag}.{kind}{i}@mktlab.com",
+                "tel": None,
+                "palabra_seg": None,
+                "password_hash": pwd_hash,
+                "acepta_terminos": True,
+                "creado_en": created,
+                "actualizado_en": created,
+                "estado": "ACTIVO",
+                "dni_bloqueado": False,
+                "premium": 1 if rnd.random() < 0.1 else 0,
+            }
+
+        seller_rows = [user_row(i, "seller", f"Vendedor {tag} {i}") for i in range(counts["sellers"])]
+        buyer_rows = [user_row(i, "buyer", f"Comprador {tag} {i}") for i in range(counts["buyers"])]
+        admin_row = user_row(0, "admin", f"Admin {tag}")
+        _insert_chunks(conn, User.__table__, seller_rows + buyer_rows + [admin_row])
+        _insert_chunks(
+            conn,
+            UserRole.__table__,
+            [{"user_id": u["id"], "role_id": roles["VENDEDOR"], "asignado_en": now} for u in seller_rows]
+            + [{"user_id": u["id"], "role_id": roles["COMPRADOR"], "asignado_en": now} for u in buyer_rows]
+            + [{"user_id": admin_row["id"], "role_id": roles["ADMIN"], "asignado_en": now}],
+        )
+
+        # ---------- catálogo (se inserta al final, con los agregados) ----------
+        seller_cw = _zipf_cum_weights(len(seller_rows))
+        cats = list(CATEGORIES.items())
+        catalog = []
+        for i in range(counts["products"]):
+            seller = rnd.choices(seller_rows, cum_weights=seller_cw)[0]
+            cat, subs = rnd.choice(cats)
+            created = past()
+            catalog.append({
+                "id": new_id(),
+                "seller_id": seller["id"],
+                "name": f"{rnd.choice(subs)} {tag} {i}",
+                "description": None,
+                "price": int(rnd.lognormvariate(9.5, 1.0)) + 100,
+                "stock": rnd.randrange(0, 500),
+                "condition": "NUEVO" if rnd.random() < 0.85 else "USADO",
+                "rating": 0,
+                "rating_sum": 0,
+                "rating_count": 0,
+                "sold_count": 0,
+                "image_url": None,
+                "features": None,
+                "category_id": None,
+                "subcategory": rnd.choice(subs),
+                "is_active": rnd.random() < 0.95,
+                "created_at": created,
+                "updated_at": created,
+                "_category": cat,
+                "_seller_name": seller["nombre"],
+            })
+        product_cw = _zipf_cum_weights(len(catalog))
+        buyer_cw = _zipf_cum_weights(len(buyer_rows))
+
+        # ---------- órdenes / items / pagos, por tandas ----------
+        n_orders = 0
+        n_items = 0
+        delivered_pairs = set()  # (buyer idx, product idx)
+        orders_buf, items_buf, payments_buf = [], [], []
+
+        def flush_orders():
+            _insert_chunks(conn, Order.__table__, orders_buf)
+            _insert_chunks(conn, OrderItem.__table__, items_buf)
+            _insert_chunks(conn, Payment.__table__, payments_buf)
+            orders_buf.clear()
+            items_buf.clear()
+            payments_buf.clear()
+
+        while n_items < order_items:
+            b_idx = rnd.choices(range(len(buyer_rows)), cum_weights=buyer_cw)[0]
+            buyer = buyer_rows[b_idx]
+            status = rnd.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+            created = past()
+            order_id = new_id()
+            k = min(order_items - n_items, 1 + min(5, int(rnd.expovariate(0.6))))
+
+            total = 0
+            for p_idx in rnd.choices(range(len(catalog)), cum_weights=product_cw, k=k):
+                p = catalog[p_idx]
+                qty = 1 if rnd.random() < 0.8 else rnd.randint(2, 4)
+                total += qty * p["price"]
+                p["sold_count"] += qty
+                items_buf.append({
+                    "id": new_id(),
+                    "order_id": order_id,
+                    "product_id": p["id"],
+                    "product_name": p["name"],
+                    "category": p["_category"],
+                    "subcategory": p["subcategory"],
+                    "seller": p["_seller_name"],
+                    "seller_id": p["seller_id"],
+                    "company": None,
+                    "quantity": qty,
+                    "unit_price": p["price"],
+                })
+                if status == "Entregado":
+                    delivered_pairs.add((b_idx, p_idx))
+
+            orders_buf.append({
+                "id": order_id,
+                "user_id": buyer["id"],
+                "user_name": f"{buyer['nombre']} {buyer['apellido']}",
+                "status": status,
+                "created_at": created,
+                "total_amount": total,
+            })
+            if rnd.random() < 0.9:
+                payments_buf.append({
+                    "id": new_id(),
+                    "order_id": order_id,
+                    "provider": rnd.choice(("MP", "TARJETA", "TRANSFER", "CRYPTO")),
+                    "status": "APROBADO" if status == "Entregado" else "PENDIENTE",
+                    "amount": total,
+                    "created_at": created,
+                    "tx_ref": None,
+                })
+            n_orders += 1
+            n_items += k
+            if len(items_buf) >= CHUNK:
+                flush_orders()
+        flush_orders()
+
+        # ---------- comentarios (solo de quien recibió el producto) ----------
+        pairs = sorted(delivered_pairs)
+        comment_rows = []
+        for b_idx, p_idx in rnd.sample(pairs, min(counts["comments"], len(pairs))):
+            rating = rnd.choices(range(1, 11), weights=RATING_WEIGHTS)[0]
+            p = catalog[p_idx]
+            p["rating_sum"] += rating
+            p["rating_count"] += 1
+            comment_rows.append({
+                "id": new_id(),
+                "product_id": p["id"],
+                "user_id": buyer_rows[b_idx]["id"],
+                "rating": rating,
+                "text": rnd.choice(("Excelente", "Muy bueno", "Cumple", "Llegó tarde", "No lo recomiendo")),
+                "created_at": past(),
+            })
+
+        for p in catalog:
+            if p["rating_count"]:
+                p["rating"] = round(p["rating_sum"] / p["rating_count"], 1)
+        _insert_chunks(
+            conn,
+            Product.__table__,
+            [{k: v for k, v in p.items() if not k.startswith("_")} for p in catalog],
+        )
+        _insert_chunks(conn, ProductComment.__table__, comment_rows)
+        _insert_chunks(
+            conn,
+            UserProductEntitlement.__table__,
+            [
+                {"user_id": buyer_rows[b]["id"], "product_id": catalog[p]["id"], "delivered_at": now}
+                for b, p in pairs
+            ],
+        )
+
+        # ---------- carritos abiertos ----------
+        cart_rows, cart_item_rows = [], []
+        for b_idx in rnd.sample(range(len(buyer_rows)), min(counts["carts"], len(buyer_rows))):
+            cart_id = new_id()
+            cart_rows.append({"id": cart_id, "user_id": buyer_rows[b_idx]["id"], "created_at": past(30)})
+            for p_idx in set(rnd.choices(range(len(catalog)), cum_weights=product_cw, k=rnd.randint(1, 3))):
+                p = catalog[p_idx]
+                cart_item_rows.append({
+                    "id": new_id(),
+                    "cart_id": cart_id,
+                    "product_id": p["id"],
+                    "name": p["name"],
+                    "price": p["price"],
+                    "qty": 1,
+                    "image": "",
+                    "seller": p["seller_id"],
+                    "stock_snapshot": p["stock"],
+                })
+        _insert_chunks(conn, Cart.__table__, cart_rows)
+        _insert_chunks(conn, CartItem.__table__, cart_item_rows)
+
+    # lo cargado por Core no pasó por los hooks de invalidación
+    from .services.comment_pages import comment_page_cache
+    from .services.sales_daily_cache import sales_daily_cache
+
+    comment_page_cache.clear()
+    sales_daily_cache.clear()
+
+    return {
+        "counts": {
+            "sellers": len(seller_rows),
+            "buyers": len(buyer_rows),
+            "products": len(catalog),
+            "orders": n_orders,
+            "order_items": n_items,
+            "comments": len(comment_rows),
+            "entitlements": len(pairs),
+            "carts": len(cart_rows),
+        },
+        "seconds": round(time.perf_counter() - t0, 2),
+        "password": PASSWORD,
+        "admin_email": admin_row["email"],
+        # los pesos Zipf van por índice: el 0 es el más pesado
+        "seller_emails": [u["email"] for u in seller_rows],
+        "buyer_emails": [u["email"] for u in buyer_rows],
+        "product_ids": [p["id"] for p in catalog if p["is_active"]],
+    }
+
+
+def prepare_database(engine: Engine, order_items: int, summary_path: Path, **kwargs) -> dict:
+    """
+    Migra (alembic upgrade head) y carga una base sintética para benchmarks,
+    una sola vez: si summary_path ya existe, se reutiliza lo cargado.
+    """
+    summary_path = Path(summary_path)
+    if summary_path.exists():
+        return json.loads(summary_path.read_text())
+
+    from alembic import command
+    from alembic.config import Config
+
+    root = Path(__file__).resolve().parents[2]
+    cfg = Config(str(root / "alembic.ini"))
+    cfg.set_main_option("script_location", str(root / "backend" / "migrations"))
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, "head")
+
+    summary = generate(engine, order_items, **kwargs)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(summary))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga datos sintéticos en DATABASE_URL")
+    parser.add_argument("--order-items", type=int, default=10_000)
+    parser.add_argument("--buyers", type=int)
+    parser.add_argument("--sellers", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--carts", type=int)
+    parser.add_argument("--comments", type=int)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--tag", default="synth")
+    args = parser.parse_args()
+
+    from .db import engine
+
+    summary = generate(
+        engine,
+        args.order_items,
+        buyers=args.buyers,
+        sellers=args.sellers,
+        products=args.products,
+        carts=args.carts,
+        comments=args.comments,
+        seed=args.seed,
+        tag=args.tag,
+    )
+    print(f"✅ Datos sintéticos cargados en {summary['seconds']}s: {summary['counts']}")
+    print(f"  Admin: {summary['admin_email']} / {summary['password']}")
+    print(f"  Vendedor más pesado: {summary['seller_emails'][0]}")
+    print(f"  Comprador más pesado: {summary['buyer_emails'][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+# backend/app/services/cart_store.py
+"""
+Store de carritos con write-behind (opcional, CART_STORE).
+
+Con el store activo, el carrito de cada usuario (su CartOut, en JSON) vive
+en un key-value: GET /cart no toca la base y las mutaciones solo escriben
+ahí y marcan el carrito como sucio. Un hilo junta los sucios cada
+CART_FLUSH_SECONDS y los persiste en carts/cart_items en una transacción
+(crud.cart_crud.persist_carts); si una tanda falla se reintenta carrito
+por carrito y el que no se puede escribir se loguea y se saltea.
+El stock de los productos no pasa por acá.
+
+Backends (CART_STORE):
+  - vacío (default): sin store, todo va directo a la base
+  - "memory":        dict del proceso. Solo con un worker.
+  - "sqlite:///ruta": archivo SQLite en WAL, compartido por los workers de
+                     un mismo host; hace de Redis local (get/set/del y un
+                     set de claves sucias).
+Otro backend (Redis de verdad) solo tiene que implementar CartBackend.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import List, Optional
+
+from ..schemas.cart_schemas import CartOut
+
+log = logging.getLogger(__name__)
+
+CART_FLUSH_SECONDS = float(os.getenv("CART_FLUSH_SECONDS", "1"))
+CART_STORE_MAX = int(os.getenv("CART_STORE_MAX", "50000"))
+
+
+# ============================
+# Backends
+# ============================
+class CartBackend:
+    """Key-value mínimo, al estilo Redis (GET / SET / DEL + un set de sucios)."""
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, dirty: bool) -> None:
+        """dirty=False: el valor es igual a la base, deja de estar sucio."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: Optional[str],
+                        dirty: bool = True) -> bool:
+        """
+        Escribe `value` (None = borrar) solo si el valor actual es
+        `expected` (None = que no exista). Como WATCH/MULTI. La marca de
+        sucio queda como en set (borrar la saca).
+        """
+        raise NotImplementedError
+
+    def pop_dirty(self, limit: int) -> List[str]:
+        """Saca (atómicamente) hasta `limit` claves sucias."""
+        raise NotImplementedError
+
+    def mark_dirty(self, keys: List[str]) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CartBackend):
+    """
+    En el proceso. Con más de CART_STORE_MAX carritos descarta los limpios
+    menos usados (se vuelven a leer de la base).
+    """
+
+    def __init__(self, max_items: int = CART_STORE_MAX):
+        self._lock = threading.RLock()  # compare_and_set llama a set / delete
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._dirty: "OrderedDict[str, None]" = OrderedDict()
+        self.max_items = max_items
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, dirty):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if dirty:
+                self._dirty[key] = None
+            else:
+                self._dirty.pop(key, None)
+            excess = len(self._data) - self.max_items
+            if excess > 0:
+                oldest = islice(self._data, excess + len(self._dirty))
+                for old in [k for k in oldest if k not in self._dirty][:excess]:
+                    del self._data[old]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._dirty.pop(key, None)
+
+    def compare_and_set(self, key, expected, value, dirty=True):
+        with self._lock:
+            if self._data.get(key) != expected:
+                return False
+            if value is None:
+                self.delete(key)
+            else:
+                self.set(key, value, dirty)
+            return True
+
+    def pop_dirty(self, limit):
+        with self._lock:
+            keys = list(self._dirty)[:limit]
+            for k in keys:
+                del self._dirty[k]
+            return keys
+
+    def mark_dirty(self, keys):
+        with self._lock:
+            for k in keys:
+                self._dirty[k] = None
+
+
+class SqliteBackend(CartBackend):
+    """Archivo SQLite en WAL: compartido entre procesos del mismo host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS carts (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS dirty (key TEXT PRIMARY KEY)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, key: str, value: Optional[str], dirty: bool) -> None:
+        if value is None:
+            conn.execute("DELETE FROM carts WHERE key = ?", (key,))
+            conn.execute("DELETE FROM dirty WHERE key = ?", (key,))
+            return
+        conn.execute("INSERT OR REPLACE INTO carts (key, value) VALUES (?, ?)", (key, value))
+        if dirty:
+            conn.execute("INSERT OR IGNORE INTO dirty (key) VALUES (?)", (key,))
+        else:
+            conn.execute("DELETE FROM dirty WHERE key = ?", (key,))
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value FROM carts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, dirty):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write(conn, key, value, dirty)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write(conn, key, None, dirty=False)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def compare_and_set(self, key, expected, value, dirty=True):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM carts WHERE key = ?", (key,)).fetchone()
+            if (row[0] if row else None) != expected:
+                conn.execute("ROLLBACK")
+                return False
+            self._write(conn, key, value, dirty)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def pop_dirty(self, limit):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            keys = [r[0] for r in conn.execute("SELECT key FROM dirty LIMIT ?", (limit,))]
+            conn.executemany("DELETE FROM dirty WHERE key = ?", [(k,) for k in keys])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return keys
+
+    def mark_dirty(self, keys):
+        self._conn().executemany("INSERT OR IGNORE INTO dirty (key) VALUES (?)", [(k,) for k in keys])
+
+
+# ============================
+# Store
+# ============================
+class CartStore:
+    FLUSH_BATCH = 500
+
+    def __init__(self, backend: CartBackend, flush_seconds: float = CART_FLUSH_SECONDS):
+        self.backend = backend
+        self.flush_seconds = flush_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, user_id: str) -> Optional[CartOut]:
+        raw = self.backend.get(user_id)
+        return CartOut.model_validate_json(raw) if raw is not None else None
+
+    def put(self, user_id: str, cart: CartOut, dirty: bool = True) -> None:
+        self.backend.set(user_id, cart.model_dump_json(), dirty)
+
+    def get_raw(self, user_id: str) -> Optional[str]:
+        return self.backend.get(user_id)
+
+    def compare_and_set(self, user_id: str, expected: Optional[str], value: Optional[str],
+                        dirty: bool = True) -> bool:
+        return self.backend.compare_and_set(user_id, expected, value, dirty)
+
+    def delete(self, user_id: str) -> None:
+        self.backend.delete(user_id)
+
+    def flush(self, session_factory=None) -> int:
+        """
+        Persiste los carritos sucios. Devuelve cuántos escribió.
+
+        Cada tanda va en una transacción; si falla, sus carritos se
+        reintentan de a uno y el que vuelve a fallar se descarta del flush
+        (queda en el store, logueado) para no trabar al resto.
+        """
+        if session_factory is None:
+            from ..db import SessionLocal as session_factory
+
+        written = 0
+        while True:
+            keys = self.backend.pop_dirty(self.FLUSH_BATCH)
+            if not keys:
+                return written
+            carts = [c for c in (self.get(k) for k in keys) if c is not None]
+            if self._persist(session_factory, carts) is None:
+                written += len(carts)
+                continue
+            for cart in carts:
+                error = self._persist(session_factory, [cart])
+                if error is None:
+                    written += 1
+                else:
+                    log.error(
+                        "cart_store: no se pudo persistir el carrito de %s, se descarta del flush",
+                        cart.user_id, exc_info=error,
+                    )
+
+    @staticmethod
+    def _persist(session_factory, carts: List[CartOut]) -> Optional[Exception]:
+        """Persiste `carts` en una transacción. Devuelve el error, si hubo."""
+        from ..crud.cart_crud import persist_carts
+
+        db = session_factory()
+        try:
+            persist_carts(db, carts)
+            db.commit()
+            return None
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                log.exception("cart_store: falló el flush de carritos")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cart-store-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Frena el hilo y hace un último flush."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+
+def make_store(spec: str) -> Optional[CartStore]:
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    if spec == "memory":
+        return CartStore(MemoryBackend())
+    if spec.startswith("sqlite:///"):
+        return CartStore(SqliteBackend(spec[len("sqlite:///"):]))
+    raise RuntimeError(f"CART_STORE desconocido: {spec!r} (usar memory o sqlite:///ruta)")
+
+
+_store: Optional[CartStore] = make_store(os.getenv("CART_STORE", ""))
+
+
+def get_cart_store() -> Optional[CartStore]:
+    return _store
+
+
+def set_cart_store(store: Optional[CartStore]) -> Optional[CartStore]:
+    """Cambia el store del proceso (tests / scripts). Devuelve el anterior."""
+    global _store
+    previous, _store = _store, store
+    return previous
@@ -0,0 +1,146 @@
+# backend/app/services/comment_pages.py
+"""
+Listado paginado de comentarios de productos.
+
+Orden: (product_id, created_at DESC, id DESC), servido por el índice
+ix_product_comments_product_id_created_at. El cursor es opaco
+(base64 de "product_id|created_at|id") y viaja en X-Next-Cursor.
+
+La primera página y el resumen (count / promedio / histograma) de cada
+producto se cachean en memoria. Un flush que toca comentarios de un
+producto invalida sus entradas; COMMENTS_CACHE_TTL acota cuánto puede
+durar una entrada vieja si la escritura pasó por otro worker. El cache
+guarda como mucho COMMENTS_CACHE_MAX productos (LRU) y solo productos que
+existen: ids inventados no lo hacen crecer.
+"""
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.models import Product, ProductComment
+
+CACHE_TTL = float(os.getenv("COMMENTS_CACHE_TTL", "30"))
+CACHE_MAX = int(os.getenv("COMMENTS_CACHE_MAX", "5000"))
+
+Cursor = Tuple[str, datetime, str]
+
+
+# ============================
+# Cursor
+# ============================
+def encode_cursor(c: ProductComment) -> str:
+    raw = f"{c.product_id}|{c.created_at.isoformat()}|{c.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        pid, ts, cid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 2)
+        return pid, datetime.fromisoformat(ts), cid
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def after_cursor(cursor: Cursor):
+    """Filtro keyset: todo lo que va después del cursor en el orden del listado."""
+    pid, ts, cid = cursor
+    C = ProductComment
+    same_product_older = and_(
+        C.product_id == pid,
+        or_(C.created_at < ts, and_(C.created_at == ts, C.id < cid)),
+    )
+    return or_(C.product_id > pid, same_product_older)
+
+
+ORDER_BY = (
+    ProductComment.product_id,
+    ProductComment.created_at.desc(),
+    ProductComment.id.desc(),
+)
+
+
+# ============================
+# Cache de primera página / resumen
+# ============================
+class CommentPageCache:
+    """
+    Entradas por producto, LRU por producto (a lo sumo max_products).
+    Las vencidas se barren en put, como mucho una vez cada `ttl`.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_products: int = CACHE_MAX):
+        self.ttl = ttl
+        self.max_products = max_products
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Dict[Hashable, Tuple[float, Any]]]" = OrderedDict()
+        self._next_prune = 0.0
+        # sube en cada invalidación: un cálculo que empezó antes no se guarda
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, product_id: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            hit = self._data.get(product_id, {}).get(key)
+            if hit is None or hit[0] < time.monotonic():
+                return None
+            self._data.move_to_end(product_id)
+            return hit[1]
+
+    def put(self, product_id: str, key: Hashable, value: Any, generation: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if generation != self.generation:
+                return
+            if now >= self._next_prune:
+                self._prune(now)
+            self._data.setdefault(product_id, {})[key] = (now + self.ttl, value)
+            self._data.move_to_end(product_id)
+            while len(self._data) > self.max_products:
+                self._data.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        for product_id in list(self._data):
+            entries = self._data[product_id]
+            for key in [k for k, (expires, _) in entries.items() if expires < now]:
+                del entries[key]
+            if not entries:
+                del self._data[product_id]
+        self._next_prune = now + self.ttl
+
+    def invalidate(self, product_id: str) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.pop(product_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+comment_page_cache = CommentPageCache()
+
+
+async def product_exists(db: AsyncSession, product_id: str) -> bool:
+    return await db.scalar(select(Product.id).where(Product.id == product_id)) is not None
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_comment_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ProductComment):
+            if obj.product_id:
+                comment_page_cache.invalidate(obj.product_id)
+            else:
+                comment_page_cache.clear()
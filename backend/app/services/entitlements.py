@@ -0,0 +1,86 @@
+# backend/app/services/entitlements.py
+"""
+user_product_entitlements: qué productos compró y recibió cada usuario.
+
+Se completa en el mismo flush en que una Order pasa a entregada (nueva
+con ese status o con cambio de status), y cuando se agregan items a una
+orden ya entregada. Validar si alguien puede comentar queda en una
+búsqueda por PK (user_id, product_id).
+
+Una orden que deja de estar entregada no quita el permiso: el usuario
+ya recibió el producto al menos una vez.
+
+El INSERT ignora las filas que ya existen (ON CONFLICT DO NOTHING /
+INSERT IGNORE): dos entregas del mismo (usuario, producto) a la vez no
+chocan contra la PK ni tiran abajo el cambio de status de la orden.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, exc, inspect as sa_inspect, insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from ..models.models import Order, OrderItem, UserProductEntitlement
+
+DELIVERED_STATUSES = {"entregado", "delivered"}
+
+
+def is_delivered(status: Optional[str]) -> bool:
+    return (status or "").strip().lower() in DELIVERED_STATUSES
+
+
+def user_received_product(db: Session, user_id: str, product_id: str) -> bool:
+    return db.get(UserProductEntitlement, (user_id, product_id)) is not None
+
+
+def _item_order(session: Session, item: OrderItem) -> Optional[Order]:
+    order = sa_inspect(item).attrs.order.loaded_value
+    if order is NO_VALUE or order is None:
+        # identity map primero; solo va a la DB si la orden no está cargada
+        order = session.get(Order, item.order_id) if item.order_id else None
+    return order
+
+
+@event.listens_for(Session, "after_flush")
+def _grant_on_delivery(session: Session, flush_context) -> None:
+    pairs = set()
+
+    for o in list(session.new) + list(session.dirty):
+        if not isinstance(o, Order) or not o.user_id or not is_delivered(o.status):
+            continue
+        if o in session.dirty and not sa_inspect(o).attrs.status.history.has_changes():
+            continue
+        for it in o.items:
+            if it.product_id:
+                pairs.add((o.user_id, it.product_id))
+
+    for it in session.new:
+        if isinstance(it, OrderItem) and it.product_id:
+            order = _item_order(session, it)
+            if order is not None and order.user_id and is_delivered(order.status):
+                pairs.add((order.user_id, it.product_id))
+
+    if not pairs:
+        return
+
+    table = UserProductEntitlement.__table__
+    conn = session.connection()
+    now = datetime.utcnow()
+    rows = [{"user_id": u, "product_id": p, "delivered_at": now} for u, p in sorted(pairs)]
+
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table).on_conflict_do_nothing()
+        conn.execute(stmt, rows)
+    elif dialect in ("mysql", "mariadb"):
+        conn.execute(mysql.insert(table).prefix_with("IGNORE"), rows)
+    else:
+        # sin insert-ignore: una fila por savepoint, la repetida se saltea
+        for row in rows:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table), row)
+            except exc.IntegrityError:
+                pass
@@ -0,0 +1,232 @@
+# backend/app/services/product_import.py
+"""
+Carga masiva de productos de un vendedor (POST /products/import).
+
+El body (CSV con encabezado o NDJSON, un producto por línea) se lee por
+chunks a medida que llega: nunca está entero en memoria. Cada fila se
+valida con ProductCreate y las válidas se juntan en tandas de
+IMPORT_BATCH_SIZE; cada tanda es un upsert por (seller_id, sku):
+  - un SELECT de los SKU que ya existen
+  - un INSERT executemany para los nuevos
+  - un UPDATE executemany para los existentes
+  - imágenes en bloque, solo lo que cambió (ver crud.product_crud.sync_product_images)
+y su propio commit, así un error en una tanda no tira lo ya importado.
+
+Las filas inválidas no cortan la carga: van al reporte con su número de
+línea de datos (1 = primera fila después del encabezado en CSV).
+
+En CSV, `images` son URLs separadas por "|".
+"""
+import codecs
+import csv
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..crud.product_crud import sync_product_images
+from ..models.models import Product
+from ..schemas.product_schemas import ProductCreate
+
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
+
+# columnas que se escriben desde la fila (sku y seller_id van aparte)
+FIELDS = (
+    "name", "description", "price", "stock", "condition", "category_id",
+    "subcategory", "image_url", "is_active", "pay_method", "network", "alias", "wallet",
+)
+
+Row = Tuple[int, ProductCreate]
+
+
+# ============================
+# Lectura del stream
+# ============================
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Bytes por chunks -> líneas de texto (UTF-8, con o sin BOM)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+    header = None
+    record = ""
+    n = 0
+    async for line in lines:
+        record += line
+        # un campo entre comillas puede tener saltos de línea: se junta hasta cerrar
+        if record.count('"') % 2:
+            continue
+        fields = next(csv.reader([record]), [])
+        record = ""
+        if not any(f.strip() for f in fields):
+            continue
+        if header is None:
+            header = [h.strip().lower() for h in fields]
+            continue
+        n += 1
+        yield n, dict(zip(header, fields))
+    if record.strip():
+        n += 1
+        yield n, {"__error__": "comillas sin cerrar"}
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+    n = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield n, {"__error__": f"JSON inválido: {e}"}
+            continue
+        yield n, data if isinstance(data, dict) else {"__error__": "cada línea debe ser un objeto"}
+
+
+def _from_csv(raw: dict) -> dict:
+    data = {k: v.strip() for k, v in raw.items() if k and isinstance(v, str) and v.strip() != ""}
+    if "images" in data:
+        data["images"] = [u.strip() for u in data["images"].split("|") if u.strip()]
+    return data
+
+
+def parse_row(raw: dict, fmt: str) -> ProductCreate:
+    data = _from_csv(raw) if fmt == "csv" else raw
+    p = ProductCreate.model_validate(data)
+    if not p.sku:
+        raise ValueError("sku: requerido para la carga masiva")
+    return p
+
+
+def _errors(exc: Exception) -> List[str]:
+    if isinstance(exc, ValidationError):
+        return [f"{'.'.join(str(x) for x in e['loc'])}: {e['msg']}" for e in exc.errors()]
+    return [str(exc)]
+
+
+# ============================
+# Upsert por tanda
+# ============================
+def upsert_batch(db: Session, seller_id: str, batch: List[Row]) -> Tuple[int, int]:
+    """Upsert de una tanda por (seller_id, sku). Devuelve (creados, actualizados)."""
+    table = Product.__table__
+    existing: Dict[str, str] = dict(
+        db.execute(
+            select(table.c.sku, table.c.id).where(
+                table.c.seller_id == seller_id,
+                table.c.sku.in_([p.sku for _, p in batch]),
+            )
+        ).all()
+    )
+
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    images: Dict[str, List[str]] = {}
+    for _, p in batch:
+        values = {f: getattr(p, f) for f in FIELDS}
+        pid = existing.get(p.sku)
+        if pid:
+            updates.append({"_id": pid, **values, "updated_at": now})
+        else:
+            pid = str(uuid4())
+            inserts.append({
+                "id": pid, "seller_id": seller_id, "sku": p.sku, **values,
+                "created_at": now, "updated_at": now,
+            })
+        if p.images is not None:
+            images[pid] = p.images
+
+    if inserts:
+        db.execute(insert(table), inserts)
+    if updates:
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(version=table.c.version + 1),
+            updates,
+        )
+    if images:
+        sync_product_images(db, images, bump_version=False)  # el UPDATE de arriba ya la subió
+    return len(inserts), len(updates)
+
+
+def _commit_batch(db: Session, seller_id: str, batch: List[Row]) -> Tuple[int, int]:
+    try:
+        counts = upsert_batch(db, seller_id, batch)
+        db.commit()
+        return counts
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+
+async def import_products(chunks: AsyncIterator[bytes], fmt: str, db: Session, seller_id: str) -> dict:
+    """
+    Lee el stream, valida y upsertea por tandas. La DB (sync) corre en el
+    threadpool para no bloquear el event loop mientras se sigue leyendo.
+    """
+    records = iter_csv_records if fmt == "csv" else iter_ndjson_records
+
+    report = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+    seen_skus: Dict[str, int] = {}
+    batch: List[Row] = []
+
+    def fail(row: int, sku, errors: List[str]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row, "sku": sku, "errors": errors})
+
+    async def flush() -> None:
+        try:
+            created, updated = await run_in_threadpool(_commit_batch, db, seller_id, batch)
+        except SQLAlchemyError as e:
+            msg = f"error de base en la tanda: {e.__class__.__name__}"
+            for row, p in batch:
+                fail(row, p.sku, [msg])
+        else:
+            report["created"] += created
+            report["updated"] += updated
+        batch.clear()
+
+    async for row, raw in records(iter_lines(chunks)):
+        report["rows"] += 1
+        if "__error__" in raw:
+            fail(row, None, [raw["__error__"]])
+            continue
+        try:
+            p = parse_row(raw, fmt)
+        except (ValidationError, ValueError) as e:
+            fail(row, raw.get("sku") or None, _errors(e))
+            continue
+        if p.sku in seen_skus:
+            fail(row, p.sku, [f"sku repetido en el archivo (fila {seen_skus[p.sku]})"])
+            continue
+        seen_skus[p.sku] = row
+
+        batch.append((row, p))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
@@ -0,0 +1,233 @@
+# backend/app/services/product_media.py
+"""
+Imágenes de productos servidas por el backend (GET /media/...).
+
+Cada imagen se baja (o se sube) una sola vez y se guarda en disco bajo el
+hash de su contenido (sha256, 32 hex):
+
+    MEDIA_DIR/orig/ab/<hash>           original tal cual llegó
+    MEDIA_DIR/<ancho>/ab/<hash>.webp   miniaturas de THUMB_SIZES
+    MEDIA_DIR/src/cd/<sha(url)>        url externa -> hash (para no rebajarla)
+
+Las miniaturas se generan con Pillow en un pool de hilos (MEDIA_WORKERS)
+para no frenar el event loop. Como la URL lleva el hash del contenido, lo
+que se sirve nunca cambia: Cache-Control immutable de un año.
+
+El proxy solo baja URLs que ya figuran como imagen de algún producto o
+item de carrito: no es un fetch abierto a cualquier host. Como esas URLs
+las carga cualquier vendedor, además se resuelve el host y se rechazan
+direcciones internas (loopback, privadas, link-local, reservadas), en la
+URL y en cada salto de redirect. La conexión va a la IP ya validada (con
+Host y SNI del nombre original): httpx no vuelve a resolver, así que un
+DNS que cambia de respuesta entre el chequeo y el GET no la desvía.
+"""
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import CartItem, Product, ProductImage
+
+log = logging.getLogger(__name__)
+
+MEDIA_DIR = Path(os.getenv("MEDIA_DIR", Path(__file__).resolve().parents[2] / "media"))
+THUMB_SIZES = (160, 480, 960)
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(10 * 1024 * 1024)))
+MEDIA_FETCH_TIMEOUT = float(os.getenv("MEDIA_FETCH_TIMEOUT", "10"))
+MEDIA_MAX_REDIRECTS = 5
+WEBP_QUALITY = 80
+
+# url con hash de contenido: no cambia nunca
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("MEDIA_WORKERS", "4")), thread_name_prefix="media")
+# una sola bajada por url aunque lleguen varias requests juntas
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+class MediaError(Exception):
+    """La imagen no se pudo obtener o no es una imagen válida."""
+
+
+# ============================
+# Disco
+# ============================
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def original_path(digest: str) -> Path:
+    return MEDIA_DIR / "orig" / digest[:2] / digest
+
+
+def thumb_path(digest: str, size: int) -> Path:
+    return MEDIA_DIR / str(size) / digest[:2] / f"{digest}.webp"
+
+
+def _source_path(url: str) -> Path:
+    key = content_hash(url.encode())
+    return MEDIA_DIR / "src" / key[:2] / key
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def is_stored(digest: str) -> bool:
+    return all(thumb_path(digest, s).exists() for s in THUMB_SIZES)
+
+
+def cached_hash_for(url: str) -> Optional[str]:
+    try:
+        digest = _source_path(url).read_text().strip()
+    except OSError:
+        return None
+    return digest if is_stored(digest) else None
+
+
+# ============================
+# Miniaturas (corre en el pool)
+# ============================
+def _render(data: bytes) -> str:
+    digest = content_hash(data)
+    if is_stored(digest):
+        return digest
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.load()
+            im = ImageOps.exif_transpose(im)
+            if im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA" if im.mode in ("LA", "P") or "transparency" in im.info else "RGB")
+            for size in THUMB_SIZES:
+                thumb = im.copy()
+                thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+                buf = io.BytesIO()
+                thumb.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+                _atomic_write(thumb_path(digest, size), buf.getvalue())
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise MediaError(f"no es una imagen válida: {e.__class__.__name__}") from e
+    _atomic_write(original_path(digest), data)
+    return digest
+
+
+async def store_image(data: bytes) -> str:
+    """Guarda original + miniaturas y devuelve el hash."""
+    if len(data) > MEDIA_MAX_BYTES:
+        raise MediaError("la imagen supera MEDIA_MAX_BYTES")
+    return await asyncio.get_running_loop().run_in_executor(_pool, _render, data)
+
+
+# ============================
+# Proxy de URLs externas
+# ============================
+async def is_known_image_url(db: AsyncSession, url: str) -> bool:
+    """La url es la imagen de algún producto o item de carrito."""
+    return bool(await db.scalar(select(or_(
+        select(Product.id).where(Product.image_url == url).exists(),
+        select(ProductImage.id).where(ProductImage.url == url).exists(),
+        select(CartItem.id).where(CartItem.image == url).exists(),
+    ))))
+
+
+def _is_public(ip: "ipaddress._BaseAddress") -> bool:
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return not (ip.is_loopback or ip.is_private or ip.is_link_local or ip.is_reserved
+                or ip.is_multicast or ip.is_unspecified)
+
+
+async def check_public_url(url: httpx.URL) -> str:
+    """
+    Rechaza URLs que no sean http(s) o cuyo host resuelva a una IP interna.
+    Devuelve la IP a la que hay que conectarse.
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise MediaError("url inválida")
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise MediaError(f"no se pudo resolver {url.host}") from e
+    ips = [ipaddress.ip_address(sockaddr[0]) for *_, sockaddr in infos]
+    if not ips or not all(_is_public(ip) for ip in ips):
+        raise MediaError(f"{url.host} resuelve a una dirección interna")
+    return str(ips[0])
+
+
+def _pinned_request(client: httpx.AsyncClient, url: httpx.URL, ip: str) -> httpx.Request:
+    """GET a `ip` con el Host (y el SNI/certificado, en https) de `url`."""
+    extensions = {"sni_hostname": url.host} if url.scheme == "https" else {}
+    return client.build_request("GET", url.copy_with(host=ip),
+                                headers={"Host": url.netloc.decode("ascii")},
+                                extensions=extensions)
+
+
+async def _download(url: str) -> bytes:
+    """
+    Baja la imagen siguiendo los redirects a mano: cada salto se resuelve,
+    se valida y se conecta a esa misma IP.
+    """
+    target = httpx.URL(url)
+    try:
+        # trust_env=False: un proxy del entorno volvería a resolver el host
+        async with httpx.AsyncClient(timeout=MEDIA_FETCH_TIMEOUT, follow_redirects=False,
+                                     trust_env=False) as client:
+            for _ in range(MEDIA_MAX_REDIRECTS + 1):
+                ip = await check_public_url(target)
+                r = await client.send(_pinned_request(client, target, ip), stream=True)
+                try:
+                    if r.is_redirect:
+                        # relativo a la url original, no a la de la IP
+                        target = target.join(r.headers["location"])
+                        continue
+                    if r.status_code != 200:
+                        raise MediaError(f"el origen respondió {r.status_code}")
+                    data = bytearray()
+                    async for chunk in r.aiter_bytes():
+                        data += chunk
+                        if len(data) > MEDIA_MAX_BYTES:
+                            raise MediaError("la imagen supera MEDIA_MAX_BYTES")
+                    return bytes(data)
+                finally:
+                    await r.aclose()
+    except httpx.HTTPError as e:
+        raise MediaError(f"no se pudo bajar la imagen: {e.__class__.__name__}") from e
+    raise MediaError("demasiados redirects")
+
+
+async def _fetch_and_store(url: str) -> str:
+    digest = await store_image(await _download(url))
+    _atomic_write(_source_path(url), digest.encode())
+    return digest
+
+
+async def hash_for_url(url: str) -> str:
+    """Hash de la imagen de `url`, bajándola solo si todavía no está."""
+    digest = cached_hash_for(url)
+    if digest:
+        return digest
+    fut = _inflight.get(url)
+    if fut is None:
+        fut = _inflight[url] = asyncio.ensure_future(_fetch_and_store(url))
+        fut.add_done_callback(lambda _: _inflight.pop(url, None))
+    return await asyncio.shield(fut)
@@ -0,0 +1,112 @@
+# backend/app/services/product_rating.py
+"""
+Rating agregado por producto (products.rating_sum / rating_count).
+
+Cada flush que agrega, borra o cambia el rating de un ProductComment
+suma el delta al producto con un UPDATE atómico, en la misma transacción
+que el comentario. El listado de productos lee el promedio de las
+columnas, sin agregar comentarios por request.
+
+Lo que no pasa por el ORM (borrados en cascada desde la DB, cargas
+masivas) se corrige con el recálculo:
+    python -m backend.app.services.product_rating
+"""
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, inspect as sa_inspect, select, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Product, ProductComment
+
+_PENDING_KEY = "product_rating_pending"
+
+
+def average_rating(p: Product) -> float:
+    """Promedio de los comentarios; sin comentarios queda el rating cargado."""
+    if p.rating_count:
+        return round(p.rating_sum / p.rating_count, 1)
+    return float(p.rating or 0)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rating_deltas(session: Session, flush_context) -> None:
+    # product_id -> [delta_sum, delta_count]
+    deltas = defaultdict(lambda: [0, 0])
+
+    for c in session.new:
+        if isinstance(c, ProductComment):
+            deltas[c.product_id][0] += c.rating or 0
+            deltas[c.product_id][1] += 1
+
+    for c in session.deleted:
+        if isinstance(c, ProductComment):
+            old = sa_inspect(c).attrs.rating.history.deleted
+            deltas[c.product_id][0] -= (old[0] if old else c.rating) or 0
+            deltas[c.product_id][1] -= 1
+
+    for c in session.dirty:
+        if isinstance(c, ProductComment):
+            hist = sa_inspect(c).attrs.rating.history
+            if hist.has_changes() and hist.deleted:
+                deltas[c.product_id][0] += (c.rating or 0) - (hist.deleted[0] or 0)
+
+    deltas = {pid: d for pid, d in deltas.items() if d != [0, 0]}
+    if not deltas:
+        return
+
+    conn = session.connection()
+    products = Product.__table__
+    for pid, (d_sum, d_count) in deltas.items():
+        conn.execute(
+            update(products)
+            .where(products.c.id == pid)
+            .values(
+                rating_sum=products.c.rating_sum + d_sum,
+                rating_count=products.c.rating_count + d_count,
+            )
+        )
+    session.info.setdefault(_PENDING_KEY, set()).update(deltas)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_loaded_products(session: Session, flush_context) -> None:
+    # los Product ya cargados en la sesión tienen los contadores viejos
+    for pid in session.info.pop(_PENDING_KEY, ()):
+        p = session.identity_map.get(session.identity_key(Product, pid))
+        if p is not None:
+            session.expire(p, ["rating_sum", "rating_count"])
+
+
+def recompute_product_ratings(db: Session, product_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recalcula rating_sum / rating_count desde product_comments con un solo
+    UPDATE (subconsultas correlacionadas). Devuelve las filas actualizadas.
+    """
+    comments = ProductComment.__table__
+    products = Product.__table__
+    per_product = comments.c.product_id == products.c.id
+
+    stmt = update(products).values(
+        rating_sum=func.coalesce(
+            select(func.sum(comments.c.rating)).where(per_product).scalar_subquery(), 0
+        ),
+        rating_count=select(func.count()).where(per_product).scalar_subquery(),
+    )
+    if product_ids is not None:
+        stmt = stmt.where(products.c.id.in_(list(product_ids)))
+
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        n = recompute_product_ratings(db)
+        print(f"✅ Ratings recalculados para {n} productos")
+    finally:
+        db.close()
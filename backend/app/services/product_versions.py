@@ -0,0 +1,99 @@
+# backend/app/services/product_versions.py
+"""
+Versión de products para control optimista.
+
+Todo UPDATE de un Product por ORM (PUT /products/{id}, stock que descuenta
+el carrito, etc.) sube `version` con `version = version + 1` en el mismo
+UPDATE (no con el valor leído: dos requests cruzadas suben las dos); los
+UPDATE por Core (carga masiva, PATCH /products/bulk) la suben en el mismo
+statement, y cambiar las imágenes también la sube
+(crud.product_crud.sync_product_images).
+
+PATCH /products/bulk aplica stock / price / is_active de muchos productos
+en una transacción:
+  - un SELECT ... FOR UPDATE de (id, version) de los productos del vendedor
+  - si falta alguno o alguna versión no coincide: 404 / 409 y no se toca nada
+  - un único UPDATE con CASE por columna, que vuelve a chequear la versión
+    en el WHERE (si entre medio cambió algo, rowcount no cierra -> 409)
+"""
+from datetime import datetime
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, event, select, update
+from sqlalchemy.orm import Session
+
+from ..models.models import Product
+from ..schemas.product_schemas import ProductBulkPatchItem
+
+BULK_FIELDS = ("price", "stock", "is_active")
+
+
+@event.listens_for(Product, "before_update")
+def _bump_version(mapper, connection, target: Product) -> None:
+    # expresión SQL: se resuelve en la base; el atributo queda expirado
+    target.version = Product.version + 1
+
+
+def apply_bulk_patch(db: Session, seller_id: str, items: List[ProductBulkPatchItem]) -> List[dict]:
+    """Aplica el lote o nada. No hace commit."""
+    table = Product.__table__
+    ids = [it.id for it in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Hay ids repetidos en el lote")
+
+    current = dict(
+        db.execute(
+            select(table.c.id, table.c.version)
+            .where(table.c.id.in_(ids), table.c.seller_id == seller_id)
+            .with_for_update()
+        ).all()
+    )
+
+    missing = [i for i in ids if i not in current]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"msg": "Productos inexistentes o de otro vendedor", "ids": missing},
+        )
+
+    conflicts = [
+        {"id": it.id, "expected": it.version, "current": current[it.id]}
+        for it in items
+        if it.version is not None and it.version != current[it.id]
+    ]
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"msg": "Los productos cambiaron desde que se leyeron", "conflicts": conflicts},
+        )
+
+    values = {"version": table.c.version + 1, "updated_at": datetime.utcnow()}
+    for field in BULK_FIELDS:
+        whens = {it.id: getattr(it, field) for it in items if getattr(it, field) is not None}
+        if whens:
+            values[field] = case(whens, value=table.c.id, else_=table.c[field])
+
+    result = db.execute(
+        update(table)
+        .where(
+            table.c.id.in_(ids),
+            table.c.seller_id == seller_id,
+            table.c.version == case(current, value=table.c.id),
+        )
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(ids):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"msg": "Los productos cambiaron mientras se guardaban", "conflicts": []},
+        )
+
+    rows = db.execute(
+        select(table.c.id, table.c.version, table.c.price, table.c.stock, table.c.is_active)
+        .where(table.c.id.in_(ids))
+    ).mappings().all()
+    order = {pid: i for i, pid in enumerate(ids)}
+    return sorted((dict(r) for r in rows), key=lambda r: order[r["id"]])
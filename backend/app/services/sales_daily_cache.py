@@ -0,0 +1,160 @@
+# backend/app/services/sales_daily_cache.py
+"""
+Cache en memoria de ventas diarias para /analytics/sales-daily?incremental=true.
+
+SALES_DAILY_SETTLE_DAYS es la cantidad de días abiertos contando hoy
+(default 1: solo hoy). Los días anteriores al watermark se consideran
+cerrados: se calculan una vez y se guardan por (scope, día). Los días
+abiertos se recalculan siempre.
+
+Un día cerrado se invalida cuando se commitea una Order de ese día nueva,
+borrada o con cambio de status, o un OrderItem de ese día nuevo, borrado o
+con cambios en lo que suma (quantity / unit_price / seller_id). Los días se
+juntan en cada flush (session.info) y se invalidan recién en el commit: un
+cálculo que corre entre el flush y el commit lee filas viejas, pero como
+tomó la generación antes de la invalidación, no se guarda.
+
+El cache es por proceso: cada worker arma el suyo, con a lo sumo
+SALES_DAILY_CACHE_MAX scopes (LRU). Los cambios hechos en otro worker (o
+que la réplica todavía no tenía) no lo invalidan: SALES_DAILY_CACHE_TTL
+acota cuánto puede durar un día cerrado viejo.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from ..models.models import Order, OrderItem
+
+SETTLE_DAYS = max(1, int(os.getenv("SALES_DAILY_SETTLE_DAYS", "1")))
+CACHE_MAX = int(os.getenv("SALES_DAILY_CACHE_MAX", "1000"))
+CACHE_TTL = float(os.getenv("SALES_DAILY_CACHE_TTL", "600"))
+
+# columnas de OrderItem que cambian el total del día (o de qué scope es)
+ITEM_TOTAL_FIELDS = ("quantity", "unit_price", "seller_id")
+
+# None = día ya calculado sin ventas (distinto de "no está en cache")
+DayTotal = Optional[float]
+
+
+class SalesDailyCache:
+    def __init__(self, settle_days: int = SETTLE_DAYS, max_scopes: int = CACHE_MAX,
+                 ttl: float = CACHE_TTL):
+        self.settle_days = settle_days
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # LRU por scope (vendedor / comprador / admin); día -> (vence, total)
+        self._data: "OrderedDict[Hashable, Dict[date, Tuple[float, DayTotal]]]" = OrderedDict()
+        # sube en cada invalidación: un cálculo que empezó antes no se guarda
+        self.generation = 0
+
+    def watermark(self, today: Optional[date] = None) -> date:
+        """Primer día abierto. Todo lo anterior está cerrado."""
+        today = today or datetime.now().date()
+        return today - timedelta(days=self.settle_days - 1)
+
+    def get_many(self, scope: Hashable, days) -> Tuple[Dict[date, DayTotal], list]:
+        """Devuelve (cacheados, faltantes) para los días pedidos."""
+        hits: Dict[date, DayTotal] = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            per_scope = self._data.get(scope, {})
+            if scope in self._data:
+                self._data.move_to_end(scope)
+            for d in days:
+                hit = per_scope.get(d)
+                if hit is not None and hit[0] >= now:
+                    hits[d] = hit[1]
+                else:
+                    missing.append(d)
+        return hits, missing
+
+    def put_many(self, scope: Hashable, values: Dict[date, DayTotal], generation: int) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data.setdefault(scope, {}).update((d, (expires, t)) for d, t in values.items())
+            self._data.move_to_end(scope)
+            while len(self._data) > self.max_scopes:
+                self._data.popitem(last=False)
+
+    def invalidate_days(self, days: Set[date]) -> None:
+        with self._lock:
+            self.generation += 1
+            for per_scope in self._data.values():
+                for d in days:
+                    per_scope.pop(d, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+sales_daily_cache = SalesDailyCache()
+
+
+def _order_day(obj) -> Optional[date]:
+    created = getattr(obj, "created_at", None)
+    return created.date() if isinstance(created, datetime) else None
+
+
+# días tocados por los flush de la transacción; ALL_DAYS = no se sabe cuáles
+_PENDING_KEY = "sales_daily_pending"
+ALL_DAYS = None
+
+
+def _mark(session: Session, d: Optional[date]) -> None:
+    session.info.setdefault(_PENDING_KEY, set()).add(d)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_order_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Order):
+            if obj in session.dirty and not sa_inspect(obj).attrs.status.history.has_changes():
+                continue
+            _mark(session, _order_day(obj))
+
+        elif isinstance(obj, OrderItem):
+            if obj in session.dirty:
+                attrs = sa_inspect(obj).attrs
+                if attrs.order_id.history.has_changes():
+                    # pasó de una orden a otra: no sabemos el día de la anterior
+                    _mark(session, ALL_DAYS)
+                    continue
+                if not any(attrs[f].history.has_changes() for f in ITEM_TOTAL_FIELDS):
+                    continue
+            order = sa_inspect(obj).attrs.order.loaded_value
+            if order is NO_VALUE or order is None:
+                # identity map primero; solo va a la DB si la orden no está cargada
+                order = session.get(Order, obj.order_id) if obj.order_id else None
+            # orden sin fecha conocida: se invalida todo
+            _mark(session, _order_day(order))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    days = session.info.pop(_PENDING_KEY, None)
+    if not days:
+        return
+    if ALL_DAYS in days:
+        sales_daily_cache.clear()
+    else:
+        sales_daily_cache.invalidate_days(days)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    # un rollback a savepoint deja viva la transacción de afuera (y sus días)
+    if not session.in_transaction():
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,294 @@
+"""baseline: esquema tal como lo creaba init_db() (create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 13:21:25.476581
+
+Una base ya creada con create_all se marca sin tocarla:
+    alembic stamp 0001 && alembic upgrade head
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('categories',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(length=80), nullable=False),
+    sa.Column('parent_id', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['parent_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_categories_name'), ['name'], unique=False)
+
+    op.create_table('orders',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('user_name', sa.String(length=120), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('total_amount', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('roles',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('nombre', sa.String(length=40), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('roles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_roles_code'), ['code'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('nombre', sa.String(length=80), nullable=False),
+    sa.Column('apellido', sa.String(length=80), nullable=False),
+    sa.Column('tipo_doc', sa.String(length=20), nullable=False),
+    sa.Column('nro_doc', sa.String(length=20), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('tel', sa.String(length=40), nullable=True),
+    sa.Column('palabra_seg', sa.String(length=120), nullable=True),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('acepta_terminos', sa.Boolean(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('dni_bloqueado', sa.Boolean(), nullable=False),
+    sa.Column('premium', sa.Integer(), nullable=False),
+    sa.Column('reset_code_hash', sa.String(length=255), nullable=True),
+    sa.Column('reset_code_expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nro_doc')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+
+    op.create_table('addresses',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('calle_y_numero', sa.String(length=120), nullable=False),
+    sa.Column('ciudad', sa.String(length=80), nullable=False),
+    sa.Column('provincia', sa.String(length=80), nullable=False),
+    sa.Column('pais', sa.String(length=80), nullable=False),
+    sa.Column('cp', sa.String(length=15), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'tipo', name='uq_address_user_tipo')
+    )
+    with op.batch_alter_table('addresses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_addresses_user_id'), ['user_id'], unique=False)
+
+    op.create_table('banking_infos',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('cbu_o_alias', sa.String(length=60), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    with op.batch_alter_table('banking_infos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_banking_infos_cbu_o_alias'), ['cbu_o_alias'], unique=True)
+
+    op.create_table('carts',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_carts_user_id'), ['user_id'], unique=False)
+
+    op.create_table('crypto_wallets',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('red', sa.String(length=20), nullable=False),
+    sa.Column('address', sa.String(length=120), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'red', name='uq_wallet_user_red')
+    )
+    op.create_table('kyc_documents',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('filename', sa.String(length=180), nullable=False),
+    sa.Column('mime', sa.String(length=50), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('storage_path', sa.String(length=255), nullable=False),
+    sa.Column('subido_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('order_items',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=False),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('product_name', sa.String(length=160), nullable=False),
+    sa.Column('category', sa.String(length=64), nullable=True),
+    sa.Column('subcategory', sa.String(length=64), nullable=True),
+    sa.Column('seller', sa.String(length=120), nullable=True),
+    sa.Column('seller_id', sa.String(length=36), nullable=True),
+    sa.Column('company', sa.String(length=160), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('payments',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=False),
+    sa.Column('provider', sa.String(length=30), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('tx_ref', sa.String(length=80), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_payments_order_id'), ['order_id'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('seller_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('condition', sa.String(length=10), nullable=False),
+    sa.Column('rating', sa.Numeric(precision=3, scale=1), nullable=False),
+    sa.Column('sold_count', sa.Integer(), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('features', sa.Text(), nullable=True),
+    sa.Column('category_id', sa.String(), nullable=True),
+    sa.Column('subcategory', sa.String(length=80), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('pay_method', sa.String(length=40), nullable=True),
+    sa.Column('network', sa.String(length=40), nullable=True),
+    sa.Column('alias', sa.String(length=120), nullable=True),
+    sa.Column('wallet', sa.String(length=200), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_name'), ['name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_seller_id'), ['seller_id'], unique=False)
+
+    op.create_table('user_roles',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('asignado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'role_id')
+    )
+    op.create_table('cart_items',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('cart_id', sa.String(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(length=180), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('qty', sa.Integer(), nullable=False),
+    sa.Column('image', sa.String(length=255), nullable=True),
+    sa.Column('seller', sa.String(length=120), nullable=False),
+    sa.Column('stock_snapshot', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cart_id'], ['carts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cart_items_cart_id'), ['cart_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_cart_items_product_id'), ['product_id'], unique=False)
+
+    op.create_table('product_comments',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_comments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_comments_product_id'), ['product_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_product_comments_user_id'), ['user_id'], unique=False)
+
+    op.create_table('product_images',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('product_id', sa.String(), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=False),
+    sa.Column('sort_order', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_images_product_id'), ['product_id'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_images_product_id'))
+
+    op.drop_table('product_images')
+    with op.batch_alter_table('product_comments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_comments_user_id'))
+        batch_op.drop_index(batch_op.f('ix_product_comments_product_id'))
+
+    op.drop_table('product_comments')
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cart_items_product_id'))
+        batch_op.drop_index(batch_op.f('ix_cart_items_cart_id'))
+
+    op.drop_table('cart_items')
+    op.drop_table('user_roles')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_seller_id'))
+        batch_op.drop_index(batch_op.f('ix_products_name'))
+
+    op.drop_table('products')
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_payments_order_id'))
+
+    op.drop_table('payments')
+    op.drop_table('order_items')
+    op.drop_table('kyc_documents')
+    op.drop_table('crypto_wallets')
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_carts_user_id'))
+
+    op.drop_table('carts')
+    with op.batch_alter_table('banking_infos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_banking_infos_cbu_o_alias'))
+
+    op.drop_table('banking_infos')
+    with op.batch_alter_table('addresses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_addresses_user_id'))
+
+    op.drop_table('addresses')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('roles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_roles_code'))
+
+    op.drop_table('roles')
+    op.drop_table('orders')
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_categories_name'))
+
+    op.drop_table('categories')
@@ -0,0 +1,43 @@
+"""índices de los caminos calientes (analytics, admin, catálogo)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 13:40:00.000000
+
+Algunos de estos índices ya existen en bases creadas con create_all
+después de agregarlos al modelo: se crean solo si faltan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas)
+INDEXES = [
+    ("ix_order_items_seller_id", "order_items", ["seller_id"]),            # analytics por vendedor
+    ("ix_orders_created_at", "orders", ["created_at"]),                    # rangos de fechas
+    ("ix_orders_user_id", "orders", ["user_id"]),                          # historial / analytics comprador
+    ("ix_users_apellido", "users", ["apellido"]),                          # búsqueda admin por prefijo
+    ("ix_users_estado_creado_en", "users", ["estado", "creado_en"]),       # listado admin (cubre users.estado)
+    ("ix_products_is_active_created_at", "products", ["is_active", "created_at"]),  # catálogo
+]
+
+
+def _existing(table: str) -> set:
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(INDEXES):
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
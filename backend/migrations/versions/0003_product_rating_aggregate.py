@@ -0,0 +1,41 @@
+"""rating agregado por producto (rating_sum / rating_count)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:10:00.000000
+
+Agrega las columnas y las llena desde product_comments
+(mismo UPDATE que services.product_rating.recompute_product_ratings).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        """
+        UPDATE products SET
+            rating_sum = COALESCE(
+                (SELECT SUM(c.rating) FROM product_comments c WHERE c.product_id = products.id), 0
+            ),
+            rating_count = (
+                SELECT COUNT(*) FROM product_comments c WHERE c.product_id = products.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
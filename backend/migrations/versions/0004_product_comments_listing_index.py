@@ -0,0 +1,26 @@
+"""índice (product_id, created_at) para el listado paginado de comentarios
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:40:00.000000
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_product_comments_product_id_created_at',
+        'product_comments',
+        ['product_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_comments_product_id_created_at', table_name='product_comments')
@@ -0,0 +1,43 @@
+"""user_product_entitlements: compras entregadas por (usuario, producto)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:10:00.000000
+
+Se llena con las órdenes ya entregadas; de ahí en adelante la mantiene
+services/entitlements.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_product_entitlements',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'product_id')
+    )
+
+    op.execute(
+        """
+        INSERT INTO user_product_entitlements (user_id, product_id, delivered_at)
+        SELECT o.user_id, oi.product_id, MIN(o.created_at)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE LOWER(o.status) IN ('entregado', 'delivered')
+          AND o.user_id IS NOT NULL
+          AND oi.product_id IS NOT NULL
+        GROUP BY o.user_id, oi.product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_product_entitlements')
@@ -0,0 +1,28 @@
+"""sku por vendedor en products (carga masiva con upsert)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 17:30:00.000000
+
+Los productos existentes quedan sin SKU (NULL no choca con el unique).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sku', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_products_seller_sku', ['seller_id', 'sku'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_products_seller_sku', type_='unique')
+        batch_op.drop_column('sku')
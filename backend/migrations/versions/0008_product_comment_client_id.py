@@ -0,0 +1,26 @@
+"""client_id en product_comments (POST /comments idempotente)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 21:10:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('product_comments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_id', sa.String(length=64), nullable=True))
+        batch_op.create_index('ux_product_comments_user_id_client_id', ['user_id', 'client_id'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('product_comments', schema=None) as batch_op:
+        batch_op.drop_index('ux_product_comments_user_id_client_id')
+        batch_op.drop_column('client_id')
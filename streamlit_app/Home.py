@@ -12,6 +12,8 @@ from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
 
+from auth_helpers import thumb_url
+
 # Cargar variables desde .env (en la raíz del proyecto)
 load_dotenv()
 
@@ -238,6 +240,8 @@ else:
             img = str(row.get("image_url", "")).strip()
             if not (img and img.startswith("http")):
                 img = "https://via.placeholder.com/600x400.png?text=Sin+Imagen"
+            else:
+                img = thumb_url(img, 480)
 
             pid = str(row.get("id", f"row-{i}"))
             pname = row.get("name", "Producto")
@@ -1,11 +1,19 @@
 # streamlit_app/pages/0d_Olvidé_mi_contraseña.py
 # streamlit_app/auth_helpers.py
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
 import streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()
 
+log = logging.getLogger("mktlab.backend")
+
 # ============================
 # BACKEND URL
 # ============================
@@ -83,9 +91,53 @@ def set_auth_session(data: dict) -> None:
 # ============================
 # HELPERS COMPARTIDOS
 # ============================
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+
 def auth_headers() -> dict:
     tok = st.session_state.get("auth_token")
-    return {"Authorization": f"Bearer {tok}"} if tok else {}
+    headers = {"Authorization": f"Bearer {tok}"} if tok else {}
+
+    # read-your-writes: después de una escritura el backend lee del primario
+    until = st.session_state.get("read_primary_until")
+    if until and until > time.time():
+        headers[READ_PRIMARY_HEADER] = f"{until:.3f}"
+    return headers
+
+
+def remember_write(resp) -> None:
+    """
+    Guarda el X-Read-Primary-Until de una respuesta de escritura para que
+    las lecturas siguientes (historial, dashboards) vean lo recién escrito.
+    """
+    raw = getattr(resp, "headers", {}).get(READ_PRIMARY_HEADER) if resp is not None else None
+    try:
+        st.session_state["read_primary_until"] = float(raw)
+    except (TypeError, ValueError):
+        pass
+
+
+def thumb_url(url: str, width: int = 480) -> str:
+    """
+    Miniatura de una imagen de producto servida por el backend (/media/proxy):
+    se baja una vez, se achica y queda cacheada con hash de contenido.
+    Anchos: 160, 480, 960. Si no es una URL http(s), se devuelve tal cual.
+    """
+    url = (url or "").strip()
+    if not url.startswith(("http://", "https://")) or url.startswith(get_backend_url()):
+        return url
+    return f"{get_backend_url()}/media/proxy?{urlencode({'url': url, 'w': width})}"
+
+
+def log_server_timing(resp) -> None:
+    """
+    Loguea el Server-Timing del backend (tiempo total y en la DB) si vino.
+    El backend lo manda con SERVER_TIMING=1.
+    """
+    timing = getattr(resp, "headers", {}).get("Server-Timing") if resp is not None else None
+    if timing:
+        req = getattr(resp, "request", None)
+        log.info("%s %s -> %s | %s", getattr(req, "method", "?"), getattr(req, "url", "?"), resp.status_code, timing)
 
 
 def require_login():
@@ -101,3 +153,43 @@ def require_admin():
     if "ADMIN" not in roles:
         st.error("No tenés permisos para acceder a este panel.")
         st.stop()
+
+
+# ============================
+# LLAMADAS EN PARALELO
+# ============================
+def api_get_many(calls: dict, timeout: int = 10, max_workers: int = 8) -> dict:
+    """
+    Ejecuta varios GET independientes al backend en paralelo.
+
+    `calls` es {clave: (path, params)}. Devuelve {clave: Response | Exception}
+    con las mismas claves, así cada página maneja errores como siempre.
+    Los headers se arman acá (hilo principal): st.session_state no se
+    toca desde los hilos del pool.
+    """
+    if not calls:
+        return {}
+
+    base = get_backend_url()
+    headers = auth_headers()
+
+    def _get(path: str, params: dict | None):
+        try:
+            resp = requests.get(
+                f"{base}{path}",
+                params=params,
+                headers=headers,
+                timeout=timeout,
+            )
+        except Exception as e:
+            return e
+        log_server_timing(resp)
+        return resp
+
+    workers = max(1, min(max_workers, len(calls)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            key: pool.submit(_get, path, params)
+            for key, (path, params) in calls.items()
+        }
+        return {key: fut.result() for key, fut in futures.items()}
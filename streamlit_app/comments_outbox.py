@@ -0,0 +1,255 @@
+# streamlit_app/comments_outbox.py
+"""
+Outbox local de comentarios (reemplaza el comments.csv).
+
+Si POST /comments falla por conexión, el comentario se agrega a una base
+SQLite local (append-only, un INSERT por comentario; SQLite se encarga
+del lockeo entre sesiones/procesos de Streamlit). Cuando el backend
+vuelve, replay_pending() reenvía en tandas los pendientes del usuario
+logueado con su propio token: no se guardan tokens en disco.
+
+Estados: pending -> sending -> sent | rejected (el backend respondió 4xx,
+p. ej. producto no comprado) | pending (sigue caído). Antes de enviar cada
+fila se la reclama (UPDATE ... WHERE status = 'pending'): dos pestañas no
+mandan la misma. Cada comentario lleva un client_id estable y el backend
+no duplica un client_id que ya tiene, así que reenviar uno que llegó (un
+POST que venció del lado del cliente pero se guardó) no lo repite. Una
+fila que quedó en 'sending' (sesión cortada a mitad) vuelve a 'pending'
+después de CLAIM_TIMEOUT_SECONDS.
+
+Los lectores consultan por product_id con índice en lugar de releer un
+CSV entero.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+OUTBOX_PATH = Path(os.getenv("COMMENTS_OUTBOX_PATH", DATA_DIR / "comments_outbox.sqlite3"))
+LEGACY_CSV_PATH = DATA_DIR / "comments.csv"
+
+REPLAY_BATCH_SIZE = 20
+CLAIM_TIMEOUT_SECONDS = 120
+# las páginas no reenvían en cada render: como mucho una vez por intervalo
+REPLAY_MIN_INTERVAL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     TEXT,
+    product_id  TEXT NOT NULL,
+    user_name   TEXT,
+    payload     TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    last_error  TEXT,
+    claimed_at  REAL
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_product_created ON outbox (product_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_outbox_status_user ON outbox (status, user_id, id);
+"""
+
+
+def _connect(path: Path | None = None) -> sqlite3.Connection:
+    path = Path(path or OUTBOX_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    # WAL: lectores y un escritor a la vez sin bloquearse
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    # outbox creado antes de que existiera claimed_at
+    if "claimed_at" not in {r["name"] for r in conn.execute("PRAGMA table_info(outbox)")}:
+        conn.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+    return conn
+
+
+def new_client_id() -> str:
+    return uuid.uuid4().hex
+
+
+def enqueue(payload: dict, user_id: str | None, path: Path | None = None) -> int:
+    """
+    Agrega un comentario pendiente. O(1): un INSERT. Conserva el client_id
+    del payload (el del POST que falló) o le asigna uno.
+    """
+    payload = {**payload, "client_id": payload.get("client_id") or new_client_id()}
+    with closing(_connect(path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO outbox (user_id, product_id, user_name, payload, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                str(payload["product_id"]),
+                payload.get("user_name"),
+                json.dumps(payload, ensure_ascii=False),
+                datetime.now().isoformat(timespec="seconds"),
+            ),
+        )
+        return cur.lastrowid
+
+
+def local_comments(product_id: str, limit: int = 50, path: Path | None = None) -> list[dict]:
+    """
+    Comentarios locales que el backend todavía no tiene (pendientes y los
+    importados del CSV viejo), más nuevos primero.
+    """
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT payload, created_at, status FROM outbox "
+            "WHERE product_id = ? AND status IN ('pending', 'sending', 'legacy') "
+            "ORDER BY created_at DESC LIMIT ?",
+            (str(product_id), limit),
+        ).fetchall()
+
+    out = []
+    for r in rows:
+        data = json.loads(r["payload"])
+        data["date"] = data.get("date") or r["created_at"][:10]
+        data["pending"] = r["status"] in ("pending", "sending")
+        out.append(data)
+    return out
+
+
+def pending_count(user_id: str, path: Path | None = None) -> int:
+    with closing(_connect(path)) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND user_id = ?",
+            (user_id,),
+        ).fetchone()[0]
+
+
+def replay_pending(
+    base_url: str,
+    user_id: str,
+    headers: dict,
+    batch_size: int = REPLAY_BATCH_SIZE,
+    post=None,
+    path: Path | None = None,
+) -> dict:
+    """
+    Reenvía a POST /comments los pendientes del usuario, de a `batch_size`.
+    Corta en el primer error de conexión / 5xx (el backend sigue caído).
+    Devuelve {"sent": n, "rejected": n, "pending": n}.
+    """
+    if post is None:
+        import requests
+        post = requests.post
+
+    sent = rejected = 0
+    with closing(_connect(path)) as conn:
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'pending' "
+                "WHERE status = 'sending' AND user_id = ? AND claimed_at < ?",
+                (user_id, time.time() - CLAIM_TIMEOUT_SECONDS),
+            )
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM outbox WHERE status = 'pending' AND user_id = ? AND id > ? "
+                "ORDER BY id LIMIT ?",
+                (user_id, last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            stop = False
+            for r in rows:
+                last_id = r["id"]
+                with conn:
+                    claimed = conn.execute(
+                        "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ? AND status = 'pending'",
+                        (time.time(), r["id"]),
+                    ).rowcount
+                if not claimed:
+                    continue  # la tomó otra sesión
+
+                payload = json.loads(r["payload"])
+                # filas encoladas antes del client_id: uno estable por fila
+                payload.setdefault("client_id", f"outbox-{r['id']}")
+                try:
+                    resp = post(f"{base_url}/comments", json=payload, headers=headers, timeout=8)
+                except Exception as e:
+                    update = ("pending", str(e)[:200])
+                    stop = True
+                else:
+                    if resp.status_code in (200, 201):
+                        update = ("sent", None)
+                        sent += 1
+                    elif 400 <= resp.status_code < 500 and resp.status_code != 401:
+                        update = ("rejected", resp.text[:200])
+                        rejected += 1
+                    else:
+                        # 401 (sesión vencida) o 5xx: se reintenta más tarde
+                        update = ("pending", f"HTTP {resp.status_code}")
+                        stop = True
+
+                with conn:
+                    conn.execute(
+                        "UPDATE outbox SET status = ?, last_error = ?, attempts = attempts + 1, "
+                        "claimed_at = NULL WHERE id = ?",
+                        (*update, r["id"]),
+                    )
+                if stop:
+                    break
+            if stop:
+                break
+
+        pending = conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND user_id = ?",
+            (user_id,),
+        ).fetchone()[0]
+
+    return {"sent": sent, "rejected": rejected, "pending": pending}
+
+
+def import_legacy_csv(csv_path: Path = LEGACY_CSV_PATH, path: Path | None = None) -> int:
+    """
+    Pasa el comments.csv viejo al outbox como 'legacy' (solo lectura: no
+    tiene usuario para reenviarlo) y lo renombra para no importarlo dos veces.
+    """
+    import csv
+
+    # el rename es atómico: si otra sesión ya lo tomó, no hay nada que importar
+    taken = csv_path.with_suffix(".csv.importing")
+    try:
+        csv_path.rename(taken)
+    except FileNotFoundError:
+        return 0
+
+    with open(taken, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    with closing(_connect(path)) as conn, conn:
+        conn.executemany(
+            "INSERT INTO outbox (user_id, product_id, user_name, payload, created_at, status) "
+            "VALUES (NULL, ?, ?, ?, ?, 'legacy')",
+            [
+                (
+                    str(r.get("product_id", "")),
+                    r.get("user_name"),
+                    json.dumps(
+                        {
+                            "product_id": r.get("product_id"),
+                            "user_name": r.get("user_name") or "Anónimo",
+                            "rating": float(r.get("rating") or 0),
+                            "criteria": r.get("criteria") or "{}",
+                            "comment": r.get("comment") or "",
+                            "date": r.get("date") or "",
+                        },
+                        ensure_ascii=False,
+                    ),
+                    r.get("date") or datetime.now().isoformat(timespec="seconds"),
+                )
+                for r in rows
+            ],
+        )
+    taken.rename(csv_path.with_suffix(".csv.imported"))
+    return len(rows)
@@ -4,7 +4,7 @@ import requests
 import streamlit as st
 from dotenv import load_dotenv
 
-from auth_helpers import get_backend_url, auth_headers, require_login
+from auth_helpers import get_backend_url, auth_headers, require_login, remember_write, thumb_url
 
 # =========================
 # CONFIG GLOBAL
@@ -45,6 +45,7 @@ def api_post_checkout(payload: dict):
             headers=auth_headers(),
             timeout=15,
         )
+        remember_write(r)
         return r
     except Exception as e:
         st.error(f"No se pudo conectar al backend: {e}")
@@ -220,7 +221,7 @@ for it in items:
     subtotal = float(it.get("subtotal", quantity * unit_price))
     category = prod.get("category", "Sin categoría")
     subcategory = prod.get("subcategory", "Sin subcategoría")
-    image_url = prod.get("image_url") or prod.get("image") or ""
+    image_url = thumb_url(prod.get("image_url") or prod.get("image") or "", 160)
 
     col_item1, col_item2 = st.columns([3, 1])
     with col_item1:
@@ -1,10 +1,9 @@
 # streamlit_app/pages/0a_📊_Dashboard_Global.py
 import streamlit as st
 import pandas as pd
-import requests
 from datetime import timedelta, date
 
-from auth_helpers import get_backend_url, auth_headers, require_login
+from auth_helpers import get_backend_url, require_login, api_get_many
 
 st.set_page_config(page_title="Dashboard Global - MKT", layout="wide")
 st.title("Dashboard Global")
@@ -56,37 +55,23 @@ IS_PREMIUM = is_premium_user()
 # =======================
 # API
 # =======================
-def api_get_global_metrics():
-    try:
-        r = requests.get(
-            f"{BACKEND_URL}/analytics/global",
-            headers=auth_headers(),
-            timeout=10
-        )
-        if r.status_code == 200:
-            return r.json() or {}
-        st.warning(f"/analytics/global -> {r.status_code}: {r.text}")
-        return {}
-    except Exception as e:
-        st.warning(f"Error global metrics: {e}")
+def parse_global_metrics(r):
+    if isinstance(r, Exception):
+        st.warning(f"Error global metrics: {r}")
         return {}
-
-def api_get_orders(from_date: date, to_date: date):
-    try:
-        params = {"from": from_date.isoformat(), "to": to_date.isoformat()}
-        r = requests.get(
-            f"{BACKEND_URL}/analytics/orders",
-            params=params,
-            headers=auth_headers(),
-            timeout=15
-        )
-        if r.status_code == 200:
-            return r.json() or []
-        st.warning(f"/analytics/orders -> {r.status_code}: {r.text}")
-        return []
-    except Exception as e:
-        st.warning(f"Error pidiendo órdenes: {e}")
+    if r.status_code == 200:
+        return r.json() or {}
+    st.warning(f"/analytics/global -> {r.status_code}: {r.text}")
+    return {}
+
+def parse_orders(r):
+    if isinstance(r, Exception):
+        st.warning(f"Error pidiendo órdenes: {r}")
         return []
+    if r.status_code == 200:
+        return r.json() or []
+    st.warning(f"/analytics/orders -> {r.status_code}: {r.text}")
+    return []
 
 def normalize_orders(df: pd.DataFrame) -> pd.DataFrame:
     """Adapta nombres de columnas comunes del backend a lo que usa el dashboard."""
@@ -160,8 +145,13 @@ if isinstance(hasta, list): hasta = hasta[0]
 # =======================
 # DATA
 # =======================
-global_data = api_get_global_metrics()
-orders_data = api_get_orders(desde, hasta)
+# métricas globales y órdenes son independientes: van en paralelo
+results = api_get_many({
+    "global": ("/analytics/global", None),
+    "orders": ("/analytics/orders", {"from": desde.isoformat(), "to": hasta.isoformat()}),
+}, timeout=15)
+global_data = parse_global_metrics(results["global"])
+orders_data = parse_orders(results["orders"])
 
 df_orders = pd.DataFrame(orders_data) if orders_data else pd.DataFrame()
 df_orders = normalize_orders(df_orders)
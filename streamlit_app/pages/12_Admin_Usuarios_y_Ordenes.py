@@ -131,17 +131,37 @@ with tab_users:
     with col_f3:
         dias = st.slider("Días (para nuevos)", min_value=1, max_value=30, value=7)
 
+    busqueda = st.text_input("Buscar (email, documento o apellido)", key=K("users_q"))
+
     params = {}
     if estado_filter != "TODOS":
         params["estado"] = estado_filter
     if solo_nuevos:
         params["solo_nuevos"] = "true"
         params["dias"] = dias
-
+    if busqueda.strip():
+        params["q"] = busqueda.strip()
+
+    # Paginación keyset: pila de cursores de las páginas visitadas.
+    # Si cambian los filtros, se vuelve a la primera página.
+    USERS_PAGE_SIZE = 50
+    filtros_sig = repr(sorted(params.items()))
+    if st.session_state.get(K("users_sig")) != filtros_sig:
+        st.session_state[K("users_sig")] = filtros_sig
+        st.session_state[K("users_cursors")] = []
+    cursors = st.session_state[K("users_cursors")]
+
+    page_params = {**params, "limit": USERS_PAGE_SIZE}
+    if cursors:
+        page_params["cursor"] = cursors[-1]
+
+    users = []
+    next_cursor = None
+    total_users = 0
     try:
         resp = requests.get(
             f"{BACKEND_URL}/admin/users",
-            params=params,
+            params=page_params,
             headers=auth_headers(),
             timeout=20,
         )
@@ -149,20 +169,40 @@ with tab_users:
             st.error(f"Error al cargar usuarios (HTTP {resp.status_code}): {resp.text}")
         else:
             users = resp.json()
+            next_cursor = resp.headers.get("X-Next-Cursor")
+
+        resp_c = requests.get(
+            f"{BACKEND_URL}/admin/users/count",
+            params=params,
+            headers=auth_headers(),
+            timeout=20,
+        )
+        total_users = resp_c.json().get("total", len(users)) if resp_c.status_code == 200 else len(users)
     except Exception as e:
         st.error(f"Error de conexión al backend: {e}")
         users = []
 
-    total_users = len(users)
+    col_p1, col_p2, col_p3 = st.columns([1, 2, 1])
+    with col_p1:
+        if cursors and st.button("⬅️ Anterior", key=K("users_prev")):
+            cursors.pop()
+            st.rerun()
+    with col_p2:
+        st.caption(f"Página {len(cursors) + 1}")
+    with col_p3:
+        if next_cursor and st.button("Siguiente ➡️", key=K("users_next")):
+            cursors.append(next_cursor)
+            st.rerun()
+
     col_u1, col_u2, col_u3 = st.columns(3)
     with col_u1:
         st.metric("Usuarios listados", total_users)
     with col_u2:
         bloqueados = sum(1 for u in users if u.get("estado") == "BLOQUEADO")
-        st.metric("Bloqueados", bloqueados)
+        st.metric("Bloqueados (página)", bloqueados)
     with col_u3:
         dni_block = sum(1 for u in users if u.get("dni_bloqueado"))
-        st.metric("DNI bloqueados", dni_block)
+        st.metric("DNI bloqueados (página)", dni_block)
 
     st.markdown("<div class='table-header'>Listado</div>", unsafe_allow_html=True)
 
@@ -287,11 +327,18 @@ with tab_orders:
         if st.button("🔄 Actualizar", key=K("reload_orders")):
             st.experimental_rerun() if hasattr(st, "experimental_rerun") else st.rerun()
 
+    ORDERS_PAGE_SIZE = 50
+    page_o = st.number_input("Página", min_value=1, value=1, step=1, key=K("orders_page"))
+
     params_o = {
         "from_date": from_date.isoformat(),
         "to_date": to_date.isoformat(),
+        "limit": ORDERS_PAGE_SIZE,
+        "offset": (int(page_o) - 1) * ORDERS_PAGE_SIZE,
     }
 
+    total_orders = 0
+    total_monto = 0
     try:
         resp_o = requests.get(
             f"{BACKEND_URL}/admin/orders",
@@ -304,12 +351,15 @@ with tab_orders:
             orders = []
         else:
             orders = resp_o.json()
+            # totales de todo el rango (no solo de esta página)
+            total_orders = int(resp_o.headers.get("X-Total-Count", len(orders)))
+            total_monto = int(
+                resp_o.headers.get("X-Total-Amount", sum(o.get("total_amount", 0) for o in orders))
+            )
     except Exception as e:
         st.error(f"Error de conexión al backend: {e}")
         orders = []
 
-    total_orders = len(orders)
-    total_monto = sum(o.get("total_amount", 0) for o in orders)
     aprobadas = sum(1 for o in orders if o.get("payment_status") == "APROBADO")
 
     col_o1, col_o2, col_o3 = st.columns(3)
@@ -318,7 +368,7 @@ with tab_orders:
     with col_o2:
         st.metric("Total vendido", f"${total_monto:,.0f}".replace(",", "."))
     with col_o3:
-        st.metric("Pagos aprobados", aprobadas)
+        st.metric("Pagos aprobados (página)", aprobadas)
 
     st.markdown("<div class='table-header'>Listado de órdenes</div>", unsafe_allow_html=True)
 
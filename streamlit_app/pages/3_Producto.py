@@ -2,7 +2,7 @@
 import streamlit as st
 import requests
 
-from auth_helpers import get_backend_url, auth_headers
+from auth_helpers import get_backend_url, auth_headers, thumb_url
 
 st.set_page_config(page_title="Producto", layout="wide")
 
@@ -147,6 +147,8 @@ sold = int(producto.get("sold", 0) or 0)
 img = str(producto.get("image_url", "") or "").strip()
 if not (img and img.startswith("http")):
     img = "https://via.placeholder.com/600x400.png?text=Producto"
+else:
+    img = thumb_url(img, 960)
 
 
 # =========================
@@ -1,7 +1,7 @@
 # streamlit_app/pages/4_Mi_Carrito.py
 import streamlit as st
 import requests
-from auth_helpers import get_backend_url, auth_headers, require_login
+from auth_helpers import get_backend_url, auth_headers, require_login, thumb_url
 
 st.set_page_config(page_title="Mi Carrito - Ecom MKT Lab", layout="centered")
 
@@ -40,6 +40,10 @@ st.markdown("""
 
 # ===== helpers backend =====
 def get_cart():
+    # el PATCH / DELETE anterior ya devolvió el carrito actualizado
+    fresh = st.session_state.pop(K("cart"), None)
+    if fresh is not None:
+        return fresh
     try:
         r = requests.get(f"{BACKEND_URL}/cart", headers=auth_headers(), timeout=15)
 
@@ -60,30 +64,40 @@ def get_cart():
         st.error(f"Error de conexión al backend: {e}")
         st.stop()
 
-def patch_item(item_id: str, qty: int) -> bool:
-    r = requests.patch(
-        f"{BACKEND_URL}/cart/items/{item_id}",
-        json={"qty": qty},
-        headers=auth_headers(),
-        timeout=15,
-    )
-    if r.status_code not in (200, 204):
-        st.error(f"No se pudo actualizar cantidad (HTTP {r.status_code}): {r.text}")
+# cambios de cantidad sin guardar: item_id -> qty nueva (0 = quitar).
+# Se mandan todos juntos en un POST /cart/batch (una transacción) en el
+# render que sigue al click, así que irse por el menú lateral no los pierde.
+# Si el backend falla quedan acá, con el aviso, y se reintentan.
+PENDING = K("pending")
+pending = st.session_state.setdefault(PENDING, {})
+
+def apply_pending() -> bool:
+    ops = [
+        {"op": "remove", "item_id": item_id} if q == 0 else {"op": "set", "item_id": item_id, "qty": q}
+        for item_id, q in pending.items()
+    ]
+    if not ops:
+        return True
+    try:
+        r = requests.post(
+            f"{BACKEND_URL}/cart/batch",
+            json={"ops": ops},
+            headers=auth_headers(),
+            timeout=15,
+        )
+    except Exception as e:
+        st.error(f"Error de conexión al backend: {e}")
         return False
-    return True
-
-def remove_item(item_id: str) -> bool:
-    r = requests.delete(
-        f"{BACKEND_URL}/cart/items/{item_id}",
-        headers=auth_headers(),
-        timeout=15,
-    )
-    if r.status_code not in (200, 204):
-        st.error(f"No se pudo quitar el ítem (HTTP {r.status_code}): {r.text}")
+    if r.status_code != 200:
+        st.error(f"No se pudieron guardar los cambios (HTTP {r.status_code}): {r.text}")
         return False
+    st.session_state[K("cart")] = r.json()
+    pending.clear()
     return True
 
 # ===== data =====
+if pending:
+    apply_pending()
 cart = get_cart()
 
 if isinstance(cart, dict):
@@ -112,13 +126,16 @@ for it in (raw_items or []):
     pid = prod.get("id") if isinstance(prod, dict) else None
     pname = prod.get("name") if isinstance(prod, dict) else None
 
+    if pending.get(str(it.get("id"))) == 0:
+        continue  # quitado, sin guardar todavía
+
     if q > 0 and (pid or pname):
         items.append(it)
 
 st.markdown('<div class="cart-panel">', unsafe_allow_html=True)
 st.markdown('<div class="hdr">🛒 MI CARRITO</div>', unsafe_allow_html=True)
 
-if not items:
+if not items and not pending:
     st.info("Tu carrito está vacío.")
     if st.button("🛍️ Ir a productos", use_container_width=True, key=K("go_home")):
         st.switch_page("Home.py")
@@ -138,8 +155,9 @@ for idx, item in enumerate(items):
     subcategory = prod.get("subcategory", "") or ""
     stock = int(prod.get("stock", prod.get("stock_snapshot", 1) or 1))
     qty = int(item.get("qty", prod.get("qty", 1)) or 1)
+    qty = pending.get(cart_item_id, qty)
     price = float(prod.get("price", 0) or 0)
-    image = prod.get("image_url") or prod.get("image") or ""
+    image = thumb_url(prod.get("image_url") or prod.get("image") or "", 160)
 
     subtotal = qty * price
     total_general += subtotal
@@ -183,21 +201,19 @@ for idx, item in enumerate(items):
             c_sub, c_qty, c_add = st.columns([1, 1, 1])
             with c_sub:
                 if st.button("−", key=K(f"sub_{idx}")):
-                    new_qty = max(1, qty - 1)
-                    if patch_item(cart_item_id, new_qty):
-                        st.rerun()
+                    pending[cart_item_id] = max(1, qty - 1)
+                    st.rerun()
             with c_qty:
                 st.markdown(f"**{qty}**")
             with c_add:
                 if st.button("+", key=K(f"add_{idx}")):
-                    new_qty = min(stock, qty + 1)
-                    if patch_item(cart_item_id, new_qty):
-                        st.rerun()
+                    pending[cart_item_id] = min(stock, qty + 1)
+                    st.rerun()
 
             st.write("")
             if st.button("🗑 Quitar", key=K(f"rm_{idx}")):
-                if remove_item(cart_item_id):
-                    st.rerun()
+                pending[cart_item_id] = 0
+                st.rerun()
 
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -206,18 +222,24 @@ for idx, item in enumerate(items):
 
 st.markdown("</div>", unsafe_allow_html=True)
 
+if pending:
+    st.warning(f"Tenés {len(pending)} cambio(s) sin guardar.")
+    if st.button("💾 Reintentar", key=K("save"), use_container_width=True):
+        if apply_pending():
+            st.rerun()
+
 st.subheader(f"💰 TOTAL A PAGAR: ${total_general:,.0f}".replace(",", "."))
 
 col1, col2 = st.columns(2)
 with col1:
-    if st.button("💳 PAGAR", key=K("pay"), use_container_width=True):
+    if st.button("💳 PAGAR", key=K("pay"), use_container_width=True) and apply_pending():
         try:
             st.switch_page("pages/10_Checkout.py")
         except Exception:
             st.info("Abrí la página de 'Checkout' desde el menú lateral.")
 
 with col2:
-    if st.button("⬅️ VOLVER", key=K("back"), use_container_width=True):
+    if st.button("⬅️ VOLVER", key=K("back"), use_container_width=True) and apply_pending():
         st.switch_page("Home.py")
 
 with st.expander("📦 Información de Compra"):
@@ -1,19 +1,23 @@
 # streamlit_app/pages/5_Comentarios.py
-import json
+import time
+
 import requests
-import pandas as pd
-from datetime import datetime
-from pathlib import Path
 import streamlit as st
 
 from auth_helpers import get_backend_url, auth_headers, require_login
+from comments_outbox import (
+    REPLAY_MIN_INTERVAL,
+    enqueue,
+    import_legacy_csv,
+    local_comments,
+    new_client_id,
+    replay_pending,
+)
 
 st.set_page_config(page_title="Comentarios y Valoración", layout="centered")
 
 # ----------------- Config -----------------
 BACKEND_URL = get_backend_url()
-DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "comments.csv"
-DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 qp = st.query_params
 PRODUCT_ID = str(qp.get("id", "1"))
@@ -28,6 +32,18 @@ if "COMPRADOR" not in roles and "ADMIN" not in roles:
     st.stop()
 
 user_name = st.session_state.get("auth_user_name") or st.session_state.get("user_name") or "Anónimo"
+user_id = st.session_state.get("auth_user_id")
+
+# ----------------- Outbox: reenviar pendientes -----------------
+import_legacy_csv()  # una sola vez: el comments.csv viejo pasa al outbox
+# no en cada render: como mucho una vez cada REPLAY_MIN_INTERVAL por sesión
+if user_id and time.time() - st.session_state.get("outbox_replayed_at", 0) >= REPLAY_MIN_INTERVAL:
+    st.session_state["outbox_replayed_at"] = time.time()
+    replay = replay_pending(BACKEND_URL, user_id, auth_headers())
+    if replay["sent"]:
+        st.success(f"✅ Se enviaron {replay['sent']} comentario(s) que habían quedado pendientes.")
+    if replay["rejected"]:
+        st.warning(f"⚠️ {replay['rejected']} comentario(s) pendientes fueron rechazados por el backend.")
 
 def safe_switch_page(page_filename: str):
     try:
@@ -151,8 +167,13 @@ comment = st.text_area(
 
 # ----------------- Guardar comentario -----------------
 def save_comment(payload: dict) -> bool:
-    """Intenta enviar al backend; si falla, guarda en CSV. Devuelve True si se guardó."""
-    # 1) Intento backend (con token)
+    """
+    Envía al backend. Si el backend no responde, queda en el outbox local
+    y se reenvía solo cuando vuelva, con el mismo client_id: si este POST
+    llegó pero venció la respuesta, el backend no lo duplica.
+    Devuelve True si se guardó.
+    """
+    payload.setdefault("client_id", new_client_id())
     try:
         r = requests.post(
             f"{BACKEND_URL}/comments",
@@ -162,26 +183,15 @@ def save_comment(payload: dict) -> bool:
         )
         if r.status_code in (200, 201):
             return True
+        if r.status_code < 500:
+            st.error(f"El backend rechazó el comentario ({r.status_code}): {r.text}")
+            return False
     except Exception:
         pass
 
-    # 2) Fallback CSV
     try:
-        if DATA_PATH.exists():
-            df = pd.read_csv(DATA_PATH)
-        else:
-            df = pd.DataFrame(columns=["product_id","user_name","rating","criteria","comment","date"])
-
-        row = {
-            "product_id": payload["product_id"],
-            "user_name": payload.get("user_name", "Anónimo"),
-            "rating": payload["rating"],
-            "criteria": json.dumps(payload["criteria"], ensure_ascii=False),
-            "comment": payload["comment"],
-            "date": datetime.now().strftime("%Y-%m-%d")
-        }
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        df.to_csv(DATA_PATH, index=False, encoding="utf-8")
+        enqueue(payload, user_id)
+        st.info("📥 El servidor no responde: el comentario quedó pendiente y se enviará automáticamente.")
         return True
     except Exception as e:
         st.error(f"No se pudo guardar el comentario: {e}")
@@ -194,7 +204,7 @@ with col_send:
         payload = {
             "product_id": PRODUCT_ID,
             "user_name": user_name,
-            "rating": float(avg_score),
+            "rating": int(round(avg_score)),
             "criteria": {k: int(st.session_state[f"rating_{k}"]) for k, _ in criteria},
             "comment": comment.strip(),
         }
@@ -228,17 +238,12 @@ def api_get_comments(pid: str):
     return None
 
 comments = api_get_comments(PRODUCT_ID)
-
+# lo que todavía está en el outbox local (consulta indexada por producto)
+pending_local = local_comments(PRODUCT_ID)
 if comments is None:
-    # fallback CSV
-    if DATA_PATH.exists():
-        try:
-            df = pd.read_csv(DATA_PATH)
-            comments = df[df["product_id"].astype(str) == PRODUCT_ID].to_dict("records")
-        except Exception:
-            comments = []
-    else:
-        comments = []
+    comments = pending_local
+else:
+    comments = [c for c in pending_local if c.get("pending")] + comments
 
 st.markdown("### 📖 COMENTARIOS DEL PRODUCTO")
 if not comments:
@@ -250,7 +255,7 @@ else:
     comments = sorted(comments, key=_date_key, reverse=True)
 
     for c in comments[:50]:
-        uname = c.get("user_name", "Anónimo")
+        uname = c.get("user_name", "Anónimo") + (" · ⏳ pendiente de envío" if c.get("pending") else "")
         rating = c.get("rating", "-")
         text = c.get("comment", "")
         date = c.get("date") or c.get("created_at") or ""
@@ -7,18 +7,18 @@ from pathlib import Path
 import streamlit as st
 
 from auth_helpers import get_backend_url, auth_headers  # 👈 NO importamos require_login
+from comments_outbox import import_legacy_csv, local_comments
 
 # ✅ set_page_config primero
 st.set_page_config(page_title="Ver comentarios", page_icon="📖", layout="centered")
 
 BACKEND_URL = get_backend_url()
-DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "comments.csv"
-DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 PAGE_SELLER_PANEL = "2_Vendedor.py"
 PAGE_MIS_PRODUCTOS = "7_Mis_Productos.py"
 
 PAGE_NS = "ver_comments_v1"
+COMMENTS_PAGE_SIZE = 20
 def K(s: str) -> str:
     return f"{PAGE_NS}:{s}"
 
@@ -103,66 +103,63 @@ def fetch_product(product_id: str) -> dict | None:
         pass
     return None
 
-def load_comments(product_id: str) -> list[dict]:
+def load_comments(product_id: str, cursor: str | None = None) -> tuple[list[dict] | None, str | None]:
     """
-    1) /products/{id}/comments (si existe)
-    2) /comments?product_id={id}
-    3) fallback CSV
+    Una página de /products/{id}/comments (más nuevos primero).
+    Devuelve (comentarios, cursor_siguiente); (None, None) si el backend no responde.
     """
-    # 1) endpoint anidado
+    params = {"limit": COMMENTS_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
     try:
         r = requests.get(
             f"{BACKEND_URL}/products/{product_id}/comments",
+            params=params,
             headers=maybe_headers(),
             timeout=8
         )
         if r.status_code == 200:
             data = normalize_list(r.json())
-            return _normalize_comments(data)
+            return _normalize_comments(data), r.headers.get("X-Next-Cursor")
     except Exception:
         pass
+    return None, None
 
-    # 2) endpoint plano
+def load_summary(product_id: str) -> dict | None:
+    """Cantidad / promedio / histograma calculados en el backend."""
     try:
         r = requests.get(
-            f"{BACKEND_URL}/comments",
-            params={"product_id": product_id},
+            f"{BACKEND_URL}/products/{product_id}/comments/summary",
             headers=maybe_headers(),
             timeout=8
         )
         if r.status_code == 200:
-            data = normalize_list(r.json())
-            return _normalize_comments(data)
+            return r.json()
     except Exception:
         pass
+    return None
 
-    # 3) Fallback CSV
-    if DATA_PATH.exists():
-        try:
-            df = pd.read_csv(DATA_PATH)
-            df = df[df["product_id"].astype(str) == str(product_id)]
-            reviews = []
-            for _, row in df.iterrows():
-                crit_raw = row.get("criteria", "{}")
+def load_local_comments(product_id: str) -> list[dict]:
+    """Fallback si el backend no responde: outbox local, indexado por producto."""
+    reviews = []
+    for c in local_comments(product_id):
+        crit_raw = c.get("criteria") or {}
+        if isinstance(crit_raw, str):
+            try:
+                crit_raw = literal_eval(crit_raw)
+            except Exception:
                 try:
-                    criteria = literal_eval(crit_raw)
+                    crit_raw = json.loads(crit_raw)
                 except Exception:
-                    try:
-                        criteria = json.loads(crit_raw)
-                    except Exception:
-                        criteria = {}
-                reviews.append({
-                    "user": row.get("user_name", "Anónimo"),
-                    "rating": float(row.get("rating", 0.0)),
-                    "comment": row.get("comment", ""),
-                    "date": row.get("date", ""),
-                    "criteria": criteria,
-                })
-            return reviews
-        except Exception as e:
-            st.warning(f"No se pudo leer comments.csv: {e}")
-
-    return []
+                    crit_raw = {}
+        reviews.append({
+            "user": c.get("user_name") or "Anónimo",
+            "rating": float(c.get("rating", 0.0) or 0.0),
+            "comment": c.get("comment", ""),
+            "date": c.get("date", ""),
+            "criteria": crit_raw,
+        })
+    return reviews
 
 def _normalize_comments(data: list[dict]) -> list[dict]:
     normalized = []
@@ -245,13 +242,36 @@ with c2:
         )
 
 # ----------------- Datos -----------------
-reviews = load_comments(PRODUCT_ID)
-
-if reviews:
+import_legacy_csv()  # una sola vez: el comments.csv viejo pasa al outbox
+# la primera página se pide en cada corrida (el backend la cachea), así un
+# comentario nuevo aparece; en session_state solo quedan las páginas extra
+# de "Cargar más", que siguen a la primera mientras su cursor no cambie
+first, first_cursor = load_comments(PRODUCT_ID)
+if first is None:
+    first, first_cursor = load_local_comments(PRODUCT_ID), None
+
+state_key = K(f"more:{PRODUCT_ID}")
+extra = st.session_state.get(state_key)
+if extra is None or extra["after"] != first_cursor:
+    extra = st.session_state[state_key] = {"after": first_cursor, "reviews": [], "cursor": first_cursor}
+
+reviews = first + extra["reviews"]
+summary = load_summary(PRODUCT_ID)
+
+if summary and summary.get("count"):
+    st.markdown(
+        f"<span class='badge'>📊 PUNTUACIÓN PROMEDIO: {summary['avg']}/10 · {summary['count']} VALORACIONES</span>",
+        unsafe_allow_html=True
+    )
+    hist = summary.get("histogram") or {}
+    st.bar_chart(pd.DataFrame(
+        {"valoraciones": [hist.get(str(i), 0) for i in range(1, 11)]},
+        index=[str(i) for i in range(1, 11)],
+    ))
+elif reviews:
     avg_rating = round(sum(r["rating"] for r in reviews) / len(reviews), 1)
-    total_reviews = len(reviews)
     st.markdown(
-        f"<span class='badge'>📊 PUNTUACIÓN PROMEDIO: {avg_rating}/10 · {total_reviews} VALORACIONES</span>",
+        f"<span class='badge'>📊 PUNTUACIÓN PROMEDIO: {avg_rating}/10 · {len(reviews)} VALORACIONES</span>",
         unsafe_allow_html=True
     )
 else:
@@ -299,6 +319,16 @@ else:
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+if extra["cursor"]:
+    if st.button("⬇️ CARGAR MÁS", key=K("btn_more"), use_container_width=True):
+        more, next_cursor = load_comments(PRODUCT_ID, extra["cursor"])
+        if more is None:
+            st.warning("No se pudieron traer más comentarios.")
+        else:
+            extra["reviews"].extend(more)
+            extra["cursor"] = next_cursor
+            st.rerun()
+
 # ----------------- Volver -----------------
 st.write("")
 if st.button("⬅️ VOLVER", key=K("btn_back"), use_container_width=True):
@@ -3,7 +3,7 @@ import streamlit as st
 import requests
 from pathlib import Path
 
-from auth_helpers import get_backend_url, require_login, auth_headers
+from auth_helpers import get_backend_url, require_login, auth_headers, remember_write, thumb_url
 
 # ⚠️ set_page_config SIEMPRE primero
 st.set_page_config(page_title="Mis Productos (Vendedor)", page_icon="📦", layout="centered")
@@ -112,23 +112,41 @@ def fetch_my_products():
 
 def update_product(pid: str, payload: dict):
     try:
-        return requests.put(
+        r = requests.put(
             f"{BACKEND_URL}/products/{pid}",
             json=payload,
             headers=auth_headers(),
             timeout=12
         )
+        remember_write(r)
+        return r
     except Exception as e:
         st.error(f"Error PUT producto: {e}")
         return None
 
+def bulk_patch(items: list):
+    try:
+        r = requests.patch(
+            f"{BACKEND_URL}/products/bulk",
+            json={"items": items},
+            headers=auth_headers(),
+            timeout=20
+        )
+        remember_write(r)
+        return r
+    except Exception as e:
+        st.error(f"Error PATCH /products/bulk: {e}")
+        return None
+
 def delete_product(pid: str):
     try:
-        return requests.delete(
+        r = requests.delete(
             f"{BACKEND_URL}/products/{pid}",
             headers=auth_headers(),
             timeout=12
         )
+        remember_write(r)
+        return r
     except Exception as e:
         st.error(f"Error DELETE producto: {e}")
         return None
@@ -156,6 +174,51 @@ if not products:
         safe_switch_page(PAGE_CREATE)
     st.stop()
 
+# ---------------------------
+# EDICIÓN EN LOTE (precio / stock / activo)
+# ---------------------------
+with st.expander("📝 Editar precio, stock y estado en lote", expanded=False):
+    base_rows = [
+        {
+            "id": p.get("id"),
+            "Producto": p.get("name", "(sin nombre)"),
+            "Precio": int(p.get("price") or 0),
+            "Stock": int(p.get("stock") or 0),
+            "Activo": bool(p.get("is_active", True)),
+            "version": p.get("version"),
+        }
+        for p in products
+    ]
+    edited = st.data_editor(
+        base_rows,
+        key=K("bulk_editor"),
+        disabled=["id", "Producto", "version"],
+        column_config={"id": None, "version": None},
+        use_container_width=True,
+        hide_index=True,
+    )
+    if st.button("💾 Guardar cambios del lote", key=K("bulk_save"), use_container_width=True):
+        items = []
+        for before, after in zip(base_rows, edited):
+            changes = {
+                field: after[col]
+                for col, field in (("Precio", "price"), ("Stock", "stock"), ("Activo", "is_active"))
+                if after[col] != before[col]
+            }
+            if changes:
+                items.append({"id": before["id"], "version": before["version"], **changes})
+        if not items:
+            st.info("No hay cambios para guardar.")
+        else:
+            r = bulk_patch(items)
+            if r is not None and r.status_code == 200:
+                st.success(f"✅ {len(items)} producto(s) actualizados.")
+                st.rerun()
+            elif r is not None and r.status_code == 409:
+                st.warning("Algún producto cambió mientras editabas: recargá la página y volvé a intentar. No se guardó nada.")
+            elif r is not None:
+                st.error(f"❌ No se pudo guardar el lote ({r.status_code}): {r.text}")
+
 # ---------------------------
 # LISTADO
 # ---------------------------
@@ -188,7 +251,7 @@ for p in products:
     with c2:
         if img:
             try:
-                st.image(img, use_container_width=True)
+                st.image(thumb_url(img, 160), use_container_width=True)
             except Exception:
                 st.write("📸")
         else:
@@ -3,7 +3,7 @@ import streamlit as st
 import requests
 from pathlib import Path
 
-from auth_helpers import get_backend_url, require_login, auth_headers
+from auth_helpers import get_backend_url, require_login, auth_headers, remember_write
 
 # ⚠️ set_page_config SIEMPRE primero
 st.set_page_config(page_title="Crear Producto (Vendedor)", page_icon="➕", layout="centered")
@@ -80,11 +80,31 @@ def create_product(payload: dict):
             headers=auth_headers(),
             timeout=12
         )
+        remember_write(r)
         return r
     except Exception as e:
         st.error(f"Error POST producto: {e}")
         return None
 
+def import_products(uploaded) -> requests.Response | None:
+    # el archivo se manda como body (file-like): requests lo envía por chunks
+    is_csv = uploaded.name.lower().endswith(".csv")
+    try:
+        r = requests.post(
+            f"{BACKEND_URL}/products/import",
+            data=uploaded,
+            headers={
+                **auth_headers(),
+                "Content-Type": "text/csv" if is_csv else "application/x-ndjson",
+            },
+            timeout=300,
+        )
+        remember_write(r)
+        return r
+    except Exception as e:
+        st.error(f"Error en la carga masiva: {e}")
+        return None
+
 # ---------------------------
 # UI
 # ---------------------------
@@ -184,6 +204,34 @@ if submit:
         st.error(f"❌ No se pudo crear (HTTP {r.status_code}).")
         st.text(r.text)
 
+st.markdown("---")
+st.markdown("## 📥 Carga masiva (CSV / NDJSON)")
+st.caption(
+    "Una fila por producto con `sku` propio: si el SKU ya existe se actualiza. "
+    "CSV con encabezado (sku,name,price,stock,condition,description,subcategory,image_url,images); "
+    "en `images` separá las URLs con |."
+)
+uploaded = st.file_uploader("Archivo", type=["csv", "ndjson", "jsonl"], key=K("bulk_file"))
+if uploaded is not None and st.button("⬆️ Importar", use_container_width=True, key=K("bulk_go")):
+    with st.spinner("Importando..."):
+        r = import_products(uploaded)
+    if r is not None and r.status_code == 200:
+        rep = r.json()
+        st.success(
+            f"{rep['rows']} filas: {rep['created']} creados, {rep['updated']} actualizados, "
+            f"{rep['failed']} con error."
+        )
+        if rep["errors"]:
+            st.dataframe(
+                [{"fila": e["row"], "sku": e["sku"], "error": "; ".join(e["errors"])} for e in rep["errors"]],
+                use_container_width=True,
+            )
+            if rep.get("errors_truncated"):
+                st.caption("Se muestran los primeros errores.")
+    elif r is not None:
+        st.error(f"❌ No se pudo importar (HTTP {r.status_code}).")
+        st.text(r.text)
+
 st.markdown("---")
 if st.button("📦 Ir a Mis Productos", use_container_width=True, key=K("go_my_products")):
     safe_switch_page(PAGE_MY_PRODUCTS)
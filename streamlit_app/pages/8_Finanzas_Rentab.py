@@ -4,7 +4,7 @@ import requests
 from datetime import date, timedelta
 from pathlib import Path
 
-from auth_helpers import get_backend_url, require_login, auth_headers
+from auth_helpers import get_backend_url, require_login, auth_headers, api_get_many
 
 st.set_page_config(page_title="Finanzas y Rentabilidad", page_icon="💰", layout="wide")
 
@@ -86,32 +86,60 @@ params = {
 # =======================
 # HELPERS ✅ ahora manda token
 # =======================
-def api_get(path: str, extra_params: dict | None = None):
+def api_result(res):
+    """Interpreta el resultado de api_get_many (Response o Exception)."""
+    if isinstance(res, Exception):
+        st.error(f"No se pudo conectar al backend: {res}")
+        return None
+    if res.status_code == 200:
+        return res.json()
+    st.error(f"Error {res.status_code}: {res.text}")
+    return None
+
+
+def fetch_widgets():
+    # 1) Un solo round trip: /analytics/batch calcula todo con un scan.
     try:
-        p = dict(params)
-        if extra_params:
-            p.update(extra_params)
-
-        res = requests.get(
-            f"{BACKEND_URL}{path}",
-            params=p,
-            headers=auth_headers(),  # ✅ CLAVE: mandar token
-            timeout=10
+        r = requests.post(
+            f"{BACKEND_URL}/analytics/batch",
+            json={
+                **params,
+                "widgets": [
+                    {"type": "summary"},
+                    {"type": "daily"},
+                    {"type": "category_margins", "key": "margins"},
+                    {"type": "top_products", "key": "top", "top": top_n},
+                    {"type": "operations", "key": "ops"},
+                ],
+            },
+            headers=auth_headers(),
+            timeout=15,
         )
-        if res.status_code == 200:
-            return res.json()
-        st.error(f"Error {res.status_code}: {res.text}")
-        return None
-    except Exception as e:
-        st.error(f"No se pudo conectar al backend: {e}")
-        return None
+        if r.status_code == 200:
+            return r.json()
+    except Exception:
+        pass
+
+    # 2) Backend sin /batch: mismos params, GETs en paralelo
+    # (la página tarda lo que la llamada más lenta, no la suma).
+    results = api_get_many({
+        "summary": ("/analytics/sales-summary", params),
+        "daily": ("/analytics/sales-daily", {**params, "incremental": True}),
+        "margins": ("/analytics/category-margins", params),
+        "top": ("/analytics/top-products", {**params, "top": top_n}),
+        "ops": ("/analytics/operations", params),
+    })
+    return {k: api_result(v) for k, v in results.items()}
+
+
+widgets = fetch_widgets()
 
 # =======================
 # 1) KPIs
 # =======================
 st.subheader("📊 KPIs Financieros")
 
-summary = api_get("/analytics/sales-summary") or {
+summary = widgets["summary"] or {
     "total_sales": 0,
     "total_margin": 0,
     "ticket_avg": 0,
@@ -144,7 +172,7 @@ st.divider()
 # =======================
 st.subheader("📈 Evolución diaria de ventas")
 
-daily = api_get("/analytics/sales-daily")
+daily = widgets["daily"]
 if daily:
     df_daily = pd.DataFrame(daily)
     st.line_chart(df_daily, x="date", y="total")
@@ -158,7 +186,7 @@ col1, col2 = st.columns(2)
 # =======================
 with col1:
     st.subheader("📦 Margen por categoría")
-    margins = api_get("/analytics/category-margins")
+    margins = widgets["margins"]
     if margins:
         df_margins = pd.DataFrame(margins)
         st.bar_chart(df_margins, x="category", y="margin")
@@ -170,7 +198,7 @@ with col1:
 # =======================
 with col2:
     st.subheader("🏆 Top productos por ventas")
-    top = api_get("/analytics/top-products", {"top": top_n})
+    top = widgets["top"]
     if top:
         df_top = pd.DataFrame(top)
         st.bar_chart(df_top, x="product", y="sales")
@@ -183,7 +211,7 @@ st.divider()
 # 5) Operaciones
 # =======================
 st.subheader("🧾 Detalle de operaciones")
-ops = api_get("/analytics/operations")
+ops = widgets["ops"]
 
 if ops:
     df_ops = pd.DataFrame(ops)
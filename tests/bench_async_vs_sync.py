@@ -0,0 +1,112 @@
+# tests/bench_async_vs_sync.py
+"""
+Benchmark de carga: handler sync (threadpool + Session) vs async (AsyncSession).
+
+Arma una app con la misma query de /products en dos versiones y le pega
+con N requests concurrentes (httpx + ASGI, en el mismo proceso).
+Con MariaDB se ve la diferencia real: los handlers sync hacen cola por
+threads del pool de Starlette (~40), los async solo por conexiones.
+
+Uso (desde la raíz del repo):
+    DATABASE_URL=mysql+pymysql://... python -m tests.bench_async_vs_sync
+    python -m tests.bench_async_vs_sync --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from backend.app.db import get_async_db
+from backend.app.deps import get_db
+from backend.app.models.models import Product
+
+
+def _query(limit: int):
+    return (
+        select(Product)
+        .where(Product.is_active == True)
+        .options(selectinload(Product.images), selectinload(Product.seller))
+        .order_by(Product.created_at.desc())
+        .limit(limit)
+    )
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/products")
+    def sync_products(limit: int = 20, db: Session = Depends(get_db)):
+        return [p.id for p in db.scalars(_query(limit)).all()]
+
+    @app.get("/async/products")
+    async def async_products(limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+        return [p.id for p in (await db.scalars(_query(limit))).all()]
+
+    return app
+
+
+async def run_load(app: FastAPI, path: str, total: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one():
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code != 200:
+                    errors += 1
+
+        # calentamiento (conexiones del pool, engine async)
+        await asyncio.gather(*(one() for _ in range(min(concurrency, total))))
+        latencies.clear()
+        errors = 0
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - t0
+
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "path": path,
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed,
+        "p50_ms": q[49] * 1000,
+        "p95_ms": q[94] * 1000,
+        "p99_ms": q[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    async def run_all():
+        # un solo event loop: las conexiones async quedan atadas a su loop
+        app = build_app()
+        for path in ("/sync/products", "/async/products"):
+            res = await run_load(app, path, args.requests, args.concurrency)
+            print(
+                f"{res['path']:<18} rps={res['rps']:8.1f}  p50={res['p50_ms']:7.1f}ms  "
+                f"p95={res['p95_ms']:7.1f}ms  p99={res['p99_ms']:7.1f}ms  errors={res['errors']}"
+            )
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
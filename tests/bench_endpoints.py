@@ -0,0 +1,243 @@
+# tests/bench_endpoints.py
+"""
+Benchmarks (pytest-benchmark) de los endpoints calientes sobre datos sintéticos.
+
+Cada escala es una base SQLite propia, migrada con alembic y cargada con
+backend.app.seed_synthetic_data; se genera una vez y se reutiliza
+(BENCH_DATA_DIR, default <tmp>/mktlab_bench). El engine de la app se arma
+al importar backend.app.db, así que este archivo corre solo y en su propio
+proceso (no empieza con test_: el `pytest` normal no lo junta).
+
+Uso (desde la raíz del repo):
+    pip install pytest-benchmark
+    python -m tests.bench_endpoints                          # 10k order items
+    python -m tests.bench_endpoints --scales 10000,100000,1000000
+    BENCH_ORDER_ITEMS=100000 python -m pytest tests/bench_endpoints.py --benchmark-only
+
+Con --save cada escala queda en .benchmarks/ y se compara con
+    pytest-benchmark compare
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SCALE = int(os.getenv("BENCH_ORDER_ITEMS", "10000"))
+BENCH_DIR = Path(os.getenv("BENCH_DATA_DIR", Path(tempfile.gettempdir()) / "mktlab_bench"))
+DB_PATH = BENCH_DIR / f"bench_{SCALE}.sqlite3"
+
+if __name__ != "__main__":
+    pytest.importorskip("pytest_benchmark")
+    if "backend.app.db" in sys.modules:
+        pytest.skip(
+            "bench_endpoints necesita su propio proceso (el engine ya apunta a otra base)",
+            allow_module_level=True,
+        )
+    os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{DB_PATH}"
+    os.environ.pop("DATABASE_URL_READ", None)
+
+
+# ============================
+# Datos
+# ============================
+@pytest.fixture(scope="module")
+def data() -> dict:
+    from backend.app.db import engine
+    from backend.app.seed_synthetic_data import prepare_database
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    summary = prepare_database(engine, SCALE, DB_PATH.with_suffix(".json"))
+    print(f"\nbase sintética {DB_PATH}: {summary['counts']}")
+    return summary
+
+
+@pytest.fixture(scope="module")
+def client(data):
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def _login(client, email: str, password: str) -> dict:
+    r = client.post("/auth/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture(scope="module")
+def seller(client, data):
+    return _login(client, data["seller_emails"][0], data["password"])
+
+
+@pytest.fixture(scope="module")
+def buyer(client, data):
+    return _login(client, data["buyer_emails"][0], data["password"])
+
+
+@pytest.fixture(scope="module")
+def admin(client, data):
+    return _login(client, data["admin_email"], data["password"])
+
+
+def _get(client, path: str, headers: dict | None = None, **params):
+    r = client.get(path, params=params or None, headers=headers)
+    assert r.status_code == 200, f"{path}: {r.status_code} {r.text[:200]}"
+    return r
+
+
+END = date.today()
+START = END - timedelta(days=90)
+RANGE = {"start": START.isoformat(), "end": END.isoformat()}
+
+
+# ============================
+# Catálogo
+# ============================
+@pytest.mark.benchmark(group="catalog")
+def test_catalog_list(benchmark, client):
+    benchmark(_get, client, "/products", limit=20)
+
+
+@pytest.mark.benchmark(group="catalog")
+def test_catalog_search(benchmark, client):
+    benchmark(_get, client, "/products", q="Zapatillas", limit=20)
+
+
+@pytest.mark.benchmark(group="catalog")
+def test_product_detail(benchmark, client, data):
+    benchmark(_get, client, f"/products/{data['product_ids'][0]}")
+
+
+# ============================
+# Checkout
+# ============================
+@pytest.mark.benchmark(group="checkout")
+def test_checkout(benchmark, client, buyer, data):
+    from backend.app.db import SessionLocal
+    from backend.app.models.models import Cart, CartItem, Product, User
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter_by(email=data["buyer_emails"][0]).one()
+        product = db.get(Product, data["product_ids"][0])
+        cart = db.query(Cart).filter_by(user_id=user.id).first() or Cart(user_id=user.id)
+        db.add(cart)
+        db.commit()
+        item = dict(
+            cart_id=cart.id, product_id=product.id, name=product.name, price=product.price,
+            qty=1, image="", seller=product.seller_id, stock_snapshot=product.stock,
+        )
+    finally:
+        db.close()
+
+    def fill_cart():
+        s = SessionLocal()
+        try:
+            s.add(CartItem(**item))
+            s.commit()
+        finally:
+            s.close()
+
+    def checkout():
+        r = client.post("/orders/checkout", headers=buyer)
+        assert r.status_code == 201, r.text
+
+    benchmark.pedantic(checkout, setup=fill_cart, rounds=30)
+
+
+# ============================
+# Órdenes
+# ============================
+@pytest.mark.benchmark(group="orders")
+def test_orders_buyer_history(benchmark, client, buyer):
+    benchmark(_get, client, "/orders", buyer)
+
+
+@pytest.mark.benchmark(group="orders")
+def test_orders_seller(benchmark, client, seller):
+    benchmark(_get, client, "/orders/seller", seller)
+
+
+@pytest.mark.benchmark(group="orders")
+def test_admin_orders(benchmark, client, admin):
+    benchmark(_get, client, "/admin/orders", admin, from_date=START.isoformat(), to_date=END.isoformat())
+
+
+# ============================
+# Analytics
+# ============================
+@pytest.mark.benchmark(group="dashboards")
+def test_seller_dashboard(benchmark, client, seller):
+    benchmark(_get, client, "/analytics/seller/dashboard", seller)
+
+
+@pytest.mark.benchmark(group="dashboards")
+def test_buyer_dashboard(benchmark, client, buyer):
+    benchmark(_get, client, "/analytics/buyer/dashboard", buyer)
+
+
+@pytest.mark.benchmark(group="analytics")
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/analytics/global", {}),
+        ("/analytics/orders", {"from": START.isoformat(), "to": END.isoformat()}),
+        ("/analytics/sales-summary", RANGE),
+        ("/analytics/sales-daily", RANGE),
+        ("/analytics/sales-daily", {**RANGE, "incremental": "true"}),
+        ("/analytics/category-margins", RANGE),
+        ("/analytics/top-products", RANGE),
+        ("/analytics/operations", RANGE),
+    ],
+)
+def test_analytics(benchmark, client, seller, path, params):
+    benchmark(_get, client, path, seller, **params)
+
+
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_batch(benchmark, client, seller):
+    payload = {
+        **RANGE,
+        "widgets": [{"type": t} for t in ("summary", "daily", "category_margins", "top_products", "operations")],
+    }
+
+    def batch():
+        r = client.post("/analytics/batch", json=payload, headers=seller)
+        assert r.status_code == 200, r.text
+
+    benchmark(batch)
+
+
+# ============================
+# Runner: una escala por proceso
+# ============================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10000", help="order items por escala, separadas por coma")
+    parser.add_argument("--save", action="store_true", help="guardar resultados en .benchmarks/")
+    args, extra = parser.parse_known_args()
+
+    rc = 0
+    for scale in (int(s) for s in args.scales.split(",") if s.strip()):
+        print(f"\n===== {scale:,} order items =====", flush=True)
+        cmd = [sys.executable, "-m", "pytest", __file__, "-q", "--benchmark-only",
+               "--benchmark-columns=min,median,mean,max,ops,rounds"]
+        if args.save:
+            cmd.append(f"--benchmark-save=items_{scale}")
+        env = {**os.environ, "BENCH_ORDER_ITEMS": str(scale)}
+        rc = subprocess.call(cmd + extra, cwd=ROOT, env=env) or rc
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
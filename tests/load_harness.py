@@ -0,0 +1,278 @@
+# tests/load_harness.py
+"""
+Prueba de carga: recorridos de usuario como los de las páginas de Streamlit.
+
+Levanta la app en un uvicorn dentro del mismo proceso (hilo aparte) sobre
+una base SQLite sintética (backend.app.seed_synthetic_data) y le pega con
+usuarios virtuales concurrentes (asyncio + httpx), cada uno repitiendo su
+recorrido hasta que se termina el tiempo:
+
+  comprador: Login -> Home -> Producto (detalle + comentarios) ->
+             agregar al carrito -> Checkout -> Historial de compras
+  vendedor:  Login -> Vendedor (sus productos y órdenes) -> Finanzas (batch)
+
+Al final imprime p50/p95/p99 y requests/s por endpoint, más el throughput
+total. Con --json se guarda el reporte para comparar corridas; con
+--max-p95-ms el proceso sale con error si algún endpoint se pasa.
+
+Uso (desde la raíz del repo):
+    python -m tests.load_harness --users 50 --duration 30
+    python -m tests.load_harness --order-items 100000 --json load.json
+    python -m tests.load_harness --url http://127.0.0.1:8000   # server ya levantado
+
+Cliente y server comparten proceso (y GIL): para el techo real de
+producción, levantar uvicorn con --workers contra MariaDB y usar --url.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+DATA_DIR = Path(os.getenv("LOAD_DATA_DIR", Path(tempfile.gettempdir()) / "mktlab_load"))
+
+
+# ============================
+# Medición
+# ============================
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.journeys = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, ok=(200,), **kw):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kw)
+        except httpx.HTTPError:
+            self.latencies[label].append(time.perf_counter() - t0)
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - t0)
+        if r.status_code not in ok:
+            self.errors[label] += 1
+            return None
+        return r
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, lat in sorted(self.latencies.items()):
+            q = statistics.quantiles(lat, n=100) if len(lat) > 1 else [lat[0]] * 99
+            endpoints[label] = {
+                "requests": len(lat),
+                "errors": self.errors[label],
+                "rps": round(len(lat) / elapsed, 1),
+                "p50_ms": round(q[49] * 1000, 1),
+                "p95_ms": round(q[94] * 1000, 1),
+                "p99_ms": round(q[98] * 1000, 1),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "seconds": round(elapsed, 1),
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(total / elapsed, 1),
+            "journeys": dict(self.journeys),
+            "endpoints": endpoints,
+        }
+
+
+# ============================
+# Recorridos
+# ============================
+async def login(rec: Recorder, client: httpx.AsyncClient, email: str, password: str):
+    r = await rec.call(client, "POST /auth/login", "POST", "/auth/login",
+                       json={"email": email, "password": password})
+    if r is None:
+        return None, None
+    data = r.json()
+    user = data.get("user") or data
+    return {"Authorization": f"Bearer {data['access_token']}"}, user.get("id") or user.get("user_id")
+
+
+async def buyer_journey(rec: Recorder, client: httpx.AsyncClient, email: str, password: str, rnd: random.Random):
+    headers, _ = await login(rec, client, email, password)
+    if headers is None:
+        return
+
+    # Home: catálogo
+    r = await rec.call(client, "GET /products", "GET", "/products", params={"limit": 100})
+    products = r.json() if r is not None else []
+    if not products:
+        return
+
+    # Producto: detalle + comentarios
+    pid = rnd.choice(products)["id"]
+    await rec.call(client, "GET /products/{id}", "GET", f"/products/{pid}")
+    await rec.call(client, "GET /products/{id}/comments/summary", "GET", f"/products/{pid}/comments/summary")
+    await rec.call(client, "GET /products/{id}/comments", "GET", f"/products/{pid}/comments")
+
+    # Carrito -> Checkout
+    added = await rec.call(client, "POST /cart/items", "POST", "/cart/items", ok=(201,),
+                           json={"product_id": pid, "qty": 1}, headers=headers)
+    await rec.call(client, "GET /cart", "GET", "/cart", headers=headers)
+    if added is not None:
+        await rec.call(client, "POST /orders/checkout", "POST", "/orders/checkout", ok=(201,), headers=headers)
+
+    # Historial de compras
+    await rec.call(client, "GET /orders", "GET", "/orders", headers=headers)
+    rec.journeys["buyer"] += 1
+
+
+async def seller_journey(rec: Recorder, client: httpx.AsyncClient, email: str, password: str, rnd: random.Random):
+    headers, seller_id = await login(rec, client, email, password)
+    if headers is None:
+        return
+
+    # Vendedor: sus productos y órdenes
+    await rec.call(client, "GET /products?seller_id", "GET", "/products",
+                   params={"seller_id": seller_id, "limit": 200}, headers=headers)
+    await rec.call(client, "GET /orders/seller", "GET", "/orders/seller", headers=headers)
+
+    # Finanzas: todos los widgets en un round trip
+    end = date.today()
+    start = end - timedelta(days=rnd.choice((30, 90, 180)))
+    await rec.call(client, "POST /analytics/batch", "POST", "/analytics/batch", headers=headers, json={
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "widgets": [
+            {"type": "summary"},
+            {"type": "daily"},
+            {"type": "category_margins", "key": "margins"},
+            {"type": "top_products", "key": "top"},
+            {"type": "operations"},
+        ],
+    })
+    rec.journeys["seller"] += 1
+
+
+async def run_load(base_url: str, data: dict, users: int, duration: float, seller_ratio: float, seed: int) -> dict:
+    rec = Recorder()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+
+        async def virtual_user(i: int):
+            rnd = random.Random(seed + i)
+            is_seller = i < round(users * seller_ratio)
+            pool = data["seller_emails"] if is_seller else data["buyer_emails"]
+            email = pool[i % len(pool)]
+            journey = seller_journey if is_seller else buyer_journey
+            while time.perf_counter() < deadline:
+                await journey(rec, client, email, data["password"], rnd)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(virtual_user(i) for i in range(users)))
+        elapsed = time.perf_counter() - t0
+
+    return rec.report(elapsed)
+
+
+# ============================
+# Server en proceso
+# ============================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn no arrancó")
+        time.sleep(0.05)
+    return server, thread
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'endpoint':<38} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, e in report["endpoints"].items():
+        print(
+            f"{label:<38} {e['requests']:>7} {e['errors']:>5} {e['rps']:>8.1f} "
+            f"{e['p50_ms']:>6.1f}ms {e['p95_ms']:>6.1f}ms {e['p99_ms']:>6.1f}ms"
+        )
+    print(
+        f"\ntotal: {report['requests']} requests en {report['seconds']}s = {report['rps']} req/s, "
+        f"{report['errors']} errores, recorridos {report['journeys']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=20, help="segundos de carga")
+    parser.add_argument("--seller-ratio", type=float, default=0.2, help="fracción de vendedores")
+    parser.add_argument("--order-items", type=int, default=10_000, help="volumen de la base sintética")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--url", help="pegarle a un server ya levantado (con su base ya cargada)")
+    parser.add_argument("--data", help="JSON de prepare_database con los usuarios (con --url)")
+    parser.add_argument("--json", help="guardar el reporte en este archivo")
+    parser.add_argument("--max-p95-ms", type=float, help="salir con error si algún p95 lo supera")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        if not args.data:
+            parser.error("--url necesita --data (el JSON de usuarios de la base sintética)")
+        base_url = args.url
+        data = json.loads(Path(args.data).read_text())
+    else:
+        db_path = DATA_DIR / f"load_{args.order_items}.sqlite3"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        os.environ.pop("DATABASE_URL_READ", None)
+
+        from backend.app.db import engine
+        from backend.app.seed_synthetic_data import prepare_database
+
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        data = prepare_database(engine, args.order_items, db_path.with_suffix(".json"))
+        print(f"base sintética {db_path}: {data['counts']}")
+
+        from backend.app.main import app
+
+        port = _free_port()
+        server, thread = start_server(app, port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    print(f"carga: {args.users} usuarios x {args.duration}s contra {base_url}", flush=True)
+    try:
+        report = asyncio.run(
+            run_load(base_url, data, args.users, args.duration, args.seller_ratio, args.seed)
+        )
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    if args.max_p95_ms is not None:
+        slow = {k: e["p95_ms"] for k, e in report["endpoints"].items() if e["p95_ms"] > args.max_p95_ms}
+        if slow:
+            print(f"\np95 por encima de {args.max_p95_ms}ms: {slow}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# tests/test_admin.py
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app.main import app
+from backend.app.db import SessionLocal, engine, slow_queries
+from backend.app.models.models import User, Role, UserRole, Order, Payment
+from backend.app.security import hash_password
+
+client = TestClient(app)
+
+EMAIL = "admin_panel_test@mktlab.com"
+PASSWORD = "AdminPanel123!"
+# día fijo lejano para no mezclarse con órdenes de otros tests
+DIA = date(2001, 1, 15)
+
+
+def crear_admin_de_prueba() -> str:
+    """
+    Crea (o recrea) un usuario ADMIN y devuelve su id.
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(User).filter_by(email=EMAIL).first()
+        if existing:
+            db.delete(existing)
+            db.commit()
+
+        role = db.query(Role).filter_by(code="ADMIN").first()
+        if not role:
+            role = Role(code="ADMIN", nombre="Administrador")
+            db.add(role)
+            db.flush()
+
+        u = User(
+            nombre="Admin",
+            apellido="Panel",
+            tipo_doc="DNI",
+            nro_doc="99999996",
+            email=EMAIL,
+            tel="555",
+            palabra_seg="gato",
+            password_hash=hash_password(PASSWORD),
+            acepta_terminos=True,
+        )
+        db.add(u)
+        db.flush()
+        db.add(UserRole(user_id=u.id, role_id=role.id))
+        db.commit()
+        return u.id
+    finally:
+        db.close()
+
+
+def crear_ordenes(user_id: str, n: int):
+    """
+    Reemplaza las órdenes de DIA por n órdenes con dos pagos cada una
+    (el más nuevo APROBADO).
+    """
+    db = SessionLocal()
+    try:
+        start = datetime.combine(DIA, datetime.min.time())
+        for o in db.query(Order).filter(
+            Order.created_at >= start, Order.created_at < start + timedelta(days=1)
+        ):
+            db.delete(o)
+
+        for i in range(n):
+            o = Order(
+                user_id=user_id,
+                user_name="Admin Panel",
+                status="Pendiente",
+                created_at=start + timedelta(hours=1, minutes=i),
+                total_amount=100 * (i + 1),
+            )
+            o.payments.append(Payment(status="RECHAZADO", tx_ref=f"old-{i}", created_at=start))
+            o.payments.append(
+                Payment(status="APROBADO", tx_ref=f"new-{i}", created_at=start + timedelta(hours=2))
+            )
+            db.add(o)
+        db.commit()
+    finally:
+        db.close()
+
+
+def admin_headers():
+    resp = client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def count_statements(fn):
+    counter = {"n": 0}
+
+    def _count(*args, **kwargs):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return result, counter["n"]
+
+
+def test_admin_orders_latest_payment_email_and_totals():
+    uid = crear_admin_de_prueba()
+    crear_ordenes(uid, 3)
+    headers = admin_headers()
+    params = {"from_date": DIA.isoformat(), "to_date": DIA.isoformat(), "limit": 2}
+
+    resp = client.get("/admin/orders", params=params, headers=headers)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    assert len(data) == 2
+    assert resp.headers["X-Total-Count"] == "3"
+    assert resp.headers["X-Total-Amount"] == "600"
+    for o in data:
+        assert o["user_email"] == EMAIL
+        assert o["payment_status"] == "APROBADO"
+        assert o["tx_ref"].startswith("new-")
+
+    resp2 = client.get("/admin/orders", params={**params, "offset": 2}, headers=headers)
+    assert len(resp2.json()) == 1
+    assert {o["id"] for o in data}.isdisjoint({o["id"] for o in resp2.json()})
+
+
+def test_admin_orders_constant_queries():
+    """
+    La cantidad de queries no depende de cuántas órdenes haya.
+    """
+    uid = crear_admin_de_prueba()
+    headers = admin_headers()
+    params = {"from_date": DIA.isoformat(), "to_date": DIA.isoformat()}
+
+    crear_ordenes(uid, 2)
+    _, pocos = count_statements(lambda: client.get("/admin/orders", params=params, headers=headers))
+
+    crear_ordenes(uid, 12)
+    resp, muchos = count_statements(lambda: client.get("/admin/orders", params=params, headers=headers))
+
+    assert len(resp.json()) == 12
+    assert muchos == pocos
+
+
+def test_admin_users_keyset_pagination_search_and_count():
+    crear_admin_de_prueba()
+    headers = admin_headers()
+
+    # recorrer todas las páginas con el cursor
+    vistos = []
+    params = {"limit": 2}
+    while True:
+        resp = client.get("/admin/users", params=params, headers=headers)
+        assert resp.status_code == 200, resp.text
+        vistos.extend(u["id"] for u in resp.json())
+        nxt = resp.headers.get("X-Next-Cursor")
+        if not nxt:
+            break
+        params = {"limit": 2, "cursor": nxt}
+
+    assert len(vistos) == len(set(vistos))
+    total = client.get("/admin/users/count", headers=headers).json()["total"]
+    assert len(vistos) == total
+
+    # búsqueda por prefijo de email / nro_doc / apellido
+    for q in ("admin_panel_test", "99999996", "Panel"):
+        resp = client.get("/admin/users", params={"q": q}, headers=headers)
+        assert EMAIL in [u["email"] for u in resp.json()], q
+
+    # los comodines de LIKE se toman literales
+    resp = client.get("/admin/users", params={"q": "%"}, headers=headers)
+    assert resp.json() == []
+    assert client.get("/admin/users/count", params={"q": "Panel"}, headers=headers).json()["total"] >= 1
+
+
+def test_admin_users_invalid_cursor():
+    crear_admin_de_prueba()
+    resp = client.get("/admin/users", params={"cursor": "no-es-un-cursor"}, headers=admin_headers())
+    assert resp.status_code == 400
+
+
+def test_admin_db_pool_metrics():
+    crear_admin_de_prueba()
+    resp = client.get("/admin/db/pool", headers=admin_headers())
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    for key in ("pool_class", "disconnect_mode", "checkouts", "wait_count", "wait_avg_ms", "timeouts"):
+        assert key in data
+    assert data["checkouts"] >= 1
+
+
+def test_admin_slow_queries_route_params_and_explain(monkeypatch):
+    crear_admin_de_prueba()
+    headers = admin_headers()
+    monkeypatch.setattr(slow_queries, "threshold_ms", 0)  # captura todo
+    slow_queries.clear()
+
+    pid = client.get("/products").json()[0]["id"]
+    assert client.get(f"/products/{pid}").status_code == 200
+
+    data = client.get("/admin/db/slow-queries", headers=headers).json()
+    entry = next(e for e in data["items"] if e["route"] == "GET /products/{product_id}")
+    assert entry["statement"].lstrip().upper().startswith("SELECT")
+    assert "str" in str(entry["params"])  # tipos, no valores
+    assert pid not in str(entry["params"])
+
+    plan = client.post(f"/admin/db/slow-queries/{entry['id']}/explain", headers=headers)
+    assert plan.status_code == 200, plan.text
+    assert plan.json()["plan"]
+
+    assert client.post("/admin/db/slow-queries/999999999/explain", headers=headers).status_code == 404
+
+
+def test_slow_query_timing_survives_failed_statements(monkeypatch):
+    """
+    Un statement que falla no deja su inicio colgado en la conexión (que
+    vuelve al pool y vive mucho), y el siguiente se sigue registrando.
+    """
+    monkeypatch.setattr(slow_queries, "threshold_ms", 0)
+    slow_queries.clear()
+    with engine.connect() as conn:
+        for _ in range(3):
+            try:
+                conn.exec_driver_sql("SELECT * FROM tabla_que_no_existe")
+            except Exception:
+                conn.rollback()
+        conn.exec_driver_sql("SELECT 1")
+        assert not conn.info.get("_slow_t0")
+
+    assert [e["statement"] for e in slow_queries.entries()] == ["SELECT 1"]
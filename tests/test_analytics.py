@@ -0,0 +1,205 @@
+# tests/test_analytics.py
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.db import SessionLocal
+from backend.app.models.models import User, Order, OrderItem
+from backend.app.security import hash_password
+
+client = TestClient(app)
+
+EMAIL = "analytics_test@mktlab.com"
+PASSWORD = "Analytics123!"
+
+
+def crear_usuario_analytics():
+    """
+    Crea (o recrea) un usuario para pegarle a /analytics.
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(User).filter_by(email=EMAIL).first()
+        if existing:
+            for o in db.query(Order).filter(Order.user_id == existing.id).all():
+                db.delete(o)
+            db.delete(existing)
+            db.commit()
+
+        u = User(
+            nombre="Analytics",
+            apellido="Test",
+            tipo_doc="DNI",
+            nro_doc="99999997",
+            email=EMAIL,
+            tel="555",
+            palabra_seg="gato",
+            password_hash=hash_password(PASSWORD),
+            acepta_terminos=True,
+        )
+        db.add(u)
+        db.commit()
+    finally:
+        db.close()
+
+
+def auth_headers():
+    crear_usuario_analytics()
+    resp = client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_batch_matches_individual_endpoints():
+    """
+    POST /analytics/batch devuelve lo mismo que los GET individuales
+    para el mismo rango.
+    """
+    headers = auth_headers()
+    hoy = date.today()
+    params = {"start": str(hoy - timedelta(days=365)), "end": str(hoy)}
+
+    payload = {
+        **params,
+        "widgets": [
+            {"type": "summary"},
+            {"type": "daily"},
+            {"type": "category_margins"},
+            {"type": "top_products", "top": 3},
+            {"type": "operations", "key": "ops"},
+        ],
+    }
+    resp = client.post("/analytics/batch", json=payload, headers=headers)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    def get(path, extra=None):
+        r = client.get(path, params={**params, **(extra or {})}, headers=headers)
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    assert data["summary"] == get("/analytics/sales-summary")
+    assert data["daily"] == get("/analytics/sales-daily")
+    assert data["category_margins"] == get("/analytics/category-margins")
+    assert data["top_products"] == get("/analytics/top-products", {"top": 3})
+    assert data["ops"] == get("/analytics/operations")
+
+
+def test_batch_rejects_unknown_widget():
+    headers = auth_headers()
+    payload = {"start": "2024-01-01", "end": "2024-01-31", "widgets": [{"type": "nope"}]}
+    resp = client.post("/analytics/batch", json=payload, headers=headers)
+    assert resp.status_code == 422
+
+
+def test_sales_daily_incremental_matches_and_invalidates():
+    """
+    sales-daily?incremental=true da lo mismo que el cálculo completo,
+    y una orden nueva en un día cerrado invalida ese día del cache.
+    """
+    headers = auth_headers()
+    hoy = date.today()
+    params = {"start": str(hoy - timedelta(days=30)), "end": str(hoy)}
+
+    def daily(incremental):
+        r = client.get(
+            "/analytics/sales-daily",
+            params={**params, "incremental": incremental},
+            headers=headers,
+        )
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    assert daily(True) == daily(False)
+
+    # orden del usuario (comprador) hace 10 días -> día cerrado ya cacheado
+    dia = hoy - timedelta(days=10)
+    db = SessionLocal()
+    try:
+        uid = db.query(User.id).filter_by(email=EMAIL).scalar()
+        o = Order(
+            user_id=uid,
+            user_name="Analytics Test",
+            status="Pendiente",
+            created_at=datetime.combine(dia, datetime.min.time()).replace(hour=12),
+            total_amount=1500,
+        )
+        o.items.append(OrderItem(product_name="Producto test", quantity=3, unit_price=500))
+        db.add(o)
+        db.commit()
+        order_id = o.id
+    finally:
+        db.close()
+
+    inc = daily(True)
+    assert inc == daily(False)
+    assert {"date": dia.isoformat(), "total": 1500.0} in inc
+
+    # cambiar la cantidad de un item también invalida el día
+    db = SessionLocal()
+    try:
+        item = db.query(OrderItem).filter_by(order_id=order_id).one()
+        item.quantity = 4
+        db.commit()
+    finally:
+        db.close()
+
+    inc = daily(True)
+    assert inc == daily(False)
+    assert {"date": dia.isoformat(), "total": 2000.0} in inc
+
+
+def test_sales_daily_recompute_between_flush_and_commit_is_not_kept():
+    from backend.app.services.sales_daily_cache import sales_daily_cache
+
+    headers = auth_headers()
+    hoy = date.today()
+    dia = hoy - timedelta(days=10)
+    params = {"start": str(hoy - timedelta(days=30)), "end": str(hoy)}
+
+    def daily(incremental):
+        r = client.get("/analytics/sales-daily", params={**params, "incremental": incremental}, headers=headers)
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    sales_daily_cache.clear()
+    db = SessionLocal()
+    try:
+        uid = db.query(User.id).filter_by(email=EMAIL).scalar()
+        o = Order(user_id=uid, user_name="Analytics Test", status="Pendiente", total_amount=700,
+                  created_at=datetime.combine(dia, datetime.min.time()).replace(hour=12))
+        o.items.append(OrderItem(product_name="Entre flush y commit", quantity=1, unit_price=700))
+        db.add(o)
+        db.flush()
+        # otro request recalcula (y cachea) el día antes del commit: todavía sin la orden
+        assert {"date": dia.isoformat(), "total": 700.0} not in daily(True)
+        db.commit()
+    finally:
+        db.close()
+
+    inc = daily(True)
+    assert {"date": dia.isoformat(), "total": 700.0} in inc
+    assert inc == daily(False)
+
+
+def test_sales_daily_cache_entries_expire():
+    from backend.app.services.sales_daily_cache import SalesDailyCache
+
+    cache = SalesDailyCache(ttl=-1)
+    d = date(2024, 1, 1)
+    cache.put_many("a", {d: 1.0}, cache.generation)
+    assert cache.get_many("a", [d]) == ({}, [d])
+
+
+def test_sales_daily_cache_is_lru_by_scope():
+    from backend.app.services.sales_daily_cache import SalesDailyCache
+
+    cache = SalesDailyCache(max_scopes=2)
+    d = date(2024, 1, 1)
+    for scope in ("a", "b", "c"):
+        cache.put_many(scope, {d: 1.0}, cache.generation)
+        cache.get_many("a", [d])  # "a" es el más usado
+    assert cache.get_many("a", [d]) == ({d: 1.0}, [])
+    assert cache.get_many("b", [d]) == ({}, [d])
+    assert cache.get_many("c", [d]) == ({d: 1.0}, [])
@@ -0,0 +1,286 @@
+# tests/test_cart.py
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app.main import app
+from backend.app.crud import cart_crud
+from backend.app.db import SessionLocal, engine
+from backend.app.models.models import CartItem
+from backend.app.routers.routes_cart import CartOp
+from backend.app.schemas.cart_schemas import CartOut
+from backend.app.services.cart_store import CartStore, MemoryBackend, SqliteBackend, set_cart_store
+
+from tests.test_product_bulk import crear_vendedor, productos_del_vendedor
+
+client = TestClient(app)
+
+
+def login_comprador() -> dict:
+    r = client.post("/auth/login", json={"email": "cliente.lucas@mktlab.com", "password": "Lucas123!"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@contextmanager
+def contar_queries():
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+
+def producto_con_stock(sku: str, stock: int = 10) -> str:
+    headers = crear_vendedor()
+    body = f"sku,name,price,stock\n{sku},Producto {sku},500,{stock}\n"
+    r = client.post("/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    return productos_del_vendedor()[sku].id
+
+
+def vaciar_carrito(headers: dict) -> None:
+    for it in client.get("/cart", headers=headers).json()["items"]:
+        client.delete(f"/cart/items/{it['id']}", headers=headers)
+
+
+def test_cart_mutations_return_updated_cart_in_constant_queries():
+    pid = producto_con_stock("C-1")
+    headers = login_comprador()
+    vaciar_carrito(headers)
+
+    r = client.post("/cart/items", json={"product_id": pid, "qty": 1}, headers=headers)
+    assert r.status_code == 201, r.text
+    item = next(it for it in r.json()["items"] if it["product_id"] == pid)
+
+    with contar_queries() as statements:
+        r = client.patch(f"/cart/items/{item['id']}", json={"qty": 3}, headers=headers)
+    assert r.status_code == 200, r.text
+    cart = r.json()
+    assert [it["qty"] for it in cart["items"] if it["id"] == item["id"]] == [3]
+    assert cart["total"] == 1500
+    # usuario + carrito + items + UPDATE (sin releer después del commit)
+    assert len(statements) <= 5, statements
+
+    r = client.delete(f"/cart/items/{item['id']}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["items"] == [] and r.json()["total"] == 0
+
+    assert client.patch(f"/cart/items/{item['id']}", json={"qty": 1}, headers=headers).status_code == 404
+
+
+def test_cart_batch_is_atomic():
+    pid = producto_con_stock("C-2", stock=5)
+    headers = login_comprador()
+    vaciar_carrito(headers)
+
+    r = client.post("/cart/batch", headers=headers, json={"ops": [
+        {"op": "add", "product_id": pid, "qty": 2},
+        {"op": "set", "product_id": pid, "qty": 4},
+    ]})
+    assert r.status_code == 200, r.text
+    assert [(it["product_id"], it["qty"]) for it in r.json()["items"]] == [(pid, 4)]
+    item_id = r.json()["items"][0]["id"]
+
+    # el segundo add no tiene stock (quedan 3): no se aplica nada, ni el remove
+    r = client.post("/cart/batch", headers=headers, json={"ops": [
+        {"op": "remove", "item_id": item_id},
+        {"op": "add", "product_id": pid, "qty": 1},
+        {"op": "add", "product_id": pid, "qty": 3},
+    ]})
+    assert r.status_code == 400
+    assert r.json()["detail"]["op"] == 2
+    cart = client.get("/cart", headers=headers).json()
+    assert [(it["id"], it["qty"]) for it in cart["items"]] == [(item_id, 4)]
+    assert productos_del_vendedor()["C-2"].stock == 3
+
+    r = client.post("/cart/batch", headers=headers, json={"ops": [{"op": "set", "item_id": item_id}]})
+    assert r.status_code == 422
+
+    r = client.post("/cart/batch", headers=headers, json={"ops": [{"op": "remove", "item_id": item_id}]})
+    assert r.status_code == 200 and r.json()["items"] == []
+
+
+def test_interleaved_mutations_do_not_lose_items():
+    headers = crear_vendedor()
+    body = "sku,name,price,stock\nC-4,Producto C-4,500,5\nC-5,Producto C-5,500,5\n"
+    r = client.post("/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    prods = productos_del_vendedor()
+    p1, p2 = prods["C-4"].id, prods["C-5"].id
+    headers = login_comprador()
+    vaciar_carrito(headers)
+    user_id = client.get("/cart", headers=headers).json()["user_id"]
+
+    # A lee la foto (vacía), B agrega p2 y commitea, recién ahí A agrega p1
+    db = SessionLocal()
+    try:
+        snapshot = cart_crud.cart_to_out(cart_crud.get_or_create_cart(db, user_id))
+        r = client.post("/cart/items", json={"product_id": p2, "qty": 1}, headers=headers)
+        assert r.status_code == 201, r.text
+        cart_crud.commit_cart_ops(db, snapshot, [CartOp(op="add", product_id=p1, qty=2)])
+    finally:
+        db.close()
+
+    items = {it["product_id"]: it["qty"] for it in client.get("/cart", headers=headers).json()["items"]}
+    assert items == {p1: 2, p2: 1}
+    stock = productos_del_vendedor()
+    assert (stock["C-4"].stock, stock["C-5"].stock) == (3, 4)
+    vaciar_carrito(headers)
+
+
+def qty_en_base(item_id: str):
+    db = SessionLocal()
+    try:
+        ci = db.get(CartItem, item_id)
+        return ci.qty if ci else None
+    finally:
+        db.close()
+
+
+def test_cart_store_reads_from_memory_and_writes_behind():
+    pid = producto_con_stock("C-3")
+    headers = login_comprador()
+    vaciar_carrito(headers)
+
+    store = CartStore(MemoryBackend())
+    previous = set_cart_store(store)
+    try:
+        r = client.post("/cart/items", json={"product_id": pid, "qty": 1}, headers=headers)
+        assert r.status_code == 201, r.text
+        item_id = r.json()["items"][0]["id"]
+        assert qty_en_base(item_id) is None  # todavía solo en el store
+
+        with contar_queries() as statements:
+            r = client.get("/cart", headers=headers)
+        assert [it["id"] for it in r.json()["items"]] == [item_id]
+        assert not any("cart" in s for s in statements), statements
+
+        r = client.patch(f"/cart/items/{item_id}", json={"qty": 2}, headers=headers)
+        assert r.status_code == 200
+        assert store.flush() == 1
+        assert qty_en_base(item_id) == 2
+
+        r = client.patch(f"/cart/items/{item_id}", json={"qty": 3}, headers=headers)
+        # el checkout escribe lo pendiente antes de leer el carrito
+        r = client.post("/orders/checkout", headers=headers)
+        assert r.status_code == 201, r.text
+        assert r.json()["total_amount"] == 1500
+        assert client.get("/cart", headers=headers).json()["items"] == []
+        store.flush()
+        assert qty_en_base(item_id) is None
+    finally:
+        set_cart_store(previous)
+
+
+def test_store_miss_does_not_overwrite_a_concurrent_mutation(monkeypatch):
+    pid = producto_con_stock("C-6", stock=25)
+    headers = login_comprador()
+    vaciar_carrito(headers)
+    user_id = client.get("/cart", headers=headers).json()["user_id"]
+
+    store = CartStore(MemoryBackend())
+    previous = set_cart_store(store)
+    original = cart_crud.get_or_create_cart
+    calls = []
+
+    def leer_y_mutar(db, uid, lock=False):
+        cart = original(db, uid, lock)
+        if not calls:
+            # entre la lectura de la base (foto vacía) y el llenado del store
+            calls.append(None)
+            calls[0] = client.post("/cart/items", json={"product_id": pid, "qty": 2}, headers=headers)
+        return cart
+
+    monkeypatch.setattr(cart_crud, "get_or_create_cart", leer_y_mutar)
+    db = SessionLocal()
+    try:
+        cart = cart_crud.load_cart(db, user_id)
+    finally:
+        db.close()
+        set_cart_store(previous)
+    assert calls[0].status_code == 201, calls[0].text
+
+    assert [(it.product_id, it.qty) for it in cart.items] == [(pid, 2)]
+    assert [it.qty for it in store.get(user_id).items] == [2]
+    assert store.flush() == 1
+    assert qty_en_base(cart.items[0].id) == 2
+    assert productos_del_vendedor()["C-6"].stock == 23
+    vaciar_carrito(headers)
+
+
+def test_cart_emptied_keeps_items_added_after_checkout_snapshot():
+    headers = crear_vendedor()
+    body = "sku,name,price,stock\nC-7,Producto C-7,500,5\nC-8,Producto C-8,500,5\n"
+    r = client.post("/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    prods = productos_del_vendedor()
+    p1, p2 = prods["C-7"].id, prods["C-8"].id
+    headers = login_comprador()
+    vaciar_carrito(headers)
+
+    store = CartStore(MemoryBackend())
+    previous = set_cart_store(store)
+    try:
+        cart = client.post("/cart/items", json={"product_id": p1, "qty": 2}, headers=headers).json()
+        snapshot = store.get_raw(cart["user_id"])  # la foto que usó el checkout
+        r = client.post("/cart/items", json={"product_id": p2, "qty": 1}, headers=headers)
+        assert r.status_code == 201, r.text
+
+        cart_crud.cart_emptied(cart["user_id"], cart["id"], snapshot, {cart["items"][0]["id"]: 2})
+        left = store.get(cart["user_id"])
+        assert [(it.product_id, it.qty) for it in left.items] == [(p2, 1)]
+        assert left.total == 500
+    finally:
+        set_cart_store(previous)
+    vaciar_carrito(headers)
+
+
+def test_sqlite_backend_is_a_shared_kv(tmp_path):
+    path = str(tmp_path / "carts.sqlite3")
+    a, b = SqliteBackend(path), SqliteBackend(path)  # como dos workers
+    a.set("u1", "{}", dirty=True)
+    a.set("u2", "{}", dirty=False)
+    assert b.get("u1") == "{}"
+    assert b.pop_dirty(10) == ["u1"]
+    assert a.pop_dirty(10) == []
+    b.delete("u1")
+    assert a.get("u1") is None
+
+
+def test_compare_and_set_rejects_stale_values(tmp_path):
+    for backend in (MemoryBackend(), SqliteBackend(str(tmp_path / "cas.sqlite3"))):
+        assert backend.compare_and_set("u1", None, "v1")
+        assert not backend.compare_and_set("u1", None, "v2")  # ya existe
+        assert backend.compare_and_set("u1", "v1", "v2")
+        assert not backend.compare_and_set("u1", "v1", "v3")  # foto vieja
+        assert backend.get("u1") == "v2"
+        assert backend.compare_and_set("u1", "v2", "v3", dirty=False)  # igual a la base
+        assert backend.pop_dirty(10) == []
+        assert backend.compare_and_set("u1", "v3", "v4")
+        assert backend.pop_dirty(10) == ["u1"]
+
+
+def test_flush_skips_only_the_failing_cart(monkeypatch):
+    written = []
+
+    def persist(db, carts):
+        if any(c.id == "roto" for c in carts):
+            raise RuntimeError("fila inválida")
+        written.extend(c.id for c in carts)
+
+    monkeypatch.setattr(cart_crud, "persist_carts", persist)
+    store = CartStore(MemoryBackend())
+    for cart_id in ("c1", "roto", "c2"):
+        store.put(f"u-{cart_id}", CartOut(id=cart_id, user_id=f"u-{cart_id}", items=[], total=0))
+
+    assert store.flush() == 2
+    assert sorted(written) == ["c1", "c2"]
+    assert store.backend.pop_dirty(10) == []  # el roto no vuelve a quedar sucio
+    assert store.get("u-roto") is not None
@@ -0,0 +1,238 @@
+# tests/test_comments.py
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app.main import app
+from backend.app.db import SessionLocal, engine
+from backend.app.models.models import (
+    User, Product, ProductComment, Order, OrderItem, UserProductEntitlement,
+)
+from backend.app.security import hash_password
+from backend.app.services.comment_pages import CommentPageCache, comment_page_cache
+
+client = TestClient(app)
+
+EMAIL = "comments_test@mktlab.com"
+
+
+def crear_producto_con_comentarios(ratings: list[int]) -> tuple[str, str]:
+    """
+    Crea (o recrea) un usuario con un producto y un comentario por rating,
+    un minuto más nuevo cada uno. Devuelve (user_id, product_id).
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(User).filter_by(email=EMAIL).first()
+        if existing:
+            for p in db.query(Product).filter(Product.seller_id == existing.id).all():
+                db.delete(p)
+            for o in db.query(Order).filter(Order.user_id == existing.id).all():
+                db.delete(o)
+            db.query(UserProductEntitlement).filter_by(user_id=existing.id).delete()
+            db.delete(existing)
+            db.commit()
+
+        u = User(
+            nombre="Comments",
+            apellido="Test",
+            tipo_doc="DNI",
+            nro_doc="99999994",
+            email=EMAIL,
+            tel="555",
+            palabra_seg="gato",
+            password_hash=hash_password("Comments123!"),
+            acepta_terminos=True,
+        )
+        db.add(u)
+        db.flush()
+
+        p = Product(seller_id=u.id, name="Producto comments test", price=100, stock=5)
+        db.add(p)
+        db.flush()
+
+        base = datetime(2024, 1, 1, 12, 0)
+        for i, r in enumerate(ratings):
+            db.add(ProductComment(
+                product_id=p.id, user_id=u.id, rating=r,
+                text=f"c{i}", created_at=base + timedelta(minutes=i),
+            ))
+        db.commit()
+        return u.id, p.id
+    finally:
+        db.close()
+
+
+def test_product_comments_cursor_pagination_and_summary():
+    _, pid = crear_producto_con_comentarios([10, 8, 8, 3, 1])
+
+    vistos = []
+    params = {"limit": 2}
+    while True:
+        r = client.get(f"/products/{pid}/comments", params=params)
+        assert r.status_code == 200, r.text
+        vistos.extend(c["text"] for c in r.json())
+        nxt = r.headers.get("X-Next-Cursor")
+        if not nxt:
+            break
+        params = {"limit": 2, "cursor": nxt}
+
+    # más nuevos primero, sin repetidos ni faltantes
+    assert vistos == ["c4", "c3", "c2", "c1", "c0"]
+
+    summary = client.get(f"/products/{pid}/comments/summary").json()
+    assert summary["count"] == 5
+    assert summary["avg"] == 6.0
+    assert summary["histogram"]["8"] == 2
+    assert summary["histogram"]["5"] == 0
+    assert len(summary["histogram"]) == 10
+
+    # /comments?product_id usa el mismo orden y cursor
+    r = client.get("/comments", params={"product_id": pid, "limit": 3})
+    assert [c["comment"] for c in r.json()] == ["c4", "c3", "c2"]
+    r = client.get("/comments", params={"product_id": pid, "cursor": r.headers["X-Next-Cursor"]})
+    assert [c["comment"] for c in r.json()] == ["c1", "c0"]
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_first_page_cache_is_invalidated_by_new_comment():
+    uid, pid = crear_producto_con_comentarios([5])
+
+    first = client.get(f"/products/{pid}/comments").json()
+    assert [c["text"] for c in first] == ["c0"]
+    assert client.get(f"/products/{pid}/comments").json() == first  # desde el cache
+
+    db = SessionLocal()
+    try:
+        db.add(ProductComment(product_id=pid, user_id=uid, rating=9, text="nuevo"))
+        db.commit()
+    finally:
+        db.close()
+
+    again = client.get(f"/products/{pid}/comments").json()
+    assert [c["text"] for c in again] == ["nuevo", "c0"]
+    assert client.get(f"/products/{pid}/comments/summary").json()["count"] == 2
+
+
+def test_comment_cache_is_bounded():
+    comment_page_cache.clear()
+    for i in range(5):
+        assert client.get(f"/products/no-existe-{i}/comments").json() == []
+        assert client.get(f"/products/no-existe-{i}/comments/summary").json()["count"] == 0
+    assert len(comment_page_cache) == 0  # ids inventados no se cachean
+
+    cache = CommentPageCache(ttl=60, max_products=2)
+    for pid in ("a", "b", "c"):
+        cache.put(pid, "summary", pid, cache.generation)
+        cache.get("a", "summary")  # "a" es el más usado
+    assert len(cache) == 2
+    assert cache.get("a", "summary") == "a" and cache.get("b", "summary") is None
+
+    cache = CommentPageCache(ttl=0)
+    cache.put("a", "summary", 1, cache.generation)
+    cache.put("b", "summary", 2, cache.generation)  # barre "a", ya vencido
+    assert len(cache) == 1
+
+
+def test_comments_invalid_cursor():
+    r = client.get("/comments", params={"cursor": "no-es-un-cursor"})
+    assert r.status_code == 400
+
+
+def test_comment_eligibility_comes_from_entitlements():
+    """
+    Solo al pasar la orden a Entregado aparece el permiso (user, product),
+    y con él se puede comentar.
+    """
+    uid, pid = crear_producto_con_comentarios([])
+    login = client.post("/auth/login", json={"email": EMAIL, "password": "Comments123!"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    payload = {"product_id": pid, "rating": 7, "comment": "llegó bien"}
+
+    db = SessionLocal()
+    try:
+        o = Order(user_id=uid, user_name="Comments Test", status="En camino", total_amount=100)
+        o.items.append(OrderItem(product_id=pid, product_name="x", quantity=1, unit_price=100))
+        db.add(o)
+        db.commit()
+        assert db.get(UserProductEntitlement, (uid, pid)) is None
+
+        assert client.post("/comments", json=payload, headers=headers).status_code == 403
+
+        o.status = "Entregado"
+        db.commit()
+        assert db.get(UserProductEntitlement, (uid, pid)) is not None
+    finally:
+        db.close()
+
+    r = client.post("/comments", json=payload, headers=headers)
+    assert r.status_code == 201, r.text
+
+
+def test_delivery_tolerates_entitlement_granted_concurrently():
+    """
+    Otra entrega del mismo (usuario, producto) ya grabó el permiso: el
+    cambio de status igual se commitea, con un solo INSERT que ignora
+    la fila repetida.
+    """
+    uid, pid = crear_producto_con_comentarios([])
+    db = SessionLocal()
+    try:
+        o = Order(user_id=uid, user_name="Comments Test", status="En camino", total_amount=100)
+        o.items.append(OrderItem(product_id=pid, product_name="x", quantity=1, unit_price=100))
+        db.add(o)
+        db.commit()
+
+        other = SessionLocal()
+        try:
+            other.add(UserProductEntitlement(user_id=uid, product_id=pid))
+            other.commit()
+        finally:
+            other.close()
+
+        statements = []
+
+        def _count(conn, cursor, statement, *args):
+            if "user_product_entitlements" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            o.status = "Entregado"
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        assert len(statements) == 1 and "ON CONFLICT DO NOTHING" in statements[0], statements
+        assert db.get(Order, o.id).status == "Entregado"
+    finally:
+        db.close()
+
+
+def test_comment_replay_with_same_client_id_is_not_duplicated():
+    """
+    Un POST que se guardó pero cuya respuesta no llegó vuelve desde el
+    outbox con el mismo client_id: el backend devuelve el comentario que
+    ya tiene en lugar de crear otro.
+    """
+    uid, pid = crear_producto_con_comentarios([])
+    db = SessionLocal()
+    try:
+        db.add(UserProductEntitlement(user_id=uid, product_id=pid))
+        db.commit()
+    finally:
+        db.close()
+    login = client.post("/auth/login", json={"email": EMAIL, "password": "Comments123!"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    payload = {"product_id": pid, "rating": 7, "comment": "llegó bien", "client_id": "abc123"}
+
+    first = client.post("/comments", json=payload, headers=headers)
+    again = client.post("/comments", json=payload, headers=headers)
+    assert first.status_code == 201, first.text
+    assert again.status_code in (200, 201), again.text
+    assert again.json()["id"] == first.json()["id"]
+
+    other = client.post("/comments", json={**payload, "client_id": "otro"}, headers=headers)
+    assert other.json()["id"] != first.json()["id"]
+    page = client.get(f"/products/{pid}/comments").json()
+    assert len(page) == 2
@@ -0,0 +1,96 @@
+# tests/test_comments_outbox.py
+import time
+from contextlib import closing
+from types import SimpleNamespace
+
+from streamlit_app.comments_outbox import (
+    CLAIM_TIMEOUT_SECONDS,
+    _connect,
+    enqueue,
+    import_legacy_csv,
+    local_comments,
+    pending_count,
+    replay_pending,
+)
+
+
+def fake_post(statuses):
+    """POST falso: devuelve los status en orden; None = backend caído."""
+    calls = []
+
+    def _post(url, json=None, headers=None, timeout=None):
+        calls.append(json)
+        code = statuses[len(calls) - 1]
+        if code is None:
+            raise ConnectionError("backend caído")
+        return SimpleNamespace(status_code=code, text="detalle")
+
+    return _post, calls
+
+
+def test_outbox_enqueue_read_and_replay_in_batches(tmp_path):
+    db = tmp_path / "outbox.sqlite3"
+    for i in range(5):
+        enqueue({"product_id": "p1", "rating": 8, "comment": f"c{i}"}, "u1", path=db)
+    enqueue({"product_id": "p2", "rating": 5, "comment": "otro"}, "u1", path=db)
+    enqueue({"product_id": "p1", "rating": 5, "comment": "de otro usuario"}, "u2", path=db)
+
+    assert len(local_comments("p1", path=db)) == 6
+    assert pending_count("u1", path=db) == 6
+
+    # backend caído en el tercer envío: corta ahí y deja el resto pendiente
+    post, calls = fake_post([201, 201, None])
+    res = replay_pending("http://api", "u1", {}, batch_size=2, post=post, path=db)
+    assert res == {"sent": 2, "rejected": 0, "pending": 4}
+
+    # vuelve el backend: manda todo lo del usuario, un 403 queda rechazado
+    post, calls = fake_post([201, 403, 201, 201])
+    res = replay_pending("http://api", "u1", {}, batch_size=2, post=post, path=db)
+    assert res == {"sent": 3, "rejected": 1, "pending": 0}
+    assert [c["comment"] for c in calls] == ["c2", "c3", "c4", "otro"]
+
+    # lo de u2 sigue pendiente y visible para el producto
+    assert [c["comment"] for c in local_comments("p1", path=db)] == ["de otro usuario"]
+
+
+def test_outbox_imports_legacy_csv_once(tmp_path):
+    db = tmp_path / "outbox.sqlite3"
+    csv_path = tmp_path / "comments.csv"
+    csv_path.write_text(
+        "product_id,user_name,rating,criteria,comment,date\n"
+        "p1,Ana,9.0,{},muy bueno,2024-01-02\n",
+        encoding="utf-8",
+    )
+
+    assert import_legacy_csv(csv_path, path=db) == 1
+    assert import_legacy_csv(csv_path, path=db) == 0
+    [c] = local_comments("p1", path=db)
+    assert c["comment"] == "muy bueno" and not c["pending"]
+
+
+def test_outbox_claims_rows_and_keeps_client_id(tmp_path):
+    db = tmp_path / "outbox.sqlite3"
+    enqueue({"product_id": "p1", "rating": 8, "comment": "a"}, "u1", path=db)
+    enqueue({"product_id": "p1", "rating": 8, "comment": "b", "client_id": "fijo"}, "u1", path=db)
+
+    # otra pestaña ya reclamó la primera fila: esta sesión no la manda
+    with closing(_connect(db)) as conn, conn:
+        conn.execute("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = 1", (time.time(),))
+
+    post, calls = fake_post([None])
+    res = replay_pending("http://api", "u1", {}, post=post, path=db)
+    assert [c["comment"] for c in calls] == ["b"]
+    assert calls[0]["client_id"] == "fijo"
+    assert res == {"sent": 0, "rejected": 0, "pending": 1}
+
+    # la reclamada quedó colgada: pasado el timeout vuelve a pendiente,
+    # y el reintento manda el mismo client_id que el primer envío
+    with closing(_connect(db)) as conn, conn:
+        conn.execute("UPDATE outbox SET claimed_at = ? WHERE id = 1", (time.time() - CLAIM_TIMEOUT_SECONDS - 1,))
+    sent_ids = []
+    for statuses in ([503], [201, 201]):
+        post, calls = fake_post(statuses)
+        replay_pending("http://api", "u1", {}, post=post, path=db)
+        sent_ids += [(c["comment"], c["client_id"]) for c in calls]
+    assert [c for c, _ in sent_ids] == ["a", "a", "b"]
+    assert sent_ids[0] == sent_ids[1] and sent_ids[2] == ("b", "fijo")
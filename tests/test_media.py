@@ -0,0 +1,159 @@
+# tests/test_media.py
+import asyncio
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.app.main import app
+from backend.app.services import product_media
+
+client = TestClient(app)
+
+
+def login(email: str, password: str) -> dict:
+    r = client.post("/auth/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def png(w: int, h: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (w, h), (200, 30, 30)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_upload_generates_immutable_thumbnails():
+    from tests.test_product_bulk import crear_vendedor
+
+    headers = crear_vendedor()
+    r = client.post("/media", headers=headers, files={"file": ("foto.png", png(1200, 600), "image/png")})
+    assert r.status_code == 201, r.text
+    body = r.json()
+    assert set(body["thumbnails"]) == {str(s) for s in product_media.THUMB_SIZES}
+
+    r = client.get(f"/media/{body['hash']}/160.webp")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/webp"
+    assert "immutable" in r.headers["cache-control"]
+    with Image.open(io.BytesIO(r.content)) as im:
+        assert im.size == (160, 80)
+
+    r = client.get(f"/media/{body['hash']}/160.webp", headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+
+    assert client.get(f"/media/{body['hash']}/333.webp").status_code == 400
+
+
+def test_upload_rejects_non_images_and_proxy_only_known_urls():
+    from tests.test_product_bulk import crear_vendedor
+
+    headers = crear_vendedor()
+    r = client.post("/media", headers=headers, files={"file": ("x.png", b"no soy png", "image/png")})
+    assert r.status_code == 422
+
+    r = client.get("/media/proxy", params={"url": "http://169.254.169.254/latest", "w": 160})
+    assert r.status_code == 404
+
+
+def test_proxy_refuses_internal_addresses():
+    """Un vendedor apunta la imagen de su producto a un servicio interno."""
+    from tests.test_product_bulk import crear_vendedor
+
+    hits = []
+
+    class Interno(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.end_headers()
+            self.wfile.write(png(10, 10))
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Interno)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/admin/secreto.png"
+        headers = crear_vendedor()
+        r = client.post("/products", headers=headers, json={
+            "name": "Producto trucho", "price": 100, "stock": 1, "image_url": url,
+        })
+        assert r.status_code == 201, r.text
+
+        r = client.get("/media/proxy", params={"url": url, "w": 160})
+        assert r.status_code == 502
+        assert r.json()["detail"] == "No se pudo obtener la imagen"
+        assert hits == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("url", [
+    "http://localhost/x.png",
+    "http://10.0.0.5/x.png",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/x.png",
+    "http://[::ffff:127.0.0.1]/x.png",
+    "http://0.0.0.0/x.png",
+    "ftp://example.com/x.png",
+])
+def test_check_public_url_rejects_internal_hosts(url):
+    with pytest.raises(product_media.MediaError):
+        asyncio.run(product_media.check_public_url(httpx.URL(url)))
+
+
+def test_download_connects_to_the_validated_ip(monkeypatch):
+    """
+    httpx no vuelve a resolver el host: conecta a la IP que se validó (el
+    nombre de prueba ni siquiera existe en DNS) y cada redirect se valida.
+    """
+    seen = []
+
+    class Origen(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append((self.path, self.headers["Host"]))
+            if self.path == "/salto":
+                self.send_response(302)
+                self.send_header("Location", "http://interno.example/admin")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.end_headers()
+            self.wfile.write(png(10, 10))
+
+        def log_message(self, *args):
+            pass
+
+    checked = []
+
+    async def fake_check(url):
+        checked.append(url.host)
+        if url.host == "imagenes.example":
+            return "127.0.0.1"
+        raise product_media.MediaError(f"{url.host} resuelve a una dirección interna")
+
+    monkeypatch.setattr(product_media, "check_public_url", fake_check)
+    server = HTTPServer(("127.0.0.1", 0), Origen)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base = f"http://imagenes.example:{server.server_port}"
+        data = asyncio.run(product_media._download(f"{base}/foto.png"))
+        assert data == png(10, 10)
+        assert seen == [("/foto.png", f"imagenes.example:{server.server_port}")]
+
+        with pytest.raises(product_media.MediaError):
+            asyncio.run(product_media._download(f"{base}/salto"))
+        assert checked[-2:] == ["imagenes.example", "interno.example"]
+        assert [p for p, _ in seen] == ["/foto.png", "/salto"]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,37 @@
+# tests/test_metrics.py
+from fastapi.testclient import TestClient
+
+from backend.app import metrics
+from backend.app.main import app
+
+client = TestClient(app)
+
+
+def test_metrics_por_template_de_ruta():
+    metrics.request_metrics.reset()
+    pid = client.get("/products").json()[0]["id"]
+    client.get(f"/products/{pid}")
+    client.get("/products/no-existe")
+    client.get("/no-existe")
+
+    body = client.get("/metrics").text
+    route = 'method="GET",route="/products/{product_id}"'
+    assert f"http_request_duration_seconds_count{{{route}}} 2" in body
+    assert f'http_requests_total{{{route},status="404"}} 1' in body
+    assert 'route="unmatched"' in body
+    assert pid not in body  # el id concreto no genera series
+
+    # cada GET /products/{id} hizo al menos una query
+    line = next(l for l in body.splitlines() if l.startswith(f"http_request_db_statements_sum{{{route}}}"))
+    assert float(line.split()[-1]) >= 2
+    line = next(l for l in body.splitlines() if l.startswith(f"http_response_size_bytes_sum{{{route}}}"))
+    assert float(line.split()[-1]) > 0
+
+
+def test_server_timing_opcional(monkeypatch):
+    assert "server-timing" not in client.get("/health").headers
+
+    monkeypatch.setattr(metrics, "SERVER_TIMING", True)
+    timing = client.get("/products").headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert "db;dur=" in timing and "queries" in timing
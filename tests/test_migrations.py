@@ -0,0 +1,64 @@
+# tests/test_migrations.py
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+from backend.app.db import Base, SCHEMA_REVISION
+from backend.app.models import models  # noqa: F401
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "backend" / "migrations"))
+    return cfg
+
+
+def test_schema_revision_is_head():
+    """
+    SCHEMA_REVISION (lo que verifica el startup) es la última migración.
+    """
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    assert SCHEMA_REVISION == head
+
+
+def test_migrations_match_models_and_create_hot_path_indexes(tmp_path):
+    """
+    upgrade head sobre una base vacía deja el mismo esquema que los modelos,
+    con los índices de los caminos calientes, y downgrade vuelve a cero.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'mig.db'}")
+    cfg = alembic_config()
+
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, "head")
+
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        assert diff == []
+
+        insp = inspect(conn)
+        indexes = {
+            (t, ix["name"])
+            for t in ("order_items", "orders", "users", "products")
+            for ix in insp.get_indexes(t)
+        }
+    assert ("order_items", "ix_order_items_seller_id") in indexes
+    assert ("orders", "ix_orders_created_at") in indexes
+    assert ("orders", "ix_orders_user_id") in indexes
+    assert ("users", "ix_users_estado_creado_en") in indexes
+    assert ("products", "ix_products_is_active_created_at") in indexes
+
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        command.downgrade(cfg, "base")
+
+    with engine.connect() as conn:
+        assert set(inspect(conn).get_table_names()) <= {"alembic_version"}
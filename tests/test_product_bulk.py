@@ -0,0 +1,219 @@
+# tests/test_product_bulk.py
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.db import SessionLocal
+from backend.app.models.models import User, Role, UserRole, Product, ProductImage
+from backend.app.security import hash_password
+
+client = TestClient(app)
+
+EMAIL = "bulk_test@mktlab.com"
+PASSWORD = "Bulk123!"
+
+
+def crear_vendedor() -> dict:
+    """
+    Crea (o recrea, sin productos) un usuario VENDEDOR y devuelve sus headers.
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(User).filter_by(email=EMAIL).first()
+        if existing:
+            for p in db.query(Product).filter(Product.seller_id == existing.id).all():
+                db.delete(p)
+            db.delete(existing)
+            db.commit()
+
+        role = db.query(Role).filter_by(code="VENDEDOR").first()
+        if not role:
+            role = Role(code="VENDEDOR", nombre="Vendedor")
+            db.add(role)
+            db.flush()
+
+        u = User(
+            nombre="Bulk",
+            apellido="Test",
+            tipo_doc="DNI",
+            nro_doc="99999993",
+            email=EMAIL,
+            tel="555",
+            palabra_seg="gato",
+            password_hash=hash_password(PASSWORD),
+            acepta_terminos=True,
+        )
+        db.add(u)
+        db.flush()
+        db.add(UserRole(user_id=u.id, role_id=role.id))
+        db.commit()
+    finally:
+        db.close()
+
+    r = client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def productos_del_vendedor() -> dict:
+    db = SessionLocal()
+    try:
+        seller = db.query(User).filter_by(email=EMAIL).one()
+        return {p.sku: p for p in db.query(Product).filter(Product.seller_id == seller.id).all()}
+    finally:
+        db.close()
+
+
+def test_import_csv_upserts_by_sku_and_reports_row_errors():
+    headers = crear_vendedor()
+    csv_body = (
+        "sku,name,price,stock,condition,images\n"
+        "A-1,Mate,1500,10,NUEVO,https://img/a1.jpg|https://img/a1b.jpg\n"
+        'A-2,"Bombilla, acero",800,5,USADO,\n'
+        "A-3,Sin precio,,3,NUEVO,\n"
+        "A-1,Repetido,1,1,NUEVO,\n"
+        ",Sin sku,100,1,NUEVO,\n"
+    )
+    r = client.post("/products/import", content=csv_body.encode(),
+                    headers={**headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    rep = r.json()
+    assert (rep["rows"], rep["created"], rep["updated"], rep["failed"]) == (5, 2, 0, 3)
+    assert [e["row"] for e in rep["errors"]] == [3, 4, 5]
+    assert "price" in rep["errors"][0]["errors"][0]
+    assert "repetido" in rep["errors"][1]["errors"][0]
+
+    prods = productos_del_vendedor()
+    assert prods["A-2"].name == "Bombilla, acero"
+
+    # segunda carga (NDJSON): A-1 se actualiza, A-9 es nuevo
+    ndjson = "\n".join(json.dumps(x) for x in [
+        {"sku": "A-1", "name": "Mate imperial", "price": 2000, "stock": 7},
+        {"sku": "A-9", "name": "Termo", "price": 9000, "stock": 2, "images": ["https://img/t.jpg"]},
+        "no es un objeto",
+    ])
+    r = client.post("/products/import", params={"format": "ndjson"}, content=ndjson.encode(), headers=headers)
+    rep = r.json()
+    assert (rep["created"], rep["updated"], rep["failed"]) == (1, 1, 1)
+
+    prods = productos_del_vendedor()
+    assert len(prods) == 3
+    assert (prods["A-1"].name, prods["A-1"].price, prods["A-1"].stock) == ("Mate imperial", 2000, 7)
+
+    db = SessionLocal()
+    try:
+        imgs = db.query(ProductImage).filter_by(product_id=prods["A-1"].id).count()
+    finally:
+        db.close()
+    assert imgs == 2  # sin `images` en la fila, no se tocan
+
+
+def test_import_requires_known_format_and_vendor():
+    headers = crear_vendedor()
+    r = client.post("/products/import", content=b"x", headers={**headers, "Content-Type": "text/plain"})
+    assert r.status_code == 415
+
+    login = client.post("/auth/login", json={"email": "cliente.lucas@mktlab.com", "password": "Lucas123!"})
+    buyer = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    r = client.post("/products/import", content=b"sku,name\n", headers={**buyer, "Content-Type": "text/csv"})
+    assert r.status_code == 403
+
+
+def test_bulk_patch_applies_all_or_nothing_with_versions():
+    headers = crear_vendedor()
+    body = "sku,name,price,stock\nB-1,Uno,100,1\nB-2,Dos,200,2\n"
+    r = client.post("/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert r.json()["created"] == 2
+    prods = productos_del_vendedor()
+    b1, b2 = prods["B-1"], prods["B-2"]
+    assert b1.version == 1
+
+    r = client.patch("/products/bulk", headers=headers, json={"items": [
+        {"id": b1.id, "version": 1, "price": 150, "stock": 0},
+        {"id": b2.id, "version": 1, "is_active": False},
+    ]})
+    assert r.status_code == 200, r.text
+    out = {x["id"]: x for x in r.json()}
+    assert (out[b1.id]["price"], out[b1.id]["stock"], out[b1.id]["version"]) == (150, 0, 2)
+    assert (out[b2.id]["price"], out[b2.id]["is_active"], out[b2.id]["version"]) == (200, False, 2)
+
+    # B-1 con versión vieja: 409 y B-2 tampoco se toca
+    r = client.patch("/products/bulk", headers=headers, json={"items": [
+        {"id": b1.id, "version": 1, "price": 1},
+        {"id": b2.id, "version": 2, "price": 1},
+    ]})
+    assert r.status_code == 409
+    assert r.json()["detail"]["conflicts"] == [{"id": b1.id, "expected": 1, "current": 2}]
+    prods = productos_del_vendedor()
+    assert (prods["B-1"].price, prods["B-2"].price, prods["B-2"].version) == (150, 200, 2)
+
+    # PUT por ORM también sube la versión
+    r = client.put(f"/products/{b2.id}", headers=headers, json={"stock": 9})
+    assert r.status_code == 200, r.text
+    assert r.json()["version"] == 3
+
+    r = client.patch("/products/bulk", headers=headers, json={"items": [{"id": "no-existe", "stock": 1}]})
+    assert r.status_code == 404
+
+
+def test_put_images_only_touches_changed_rows():
+    headers = crear_vendedor()
+    r = client.post("/products", headers=headers, json={
+        "name": "Con fotos", "price": 10, "stock": 1,
+        "images": ["https://img/1.jpg", "https://img/2.jpg", "https://img/3.jpg"],
+    })
+    assert r.status_code in (200, 201), r.text
+    pid = r.json()["id"]
+    before = {im["url"]: im["id"] for im in r.json()["images"]}
+
+    # se va la 1, se invierten 2 y 3, entra la 4
+    r = client.put(f"/products/{pid}", headers=headers, json={
+        "images": ["https://img/3.jpg", "https://img/2.jpg", "https://img/4.jpg"],
+    })
+    assert r.status_code == 200, r.text
+    after = r.json()["images"]
+    assert [im["url"] for im in after] == ["https://img/3.jpg", "https://img/2.jpg", "https://img/4.jpg"]
+    assert [im["sort_order"] for im in after] == [0, 1, 2]
+    # las que siguen conservan su id
+    assert after[0]["id"] == before["https://img/3.jpg"]
+    assert after[1]["id"] == before["https://img/2.jpg"]
+    assert after[2]["id"] not in before.values()
+    # cambiar solo las imágenes también sube la versión; repetirlas no
+    assert r.json()["version"] == 2
+    r = client.put(f"/products/{pid}", headers=headers, json={
+        "images": ["https://img/3.jpg", "https://img/2.jpg", "https://img/4.jpg"],
+    })
+    assert r.json()["version"] == 2
+    # campos e imágenes en el mismo PUT: una sola versión más
+    r = client.put(f"/products/{pid}", headers=headers, json={
+        "price": 12, "images": ["https://img/2.jpg", "https://img/4.jpg"],
+    })
+    assert r.json()["version"] == 3
+
+    db = SessionLocal()
+    try:
+        assert db.query(ProductImage).filter_by(product_id=pid).count() == 2
+    finally:
+        db.close()
+
+
+def test_concurrent_orm_updates_bump_version_twice():
+    headers = crear_vendedor()
+    r = client.post("/products/import", content=b"sku,name,price,stock\nV-1,Version,10,5\n",
+                    headers={**headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    pid = productos_del_vendedor()["V-1"].id
+
+    # las dos sesiones leen version=1 antes de que cualquiera escriba
+    a, b = SessionLocal(), SessionLocal()
+    try:
+        pa, pb = a.get(Product, pid), b.get(Product, pid)
+        pb.stock = 4
+        b.commit()
+        pa.price = 20
+        a.commit()
+        assert pa.version == 3
+    finally:
+        a.close()
+        b.close()
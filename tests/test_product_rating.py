@@ -0,0 +1,114 @@
+# tests/test_product_rating.py
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.db import SessionLocal
+from backend.app.models.models import User, Product, ProductComment, Order, OrderItem
+from backend.app.security import hash_password
+from backend.app.services.product_rating import recompute_product_ratings
+
+client = TestClient(app)
+
+EMAIL = "rating_test@mktlab.com"
+PASSWORD = "Rating123!"
+
+
+def crear_comprador_con_producto_entregado() -> tuple[str, str]:
+    """
+    Crea (o recrea) un comprador, un producto suyo de prueba y una orden
+    Entregada con ese producto. Devuelve (user_id, product_id).
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(User).filter_by(email=EMAIL).first()
+        if existing:
+            for o in db.query(Order).filter(Order.user_id == existing.id).all():
+                db.delete(o)
+            for p in db.query(Product).filter(Product.seller_id == existing.id).all():
+                db.delete(p)
+            db.delete(existing)
+            db.commit()
+
+        u = User(
+            nombre="Rating",
+            apellido="Test",
+            tipo_doc="DNI",
+            nro_doc="99999995",
+            email=EMAIL,
+            tel="555",
+            palabra_seg="gato",
+            password_hash=hash_password(PASSWORD),
+            acepta_terminos=True,
+        )
+        db.add(u)
+        db.flush()
+
+        p = Product(seller_id=u.id, name="Producto rating test", price=100, stock=5, rating=7)
+        db.add(p)
+        db.flush()
+
+        o = Order(user_id=u.id, user_name="Rating Test", status="Entregado", total_amount=100)
+        o.items.append(OrderItem(product_id=p.id, product_name=p.name, quantity=1, unit_price=100))
+        db.add(o)
+        db.commit()
+        return u.id, p.id
+    finally:
+        db.close()
+
+
+def get_product(pid: str) -> dict:
+    r = client.get(f"/products/{pid}")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_rating_aggregate_follows_comments_and_recompute():
+    uid, pid = crear_comprador_con_producto_entregado()
+
+    # sin comentarios: queda el rating cargado
+    assert get_product(pid)["rating"] == 7.0
+    assert get_product(pid)["rating_count"] == 0
+
+    # alta por la API
+    login = client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    r = client.post("/comments", json={"product_id": pid, "rating": 6, "comment": "ok"}, headers=headers)
+    assert r.status_code == 201, r.text
+    assert r.json()["comment"] == "ok"
+
+    # alta directa por el ORM
+    db = SessionLocal()
+    try:
+        db.add(ProductComment(product_id=pid, user_id=uid, rating=10))
+        db.commit()
+    finally:
+        db.close()
+
+    data = get_product(pid)
+    assert data["rating_count"] == 2
+    assert data["rating"] == 8.0
+
+    # baja y cambio de rating
+    db = SessionLocal()
+    try:
+        comments = db.query(ProductComment).filter_by(product_id=pid).order_by(ProductComment.rating).all()
+        db.delete(comments[0])          # borra el 6
+        comments[1].rating = 9          # 10 -> 9
+        db.commit()
+    finally:
+        db.close()
+
+    data = get_product(pid)
+    assert data["rating_count"] == 1
+    assert data["rating"] == 9.0
+
+    # contadores desfasados (p. ej. borrado en cascada por la DB): el recálculo los corrige
+    db = SessionLocal()
+    try:
+        db.query(Product).filter_by(id=pid).update({"rating_sum": 123, "rating_count": 7})
+        db.commit()
+        assert recompute_product_ratings(db, [pid]) == 1
+        p = db.get(Product, pid)
+        assert (p.rating_sum, p.rating_count) == (9, 1)
+    finally:
+        db.close()
@@ -0,0 +1,110 @@
+# tests/test_read_routing.py
+import os
+import shutil
+import sqlite3
+import textwrap
+import time
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from backend.app.main import app
+from backend.app.deps import READ_PRIMARY_HEADER, wants_primary
+from tests.test_startup import run_python
+
+client = TestClient(app)
+
+# vendedora del seed (backend/app/seed_demo_data.py)
+VENDOR_EMAIL = "vendedora.julia@mktlab.com"
+VENDOR_PASSWORD = "Julia123!"
+
+
+def _request(headers: dict) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_wants_primary_header():
+    assert not wants_primary(_request({}))
+    assert not wants_primary(_request({READ_PRIMARY_HEADER: "basura"}))
+    assert not wants_primary(_request({READ_PRIMARY_HEADER: str(time.time() - 10)}))
+    assert wants_primary(_request({READ_PRIMARY_HEADER: str(time.time() + 10)}))
+
+
+def test_write_marks_read_your_writes_and_read_sees_it():
+    """
+    Crear un producto devuelve X-Read-Primary-Until y, reenviándolo,
+    el detalle del producto ya se puede leer.
+    """
+    resp = client.post("/auth/login", json={"email": VENDOR_EMAIL, "password": VENDOR_PASSWORD})
+    assert resp.status_code == 200, resp.text
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    payload = {"name": "Producto read-your-writes", "price": 100, "stock": 1}
+    resp = client.post("/products", json=payload, headers=headers)
+    assert resp.status_code == 201, resp.text
+    until = resp.headers.get(READ_PRIMARY_HEADER)
+    assert until and float(until) > time.time()
+
+    pid = resp.json()["id"]
+    r = client.get(f"/products/{pid}", headers={READ_PRIMARY_HEADER: until})
+    assert r.status_code == 200, r.text
+    assert r.json()["name"] == payload["name"]
+
+    client.delete(f"/products/{pid}", headers=headers)
+
+
+def test_reads_go_to_replica_unless_read_primary_until_is_fresh(tmp_path):
+    """
+    Primario y réplica en dos archivos SQLite (copias de la base de tests);
+    en la réplica el producto tiene otro nombre para saber de dónde se leyó.
+    DATABASE_URL_READ se lee al importar: corre en un proceso aparte.
+    """
+    url = make_url(os.environ["DATABASE_URL"])
+    if url.get_backend_name() != "sqlite" or not url.database:
+        pytest.skip("necesita DATABASE_URL en un archivo SQLite")
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    shutil.copy(url.database, primary)
+    shutil.copy(url.database, replica)
+    with sqlite3.connect(replica) as conn:
+        pid = conn.execute("SELECT id FROM products WHERE is_active = 1 LIMIT 1").fetchone()[0]
+        conn.execute("UPDATE products SET name = 'desde-replica' WHERE id = ?", (pid,))
+
+    code = textwrap.dedent(f"""
+        import time
+        from fastapi.testclient import TestClient
+        from sqlalchemy import text
+        from starlette.requests import Request
+        from backend.app.main import app
+        from backend.app.db import SessionLocal
+        from backend.app.deps import READ_PRIMARY_HEADER, get_read_db
+
+        PID = {pid!r}
+
+        def leer(headers):
+            request = Request({{"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}})
+            deps = get_read_db(request, SessionLocal())
+            db = next(deps)
+            try:
+                return db.scalar(text("SELECT name FROM products WHERE id = :id"), {{"id": PID}})
+            finally:
+                deps.close()
+
+        vigente = {{READ_PRIMARY_HEADER: str(time.time() + 30)}}
+        vencido = {{READ_PRIMARY_HEADER: str(time.time() - 30)}}
+        assert leer({{}}) == "desde-replica"
+        assert leer(vencido) == "desde-replica"
+        assert leer(vigente) != "desde-replica"
+
+        with TestClient(app) as c:
+            assert c.get(f"/products/{{PID}}").json()["name"] == "desde-replica"
+            assert c.get(f"/products/{{PID}}", headers=vigente).json()["name"] != "desde-replica"
+    """)
+    proc = run_python(code, env={
+        "DATABASE_URL": f"sqlite:///{primary}",
+        "DATABASE_URL_READ": f"sqlite:///{replica}",
+    })
+    assert proc.returncode == 0, proc.stderr[-2000:]
@@ -0,0 +1,115 @@
+# tests/test_startup.py
+"""
+Arranque del API en un proceso limpio (como un worker nuevo).
+
+- Reporte de `python -X importtime` (visible con `pytest -s`): qué
+  módulos cuestan más al importar backend.app.main.
+- jose / passlib / cryptography no se importan al arrancar (se cargan
+  en el primer login / request autenticado).
+- Presupuesto de arranque: STARTUP_BUDGET_SECONDS (default 2.5), mínimo
+  de varias corridas para no depender del ruido de la máquina de CI.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.5"))
+LAZY_MODULES = ("jose", "passlib", "cryptography")
+
+
+def run_python(code: str, *args: str, env: dict | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def importtime_report(stderr: str) -> list[tuple[int, int, str]]:
+    """[(self_us, cumulative_us, modulo)] ordenado por acumulado."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cum_us), name.rstrip()))
+    return sorted(rows, key=lambda r: r[1], reverse=True)
+
+
+def test_importtime_report_and_lazy_crypto():
+    proc = run_python("import backend.app.main", "-X", "importtime")
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    rows = importtime_report(proc.stderr)
+    print("\n== -X importtime: backend.app.main (top 20 acumulado) ==")
+    for self_us, cum_us, name in rows[:20]:
+        print(f"{cum_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    loaded = {name.strip() for _, _, name in rows}
+    eager = sorted(m for m in loaded if m.split(".")[0] in LAZY_MODULES)
+    assert not eager, f"se importan al arrancar: {eager[:10]}"
+
+
+def test_startup_time_budget():
+    code = (
+        "import time\n"
+        "t0 = time.perf_counter()\n"
+        "import backend.app.main\n"
+        "print(time.perf_counter() - t0)\n"
+    )
+    times = []
+    for _ in range(3):
+        proc = run_python(code)
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        times.append(float(proc.stdout.strip().splitlines()[-1]))
+
+    best = min(times)
+    print(f"\nimport backend.app.main: {', '.join(f'{t:.3f}s' for t in times)} (presupuesto {STARTUP_BUDGET_SECONDS}s)")
+    assert best < STARTUP_BUDGET_SECONDS
+
+
+def test_api_routers_subset_skips_other_routers():
+    code = (
+        "import sys\n"
+        "from backend.app.main import app\n"
+        "paths = set(app.openapi()['paths'])\n"
+        "assert '/products' in paths, paths\n"
+        "assert not any(p.startswith('/analytics') for p in paths)\n"
+        "assert 'backend.app.routers.routes_analytics' not in sys.modules\n"
+    )
+    proc = run_python(code, env={"API_ROUTERS": "routes_products,routes_auth"})
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+
+def test_in_memory_sqlite_is_shared_with_async_engine():
+    # GET /products usa el engine async: tiene que ver las tablas que creó init_db
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "from backend.app.main import app\n"
+        "with TestClient(app) as c:\n"
+        "    r = c.get('/products')\n"
+        "    assert r.status_code == 200, r.text\n"
+    )
+    proc = run_python(code, env={"DATABASE_URL": "sqlite://"})
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+
+def test_async_url_is_resolved_lazily():
+    # un backend sin driver async conocido solo falla al usar el engine async
+    code = (
+        "import backend.app.db as db\n"
+        "db._ASYNC_DRIVERS.clear()\n"
+        "try:\n"
+        "    db.get_async_sessionmaker()\n"
+        "except RuntimeError as e:\n"
+        "    assert 'driver async' in str(e), e\n"
+        "else:\n"
+        "    raise SystemExit('no falló')\n"
+    )
+    proc = run_python(code)
+    assert proc.returncode == 0, proc.stderr[-2000:] + proc.stdout
@@ -0,0 +1,46 @@
+# tests/test_synthetic_data.py
+from sqlalchemy import create_engine, func, select
+
+from backend.app.db import Base
+from backend.app.models.models import (
+    Order, OrderItem, Product, ProductComment, UserProductEntitlement,
+)
+from backend.app.seed_synthetic_data import generate
+
+
+def test_generate_bulk_load_is_consistent():
+    eng = create_engine("sqlite://")
+    Base.metadata.create_all(eng)
+
+    summary = generate(eng, 2000, seed=7)
+    c = summary["counts"]
+    assert c["order_items"] == 2000
+    assert c["orders"] > 0 and c["comments"] > 0
+
+    with eng.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(OrderItem)) == 2000
+
+        # total de cada orden = suma de sus items
+        mismatched = conn.scalar(
+            select(func.count()).select_from(
+                select(Order.id)
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .group_by(Order.id, Order.total_amount)
+                .having(func.sum(OrderItem.unit_price * OrderItem.quantity) != Order.total_amount)
+                .subquery()
+            )
+        )
+        assert mismatched == 0
+
+        # rating agregado = comentarios
+        assert conn.scalar(select(func.sum(Product.rating_count))) == c["comments"]
+        assert conn.scalar(select(func.sum(Product.rating_sum))) == conn.scalar(
+            select(func.sum(ProductComment.rating))
+        )
+        assert conn.scalar(select(func.count()).select_from(UserProductEntitlement)) == c["entitlements"]
+
+        # sesgo: el producto más vendido vende bastante más que el promedio
+        top, avg = conn.execute(
+            select(func.max(Product.sold_count), func.avg(Product.sold_count))
+        ).one()
+        assert top > 5 * avg